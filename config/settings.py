@@ -4,57 +4,137 @@ Centralized configuration management for the FPL system
 """
 
 import os
+from functools import lru_cache
+from types import MappingProxyType
 from dotenv import load_dotenv
 
+@lru_cache(maxsize=1)
+def _load_dotenv_once() -> bool:
+    """Parse the .env file at most once per process"""
+    return load_dotenv()
+
 # Load environment variables from .env file
-load_dotenv()
-
-# Database configuration for FANTASYPL
-DATABASE_CONFIG = {
-    'host': os.getenv('DB_HOST', 'localhost'),
-    'database': os.getenv('DB_NAME', 'fantasypl_data'),  # Updated for FANTASYPL
-    'user': os.getenv('DB_USER', 'postgres'),
-    'password': os.getenv('DB_PASSWORD'),
-    'port': int(os.getenv('DB_PORT', 5432))
-}
+_load_dotenv_once()
 
-# Redis configuration (optional caching)
-REDIS_CONFIG = {
-    'host': os.getenv('REDIS_HOST', 'localhost'),
-    'port': int(os.getenv('REDIS_PORT', 6379)),
-    'db': int(os.getenv('REDIS_DB', 0)),
-    'decode_responses': True
-}
+# Typed settings parsed once from the environment (see _load_env_values)
+DB_HOST: str
+DB_NAME: str
+DB_USER: str
+DB_PASSWORD: str
+DB_PORT: int
+REDIS_HOST: str
+REDIS_PORT: int
+REDIS_DB: int
+FPL_BASE_URL: str
+RATE_LIMIT_SECONDS: float
+API_TIMEOUT: int
+
+# Application settings
+CURRENT_SEASON: str
+LOG_LEVEL: str
+LOG_FILE: str
+
+def _load_env_values():
+    """Snapshot the environment and parse it into the typed module constants"""
+    global _ENV, DB_HOST, DB_NAME, DB_USER, DB_PASSWORD, DB_PORT
+    global REDIS_HOST, REDIS_PORT, REDIS_DB
+    global FPL_BASE_URL, RATE_LIMIT_SECONDS, API_TIMEOUT
+    global CURRENT_SEASON, LOG_LEVEL, LOG_FILE
+    
+    # Read once so config lookups never hit os.environ
+    _ENV = os.environ.copy()
+    
+    DB_HOST = _ENV.get('DB_HOST', 'localhost')
+    DB_NAME = _ENV.get('DB_NAME', 'fantasypl_data')  # Updated for FANTASYPL
+    DB_USER = _ENV.get('DB_USER', 'postgres')
+    DB_PASSWORD = _ENV.get('DB_PASSWORD')
+    DB_PORT = int(_ENV.get('DB_PORT', '5432'))
+    
+    REDIS_HOST = _ENV.get('REDIS_HOST', 'localhost')
+    REDIS_PORT = int(_ENV.get('REDIS_PORT', '6379'))
+    REDIS_DB = int(_ENV.get('REDIS_DB', '0'))
+    
+    FPL_BASE_URL = _ENV.get('FPL_BASE_URL', 'https://fantasy.premierleague.com/api')
+    RATE_LIMIT_SECONDS = float(_ENV.get('RATE_LIMIT_SECONDS', '1.0'))
+    API_TIMEOUT = int(_ENV.get('API_TIMEOUT', '30'))
+    
+    CURRENT_SEASON = _ENV.get('CURRENT_SEASON', '2024-25')
+    LOG_LEVEL = _ENV.get('LOG_LEVEL', 'INFO')
+    LOG_FILE = _ENV.get('LOG_FILE', 'data/logs/fantasypl_agent.log')
+
+_load_env_values()
+
+def _build_database_config():
+    """Database configuration for FANTASYPL"""
+    return MappingProxyType({
+        'host': DB_HOST,
+        'database': DB_NAME,
+        'user': DB_USER,
+        'password': DB_PASSWORD,
+        'port': DB_PORT
+    })
+
+def _build_redis_config():
+    """Redis configuration (optional caching)"""
+    return MappingProxyType({
+        'host': REDIS_HOST,
+        'port': REDIS_PORT,
+        'db': REDIS_DB,
+        'decode_responses': True
+    })
+
+def _build_fpl_config():
+    """FPL API settings"""
+    return MappingProxyType({
+        'base_url': FPL_BASE_URL,
+        'rate_limit_seconds': RATE_LIMIT_SECONDS,
+        'timeout_seconds': API_TIMEOUT
+    })
 
-# FPL API settings
-FPL_CONFIG = {
-    'base_url': os.getenv('FPL_BASE_URL', 'https://fantasy.premierleague.com/api'),
-    'rate_limit_seconds': float(os.getenv('RATE_LIMIT_SECONDS', 1.0)),
-    'timeout_seconds': int(os.getenv('API_TIMEOUT', 30))
+# Config mappings built on first access (see __getattr__ below)
+_LAZY_CONFIGS = {
+    'DATABASE_CONFIG': _build_database_config,
+    'REDIS_CONFIG': _build_redis_config,
+    'FPL_CONFIG': _build_fpl_config
 }
 
-# Application settings
-CURRENT_SEASON = os.getenv('CURRENT_SEASON', '2024-25')
-LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
-LOG_FILE = os.getenv('LOG_FILE', 'data/logs/fantasypl_agent.log')
+def __getattr__(name):
+    """Build lazy config mappings on first access and memoize them as globals"""
+    builder = _LAZY_CONFIGS.get(name)
+    if builder is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = builder()
+    globals()[name] = value
+    return value
+
+def invalidate_env_cache():
+    """Re-read the environment and rebuild the cached config values
+    
+    Modules that did `from config.settings import X` keep their old
+    reference; read through the module (settings.X) to see the refresh.
+    """
+    _load_env_values()
+    for name in _LAZY_CONFIGS:
+        globals().pop(name, None)
+    validate_config.cache_clear()
 
 # Historical seasons to analyze
-HISTORICAL_SEASONS = [
+HISTORICAL_SEASONS = (
     '2022-23',
     '2023-24', 
     '2024-25'
-]
+)
 
-# Player position mapping
-POSITIONS = {
+# Player position mapping (read-only)
+POSITIONS = MappingProxyType({
     1: 'GK',   # Goalkeeper
     2: 'DEF',  # Defender  
     3: 'MID',  # Midfielder
     4: 'FWD'   # Forward
-}
+})
 
 # Team strength categories (for analysis)
-BIG_SIX_TEAMS = [1, 2, 3, 4, 5, 6]  # Arsenal, Chelsea, Liverpool, Man City, Man United, Tottenham
+BIG_SIX_TEAMS = frozenset((1, 2, 3, 4, 5, 6))  # Arsenal, Chelsea, Liverpool, Man City, Man United, Tottenham
 
 # Analysis settings
 ANALYSIS_CONFIG = {
@@ -73,14 +153,18 @@ PATHS = {
     'cache': 'data/cache/'
 }
 
+# On-disk copy of the latest bootstrap-static fetch, streamed by the ingest
+BOOTSTRAP_CACHE_FILE = PATHS['cache'] + 'bootstrap.json'
+
 # Validation function
+@lru_cache(maxsize=1)
 def validate_config():
     """Validate that all required configuration is present"""
     required_vars = ['DB_PASSWORD']
     missing_vars = []
     
     for var in required_vars:
-        if not os.getenv(var):
+        if not _ENV.get(var):
             missing_vars.append(var)
     
     if missing_vars:
@@ -5,21 +5,38 @@ Enhanced main execution with fixture analysis
 """
 
 import sys
-import os
-import schedule
-import time
+import heapq
+import importlib
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime
+from functools import lru_cache
 
-# Add src to path for imports
-sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+import numpy as np
 
-# Import agents and configuration
-from agents.data_buff import EnhancedDataBuffAgent
-from agents.fixture_agent import FixtureAgent, get_team_fixture_favorability
+# Import configuration (agents and the scheduler are imported where they are used)
 from config.settings import DATABASE_CONFIG, REDIS_CONFIG
 
+@dataclass(slots=True, frozen=True)
+class EnhancedRec:
+    """Player recommendation combined with fixture data"""
+    name: str
+    team: str
+    price: float
+    predicted_points: float
+    confidence: int
+    fixture_favorability: float
+    fixture_difficulty: float
+    combined_score: float
+
 def enhanced_main():
     """Enhanced main execution with both Data Buff and Fixture Agents"""
+    import schedule
+    import time
+    from agents.data_buff import EnhancedDataBuffAgent
+    from agents.fixture_agent import FixtureAgent
+    
     print("🏆 FANTASYPL Multi-Agent System Starting...")
     print("🤖 Data Buff Agent + Fixture Agent")
     print("=" * 60)
@@ -46,15 +63,23 @@ def enhanced_main():
         print("\n🔄 Running initial system updates...")
         print("⚠️  This may take 10-15 minutes for first run...")
         
-        # 1. Data Agent Update
+        # Fixture analysis joins the teams the data update stores, so it starts once
+        # bootstrap data is in and overlaps only the per-player gameweek fetches
         print("\n📊 Data Buff Agent - Updating player data...")
-        data_agent.enhanced_daily_update()
-        print("✅ Player data update completed!")
-        
-        # 2. Fixture Agent Update
-        print("\n📅 Fixture Agent - Analyzing fixtures...")
-        fixture_agent.daily_update()
-        print("✅ Fixture analysis completed!")
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            fixture_updates = []
+            
+            def start_fixture_update():
+                print("📅 Fixture Agent - Analyzing fixtures...")
+                fixture_updates.append(executor.submit(fixture_agent.daily_update))
+            
+            # 1. Data Agent Update
+            executor.submit(data_agent.enhanced_daily_update, start_fixture_update).result()
+            print("✅ Player data update completed!")
+            
+            # 2. Fixture Agent Update
+            fixture_updates[0].result()
+            print("✅ Fixture analysis completed!")
         
         # Generate enhanced recommendations
         print("\n🎯 Generating Enhanced Recommendations...")
@@ -62,8 +87,13 @@ def enhanced_main():
         
         # Export combined analysis
         print("\n💾 Exporting combined analysis...")
-        data_agent.export_recommendations_to_json("data/exports/player_recommendations.json")
-        fixture_agent.export_fixture_analysis_to_json("data/exports/fixture_analysis.json")
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            exports = [
+                executor.submit(data_agent.export_recommendations_to_json, "data/exports/player_recommendations.json"),
+                executor.submit(fixture_agent.export_fixture_analysis_to_json, "data/exports/fixture_analysis.json")
+            ]
+            for export in exports:
+                export.result()
         
         print("✅ All exports completed!")
         
@@ -74,10 +104,13 @@ def enhanced_main():
         print("\n⌨️  Press Ctrl+C to stop the system")
         print("=" * 60)
         
-        # Keep running and check for scheduled tasks
+        # Keep running, sleeping until the next scheduled task is due
         while True:
+            idle_seconds = schedule.idle_seconds()
+            if idle_seconds is None:
+                break  # Nothing left to schedule
+            time.sleep(max(idle_seconds, 0))
             schedule.run_pending()
-            time.sleep(60)
             
     except KeyboardInterrupt:
         print("\n👋 FANTASYPL Multi-Agent System stopped by user")
@@ -89,6 +122,7 @@ def enhanced_main():
 
 def generate_enhanced_recommendations(data_agent, fixture_agent):
     """Generate enhanced recommendations combining both agents"""
+    from agents.fixture_agent import get_team_fixture_favorability
     
     try:
         print("🔍 Analyzing player recommendations with fixture data...")
@@ -96,115 +130,182 @@ def generate_enhanced_recommendations(data_agent, fixture_agent):
         # Get player recommendations from Data Buff Agent
         player_recs = data_agent.generate_player_recommendations(gameweeks_ahead=5)
         
+        # No player data means the database is still empty - skip the fixture queries too
+        if not player_recs:
+            print("⚠️  No player recommendations available yet. Database may still be populating.")
+            return
+        
         # Get fixture analysis for teams
         best_fixture_teams = fixture_agent.get_best_fixture_teams(gameweeks_ahead=4)
         transfer_timing = fixture_agent.get_transfer_timing_recommendations()
         
+        # Resolve all team IDs in one query instead of one per player
+        team_id_by_name = get_team_ids_by_name(data_agent)
+        
+        # Many players share a team, so only look each team's fixtures up once per run
+        @lru_cache(maxsize=None)
+        def team_favorability(team_id, gameweeks_ahead=5):
+            return get_team_fixture_favorability(fixture_agent, team_id, gameweeks_ahead)
+        
         # Enhanced analysis
         print(f"\n📈 Enhanced Player Analysis:")
         print("-" * 40)
         
-        if player_recs:
-            # Group recommendations by position
-            positions = {}
-            for rec in player_recs[:20]:  # Top 20
-                pos = rec.position
-                if pos not in positions:
-                    positions[pos] = []
-                
-                # Get fixture data for player's team
-                fixture_data = get_team_fixture_favorability(
-                    fixture_agent, 
-                    get_team_id_by_name(data_agent, rec.team)
-                )
-                
-                enhanced_rec = {
-                    'name': rec.name,
-                    'team': rec.team,
-                    'price': rec.price,
-                    'predicted_points': rec.predicted_points,
-                    'confidence': rec.confidence_score,
-                    'fixture_favorability': fixture_data['favorability_score'],
-                    'fixture_difficulty': fixture_data['average_difficulty'],
-                    'combined_score': calculate_combined_score(rec, fixture_data)
-                }
-                
-                positions[pos].append(enhanced_rec)
+        top_recs = [rec for rec in player_recs[:20] if rec.position in POSITION_ORDER]  # Top 20
+        predicted_points = np.array([rec.predicted_points for rec in top_recs])
+        confidence_scores = np.array([rec.confidence_score for rec in top_recs])
+        rec_positions = np.array([rec.position for rec in top_recs])
+        
+        # Bound each player's combined score by the best and worst possible fixture score
+        max_combined = calculate_combined_scores(predicted_points, confidence_scores, MAX_FIXTURE_SCORE)
+        min_combined = calculate_combined_scores(predicted_points, confidence_scores, MIN_FIXTURE_SCORE)
+        
+        # Skip the fixture lookup for players who can't reach their position's top 3
+        keep = np.ones(len(top_recs), dtype=bool)
+        for pos in np.unique(rec_positions):
+            in_pos = rec_positions == pos
+            if in_pos.sum() > 3:
+                third_best_floor = np.sort(min_combined[in_pos])[-3]
+                keep &= ~in_pos | (max_combined >= third_best_floor)
+        
+        candidates = [rec for rec, kept in zip(top_recs, keep) if kept]
+        
+        # Get fixture data for each candidate's team, then score the batch at once
+        candidate_fixtures = [team_favorability(team_id_by_name.get(rec.team, 1)) for rec in candidates]
+        combined_scores = calculate_combined_scores(
+            predicted_points[keep],
+            confidence_scores[keep],
+            np.array([data['favorability_score'] for data in candidate_fixtures])
+        )
+        
+        # Group recommendations by position
+        positions = defaultdict(list)
+        for rec, fixture_data, combined_score in zip(candidates, candidate_fixtures, combined_scores):
+            enhanced_rec = EnhancedRec(
+                name=rec.name,
+                team=rec.team,
+                price=rec.price,
+                predicted_points=rec.predicted_points,
+                confidence=rec.confidence_score,
+                fixture_favorability=fixture_data['favorability_score'],
+                fixture_difficulty=fixture_data['average_difficulty'],
+                combined_score=float(combined_score)
+            )
             
-            # Display top recommendations by position
-            for pos in ['GK', 'DEF', 'MID', 'FWD']:
-                if pos in positions:
-                    print(f"\n🎯 Top {pos} Recommendations:")
-                    # Sort by combined score
-                    positions[pos].sort(key=lambda x: x['combined_score'], reverse=True)
-                    
-                    for i, rec in enumerate(positions[pos][:3], 1):
-                        print(f"{i}. {rec['name']} ({rec['team']}) - £{rec['price']}m")
-                        print(f"   📊 Expected: {rec['predicted_points']} pts | Confidence: {rec['confidence']}%")
-                        print(f"   📅 Fixtures: {rec['fixture_favorability']:.1f}/100 | Difficulty: {rec['fixture_difficulty']}")
-                        print(f"   🔥 Combined Score: {rec['combined_score']:.1f}")
-                        print()
+            positions[rec.position].append(enhanced_rec)
+        
+        # Display top recommendations by position (buffered into one write)
+        lines = []
+        for pos in POSITION_ORDER:
+            if pos in positions:
+                lines.append(f"\n🎯 Top {pos} Recommendations:")
+                # Top 3 by combined score
+                top_three = heapq.nlargest(3, positions[pos], key=lambda x: x.combined_score)
+                
+                for i, rec in enumerate(top_three, 1):
+                    lines.append(f"{i}. {rec.name} ({rec.team}) - £{rec.price}m")
+                    lines.append(f"   📊 Expected: {rec.predicted_points} pts | Confidence: {rec.confidence}%")
+                    lines.append(f"   📅 Fixtures: {rec.fixture_favorability:.1f}/100 | Difficulty: {rec.fixture_difficulty}")
+                    lines.append(f"   🔥 Combined Score: {rec.combined_score:.1f}")
+                    lines.append("")
+        if lines:
+            print(*lines, sep="\n")
         
         # Fixture-based recommendations
-        print(f"📅 Best Fixture Teams (Next 4 Gameweeks):")
-        print("-" * 45)
+        lines = [f"📅 Best Fixture Teams (Next 4 Gameweeks):", "-" * 45]
         for i, team in enumerate(best_fixture_teams[:5], 1):
-            print(f"{i}. {team['team_name']}")
-            print(f"   📊 {team['fixture_count']} fixtures | Avg Difficulty: {team['average_difficulty']}")
-            print(f"   🏠 {team['home_fixtures']} home | 🎯 {team['easy_fixtures']} easy")
-            print(f"   📈 Fixture Score: {team['fixture_score']:.1f}/100")
-            print(f"   💡 {team['recommendation']}")
-            print()
+            lines.append(f"{i}. {team['team_name']}")
+            lines.append(f"   📊 {team['fixture_count']} fixtures | Avg Difficulty: {team['average_difficulty']}")
+            lines.append(f"   🏠 {team['home_fixtures']} home | 🎯 {team['easy_fixtures']} easy")
+            lines.append(f"   📈 Fixture Score: {team['fixture_score']:.1f}/100")
+            lines.append(f"   💡 {team['recommendation']}")
+            lines.append("")
+        print(*lines, sep="\n")
         
         # Transfer timing recommendations
-        print(f"⏰ Transfer Timing Recommendations:")
-        print("-" * 35)
+        lines = [f"⏰ Transfer Timing Recommendations:", "-" * 35]
         for i, rec in enumerate(transfer_timing[:5], 1):
-            print(f"{i}. {rec['team_name']} - Transfer before GW{rec['recommended_transfer_gameweek']}")
-            print(f"   📊 {rec['easy_fixtures']} easy fixtures | Avg: {rec['average_difficulty']}")
-            print(f"   💡 {rec['reasoning']}")
-            print()
+            lines.append(f"{i}. {rec['team_name']} - Transfer before GW{rec['recommended_transfer_gameweek']}")
+            lines.append(f"   📊 {rec['easy_fixtures']} easy fixtures | Avg: {rec['average_difficulty']}")
+            lines.append(f"   💡 {rec['reasoning']}")
+            lines.append("")
+        print(*lines, sep="\n")
         
         # Captain recommendations with fixtures
-        print(f"⭐ Enhanced Captain Recommendations:")
-        print("-" * 38)
+        lines = [f"⭐ Enhanced Captain Recommendations:", "-" * 38]
         captains = data_agent.analyze_captain_options()
         
         for i, cap in enumerate(captains[:3], 1):
-            team_id = get_team_id_by_name(data_agent, cap['team'])
-            fixture_data = get_team_fixture_favorability(fixture_agent, team_id, 1)
+            team_id = team_id_by_name.get(cap['team'], 1)
+            fixture_data = team_favorability(team_id, 1)
             
-            print(f"{i}. {cap['name']} ({cap['team']})")
-            print(f"   🏆 Captain Score: {cap['captain_score']}")
-            print(f"   📈 Expected Points: {cap['expected_points']}")
-            print(f"   📅 Next Fixture: {fixture_data['average_difficulty']}/5 difficulty")
-            print(f"   🛡️  Safety: {cap['safety_level']}")
-            print()
+            lines.append(f"{i}. {cap['name']} ({cap['team']})")
+            lines.append(f"   🏆 Captain Score: {cap['captain_score']}")
+            lines.append(f"   📈 Expected Points: {cap['expected_points']}")
+            lines.append(f"   📅 Next Fixture: {fixture_data['average_difficulty']}/5 difficulty")
+            lines.append(f"   🛡️  Safety: {cap['safety_level']}")
+            lines.append("")
+        print(*lines, sep="\n")
         
     except Exception as e:
         print(f"⚠️  Error generating enhanced recommendations: {e}")
         print("Individual agent recommendations still available in exports.")
 
-def calculate_combined_score(player_rec, fixture_data):
-    """Calculate combined score from player and fixture data"""
+# Positions in display order
+POSITION_ORDER = ('GK', 'DEF', 'MID', 'FWD')
+
+# Range of get_team_fixture_favorability's favorability_score
+MIN_FIXTURE_SCORE = 20
+MAX_FIXTURE_SCORE = 100
+
+def calculate_combined_scores(predicted_points, confidence_scores, fixture_scores):
+    """Calculate combined scores for a batch of players (arrays or scalars)"""
     
     # Weight: 60% player data, 40% fixture data
-    player_score = (player_rec.predicted_points * 10) + (player_rec.confidence_score * 0.5)
-    fixture_score = fixture_data['favorability_score']
+    player_scores = (np.asarray(predicted_points) * 10) + (np.asarray(confidence_scores) * 0.5)
     
-    combined = (player_score * 0.6) + (fixture_score * 0.4)
+    combined = (player_scores * 0.6) + (np.asarray(fixture_scores) * 0.4)
     
-    return round(combined, 1)
+    return np.round(combined, 1)
+
+def get_team_ids_by_name(data_agent):
+    """Get a team name -> team ID map with a single query"""
+    result = data_agent.db.execute_query("SELECT id, name FROM teams")
+    return {row['name']: row['id'] for row in result}
 
-def get_team_id_by_name(data_agent, team_name):
-    """Get team ID from team name"""
-    query = "SELECT id FROM teams WHERE name = %s"
-    result = data_agent.db.execute_query(query, (team_name,))
-    return result[0]['id'] if result else 1
+# One-shot jobs for OS-level schedulers (systemd timers / cron)
+# job name -> (agent module, agent class, update method)
+JOBS = {
+    'data_update': ('agents.data_buff', 'EnhancedDataBuffAgent', 'enhanced_daily_update'),
+    'fixture_update': ('agents.fixture_agent', 'FixtureAgent', 'daily_update')
+}
+
+def run_job(job_name):
+    """Run a single scheduled job and exit, instead of keeping the process resident"""
+    if job_name not in JOBS:
+        print(f"❌ Unknown job '{job_name}'. Available jobs: {', '.join(JOBS)}")
+        return False
+    
+    module_name, class_name, method_name = JOBS[job_name]
+    print(f"🔄 Running job '{job_name}'...")
+    
+    try:
+        agent_class = getattr(importlib.import_module(module_name), class_name)
+        agent = agent_class(DATABASE_CONFIG, REDIS_CONFIG)
+        agent.initialize()
+        getattr(agent, method_name)()
+        print(f"✅ Job '{job_name}' completed!")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Job '{job_name}' failed: {e}")
+        return False
 
 def test_integration():
     """Test the integrated system"""
     print("🧪 Testing FANTASYPL Multi-Agent Integration...")
+    from agents.data_buff import EnhancedDataBuffAgent
+    from agents.fixture_agent import FixtureAgent, get_team_fixture_favorability
     
     try:
         # Test both agents
@@ -230,5 +331,7 @@ def test_integration():
 if __name__ == "__main__":
     if len(sys.argv) > 1 and sys.argv[1] == "test":
         test_integration()
+    elif len(sys.argv) > 1 and sys.argv[1].startswith("--job="):
+        sys.exit(0 if run_job(sys.argv[1].split("=", 1)[1]) else 1)
     else:
         enhanced_main()
\ No newline at end of file
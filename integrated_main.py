@@ -7,20 +7,95 @@ With forced initial News Agent run
 
 import sys
 import os
-import schedule
+import heapq
+import itertools
+import asyncio
 import time
-from datetime import datetime
-import json
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from types import MappingProxyType
+import logging
+import logging.handlers
+import numpy as np
 
-# Add src to path for imports
-sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+try:
+    import numba
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
 
 # Import all agents and configuration
-from agents.data_buff import EnhancedDataBuffAgent
-from agents.fixture_agent import FixtureAgent, get_team_fixture_favorability
+from agents.data_buff import EnhancedDataBuffAgent, create_redis_client, loads_json, write_json_file
+from agents.fixture_agent import FixtureAgent
 from agents.news_agent import NewsAgent
 from config.settings import DATABASE_CONFIG, REDIS_CONFIG
 
+# Console output goes through logging and is written out in batches
+logger = logging.getLogger('fpl')
+logger.setLevel(logging.INFO)
+logger.propagate = False  # Agents configure the root logger separately
+
+_stream_handler = logging.StreamHandler(sys.stdout)
+_stream_handler.setFormatter(logging.Formatter('%(message)s'))
+_output_handler = logging.handlers.MemoryHandler(
+    capacity=64, flushLevel=logging.WARNING, target=_stream_handler
+)
+logger.addHandler(_output_handler)
+
+def flush_output():
+    """Write any buffered console output now"""
+    _output_handler.flush()
+
+# FPL team name -> team ID (read-only)
+_TEAM_NAME_TO_ID = MappingProxyType({
+    'Arsenal': 1, 'Aston Villa': 2, 'Bournemouth': 3, 'Brentford': 4,
+    'Brighton': 5, 'Burnley': 6, 'Chelsea': 7, 'Crystal Palace': 8,
+    'Everton': 9, 'Fulham': 10, 'Liverpool': 11, 'Luton': 12,
+    'Man City': 13, 'Man Utd': 14, 'Newcastle': 15, "Nott'm Forest": 16,
+    'Sheffield Utd': 17, 'Spurs': 18, 'West Ham': 19, 'Wolves': 20
+})
+
+# Neutral fixture data for teams without upcoming fixtures
+DEFAULT_FAV = MappingProxyType({'favorability_score': 50, 'average_difficulty': 3})
+
+def _combined_score_kernel(pred, conf, fix, sent):
+    """Weighted score: 40% predicted points, 25% confidence, 25% fixtures, 10% sentiment"""
+    return (pred * 2) * 0.4 + conf * 0.25 + fix * 0.25 + sent * 0.1
+
+# Compiled NumPy ufunc when numba is installed, plain array math otherwise
+if NUMBA_AVAILABLE:
+    combined_score = numba.vectorize(
+        ['float64(float64, float64, float64, float64)'], nopython=True
+    )(_combined_score_kernel)
+else:
+    combined_score = _combined_score_kernel
+
+# News agent checkpoint (survives restarts)
+NEWS_STATE_FILE = 'data/state/news_last_run.json'
+NEWS_UPDATE_INTERVAL = timedelta(days=3)
+
+# Sample injury data for testing (one tuple per player, columns below)
+SAMPLE_INJURY_COLS = (
+    'player_name', 'team', 'status', 'injury_type', 'expected_return',
+    'source', 'confidence_score', 'manager_sentiment', 'play_probability'
+)
+SAMPLE_INJURY_ROWS = (
+    ("Bukayo Saka", "Arsenal", "questionable", "knock", "Next game",
+     "Sample Data", 0.7, "neutral", 0.6),
+    ("Gabriel Martinelli", "Arsenal", "out", "hamstring", "2-3 weeks",
+     "Sample Data", 0.9, None, 0.0),
+    ("Kevin De Bruyne", "Man City", "doubtful", "muscle", "Fitness test",
+     "Sample Data", 0.6, None, 0.3),
+    ("Marcus Rashford", "Man Utd", "fit", None, None,
+     "Sample Data", 0.8, "positive", 0.95),
+    ("Cole Palmer", "Chelsea", "fit", None, None,
+     "Sample Data", 0.9, "very_positive", 1.0)
+)
+
+# How long generated recommendations are reused before recomputing
+RECOMMENDATIONS_TTL_SECONDS = 300
+
 class FantasyPLMultiAgentSystem:
     """
     Complete FPL Multi-Agent System
@@ -29,15 +104,18 @@ class FantasyPLMultiAgentSystem:
     
     def __init__(self):
         """Initialize all agents"""
-        print("🏆 FANTASYPL Complete Multi-Agent System")
-        print("=" * 60)
-        print("🤖 Initializing agents...")
+        logger.info("🏆 FANTASYPL Complete Multi-Agent System")
+        logger.info("=" * 60)
+        logger.info("🤖 Initializing agents...")
         
         try:
+            # One pooled Redis client shared by the caching agents
+            self._redis = create_redis_client(REDIS_CONFIG)
+            
             # Initialize all three agents
-            self.data_agent = EnhancedDataBuffAgent(DATABASE_CONFIG, REDIS_CONFIG)
-            self.fixture_agent = FixtureAgent(DATABASE_CONFIG, REDIS_CONFIG)
-            self.news_agent = NewsAgent(DATABASE_CONFIG, REDIS_CONFIG)
+            self.data_agent = EnhancedDataBuffAgent(DATABASE_CONFIG, REDIS_CONFIG, self._redis)
+            self.fixture_agent = FixtureAgent(DATABASE_CONFIG, REDIS_CONFIG, self._redis)
+            self.news_agent = NewsAgent(DATABASE_CONFIG, REDIS_CONFIG, self._redis)
             
             # Initialize databases
             self.data_agent.initialize()
@@ -47,13 +125,20 @@ class FantasyPLMultiAgentSystem:
             # Track if this is first run
             self.first_run = True
             
-            print("✅ All agents initialized successfully!")
-            print("  📊 Data Buff Agent: Player analysis & recommendations")
-            print("  📅 Fixture Agent: Advanced fixture analysis")
-            print("  📰 News Agent: Injury & sentiment analysis")
+            # Last successful news update, persisted across restarts
+            self._last_news_run = self._load_last_news_run()
+            
+            # Last generated recommendations (see generate_complete_recommendations)
+            self._last_recs = None
+            self._last_recs_ts = 0
+            
+            logger.info("✅ All agents initialized successfully!")
+            logger.info("  📊 Data Buff Agent: Player analysis & recommendations")
+            logger.info("  📅 Fixture Agent: Advanced fixture analysis")
+            logger.info("  📰 News Agent: Injury & sentiment analysis")
             
         except Exception as e:
-            print(f"❌ Error initializing agents: {e}")
+            logger.error(f"❌ Error initializing agents: {e}")
             raise
     
     def run_complete_update(self, force_news=False):
@@ -63,124 +148,118 @@ class FantasyPLMultiAgentSystem:
         Args:
             force_news: Force news update regardless of schedule
         """
-        print("\n🔄 Running Complete System Update...")
-        print("=" * 60)
+        logger.info("\n🔄 Running Complete System Update...")
+        logger.info("=" * 60)
+        
+        # The agent updates are I/O-bound, so run them concurrently; fixture analysis
+        # joins the teams the data update stores, so it starts once those are in
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            # future -> (success message, error message)
+            futures = {}
+            fixture_updates = []
+            
+            def start_fixture_update():
+                logger.info("\n📅 [2/3] Fixture Agent - Analyzing fixtures...")
+                fixture_updates.append(executor.submit(self.fixture_agent.daily_update))
+            
+            # 1. Data Agent Update (2. starts from it once bootstrap data is stored)
+            logger.info("\n📊 [1/3] Data Buff Agent - Updating player data...")
+            data_update = executor.submit(self.data_agent.enhanced_daily_update, start_fixture_update)
+            futures[data_update] = (
+                "✅ Player data updated successfully!", "⚠️ Error updating player data"
+            )
+            
+            # 3. News Agent Update
+            # Run on first execution, when forced, or every 3 days since the last run
+            now = datetime.now()
+            should_update_news = (
+                self.first_run or 
+                force_news or 
+                (now - self._last_news_run) >= NEWS_UPDATE_INTERVAL
+            )
+            
+            if should_update_news:
+                logger.info("\n📰 [3/3] News Agent - Updating injury/news data...")
+                if self.first_run:
+                    logger.info("     (Initial run - forcing news update)")
+                futures[executor.submit(self._run_news_update)] = (
+                    "✅ News data updated!", "⚠️ Error updating news"
+                )
+            else:
+                logger.info("\n📰 [3/3] News Agent - Skip (updates every 3 days)")
+                next_run = self._last_news_run + NEWS_UPDATE_INTERVAL
+                logger.info(f"     Next update after {next_run:%Y-%m-%d %H:%M}")
+            
+            # Report each agent as it finishes without blocking the others
+            flush_output()
+            for future in as_completed(futures):
+                self._report_update(future, *futures[future])
+                if future is data_update and not fixture_updates:
+                    # Bootstrap failed; analyze against the teams already stored
+                    start_fixture_update()
+            
+            self._report_update(
+                fixture_updates[0], "✅ Fixture analysis completed!", "⚠️ Error analyzing fixtures"
+            )
         
-        # 1. Data Agent Update
-        print("\n📊 [1/3] Data Buff Agent - Updating player data...")
+        # Agent data changed, so cached recommendations are stale
+        self._last_recs = None
+    
+    def _report_update(self, future, success_message, error_message):
+        """Log how an agent update future finished"""
         try:
-            self.data_agent.enhanced_daily_update()
-            print("✅ Player data updated successfully!")
+            future.result()
+            logger.info(success_message)
         except Exception as e:
-            print(f"⚠️ Error updating player data: {e}")
-        
-        # 2. Fixture Agent Update
-        print("\n📅 [2/3] Fixture Agent - Analyzing fixtures...")
+            logger.info(f"{error_message}: {e}")
+        flush_output()
+    
+    def _run_news_update(self):
+        """Update news data and mark the first run as complete"""
+        # For now, populate with sample data since scraping isn't implemented
+        self._populate_sample_news_data()
+        self.first_run = False  # Mark first run as complete
+        
+        self._last_news_run = datetime.now()
+        self._save_last_news_run(self._last_news_run)
+    
+    def _load_last_news_run(self):
+        """Load the last news update time from the checkpoint file"""
         try:
-            self.fixture_agent.daily_update()
-            print("✅ Fixture analysis completed!")
-        except Exception as e:
-            print(f"⚠️ Error analyzing fixtures: {e}")
-        
-        # 3. News Agent Update
-        # Run on first execution, when forced, or every 3 days
-        should_update_news = (
-            self.first_run or 
-            force_news or 
-            datetime.now().day % 3 == 0
-        )
-        
-        if should_update_news:
-            print("\n📰 [3/3] News Agent - Updating injury/news data...")
-            if self.first_run:
-                print("     (Initial run - forcing news update)")
-            try:
-                # For now, populate with sample data since scraping isn't implemented
-                self._populate_sample_news_data()
-                print("✅ News data updated!")
-                self.first_run = False  # Mark first run as complete
-            except Exception as e:
-                print(f"⚠️ Error updating news: {e}")
-        else:
-            print("\n📰 [3/3] News Agent - Skip (updates every 3 days)")
-            print(f"     Next update on day {(datetime.now().day // 3 + 1) * 3}")
+            with open(NEWS_STATE_FILE, 'rb') as f:
+                return datetime.fromisoformat(loads_json(f.read())['last_news_run'])
+        except (OSError, ValueError, KeyError):
+            return datetime.min  # Never run
+    
+    def _save_last_news_run(self, timestamp):
+        """Atomically write the last news update time to the checkpoint file"""
+        os.makedirs(os.path.dirname(NEWS_STATE_FILE), exist_ok=True)
+        write_json_file(NEWS_STATE_FILE, {'last_news_run': timestamp.isoformat()})
     
     def _populate_sample_news_data(self):
         """Populate sample news data for testing"""
-        from agents.news_agent import PlayerNews, InjuryStatus, ManagerSentiment
-        
-        # Sample injury data for testing
-        sample_injuries = [
-            PlayerNews(
-                player_name="Bukayo Saka",
-                team="Arsenal",
-                status=InjuryStatus.QUESTIONABLE,
-                injury_type="knock",
-                expected_return="Next game",
-                last_updated=datetime.now(),
-                source="Sample Data",
-                confidence_score=0.7,
-                manager_sentiment=ManagerSentiment.NEUTRAL,
-                play_probability=0.6
-            ),
-            PlayerNews(
-                player_name="Gabriel Martinelli",
-                team="Arsenal",
-                status=InjuryStatus.OUT,
-                injury_type="hamstring",
-                expected_return="2-3 weeks",
-                last_updated=datetime.now(),
-                source="Sample Data",
-                confidence_score=0.9,
-                play_probability=0.0
-            ),
-            PlayerNews(
-                player_name="Kevin De Bruyne",
-                team="Man City",
-                status=InjuryStatus.DOUBTFUL,
-                injury_type="muscle",
-                expected_return="Fitness test",
-                last_updated=datetime.now(),
-                source="Sample Data",
-                confidence_score=0.6,
-                play_probability=0.3
-            ),
-            PlayerNews(
-                player_name="Marcus Rashford",
-                team="Man Utd",
-                status=InjuryStatus.FIT,
-                injury_type=None,
-                expected_return=None,
-                last_updated=datetime.now(),
-                source="Sample Data",
-                confidence_score=0.8,
-                manager_sentiment=ManagerSentiment.POSITIVE,
-                play_probability=0.95
-            ),
-            PlayerNews(
-                player_name="Cole Palmer",
-                team="Chelsea",
-                status=InjuryStatus.FIT,
-                injury_type=None,
-                expected_return=None,
-                last_updated=datetime.now(),
-                source="Sample Data",
-                confidence_score=0.9,
-                manager_sentiment=ManagerSentiment.VERY_POSITIVE,
-                play_probability=1.0
-            )
-        ]
+        # Save sample data in a single batch straight from the row tuples
+        self.news_agent.save_player_news_rows(SAMPLE_INJURY_COLS, SAMPLE_INJURY_ROWS)
         
-        # Save sample data
-        for injury in sample_injuries:
-            self.news_agent._save_player_news(injury)
+        logger.info(f"     Added {len(SAMPLE_INJURY_ROWS)} sample injury records")
+    
+    def generate_complete_recommendations(self, force_refresh=False):
+        """Generate comprehensive recommendations, reusing a fresh cached result"""
+        is_fresh = (
+            self._last_recs is not None and
+            time.monotonic() - self._last_recs_ts < RECOMMENDATIONS_TTL_SECONDS
+        )
+        if is_fresh and not force_refresh:
+            return self._last_recs
         
-        print(f"     Added {len(sample_injuries)} sample injury records")
+        self._last_recs = self._build_complete_recommendations()
+        self._last_recs_ts = time.monotonic()
+        return self._last_recs
     
-    def generate_complete_recommendations(self):
+    def _build_complete_recommendations(self):
         """Generate comprehensive recommendations from all agents"""
-        print("\n🎯 Generating Complete Recommendations...")
-        print("=" * 60)
+        logger.info("\n🎯 Generating Complete Recommendations...")
+        logger.info("=" * 60)
         
         recommendations = {
             'generated_at': datetime.now().isoformat(),
@@ -195,36 +274,48 @@ class FantasyPLMultiAgentSystem:
         }
         
         # 1. Get base player recommendations
-        print("\n📊 Analyzing player recommendations...")
+        logger.info("\n📊 Analyzing player recommendations...")
         player_recs = self.data_agent.generate_player_recommendations(gameweeks_ahead=5)
         
         # 2. Get fixture data
         best_fixture_teams = self.fixture_agent.get_best_fixture_teams(gameweeks_ahead=4)
         
         # 3. Get injury/news data
-        injury_report = self.news_agent.get_injury_report()
-        excluded_players = self.news_agent.get_excluded_players()
-        favored_players = self.news_agent.get_favored_players()
+        news_reports = self.news_agent.get_news_reports()
+        injury_report = news_reports['injury_report']
+        excluded_players = news_reports['excluded_players']
+        favored_players = news_reports['favored_players']
         
-        print(f"  📰 Found {len(excluded_players)} injured/doubtful players")
-        print(f"  ✅ Found {len(favored_players)} favored players")
+        logger.info(f"  📰 Found {len(excluded_players)} injured/doubtful players")
+        logger.info(f"  ✅ Found {len(favored_players)} favored players")
         
         # 4. Combine and enhance recommendations
         if player_recs:
-            print(f"  📊 Processing {len(player_recs)} player recommendations")
+            logger.info(f"  📊 Processing {len(player_recs)} player recommendations")
             
-            # Create exclusion set for quick lookup
-            excluded_names = {p['player_name'].lower() for p in excluded_players}
+            # Create exclusion set for quick lookup (read-only)
+            excluded_names = frozenset(p['player_name'].lower() for p in excluded_players)
             if excluded_names:
-                print(f"  ❌ Excluding: {', '.join(list(excluded_names)[:3])}...")
+                logger.info(f"  ❌ Excluding: {', '.join(list(excluded_names)[:3])}...")
             
             # Create favored players dict
             favored_dict = {p['player_name'].lower(): p for p in favored_players}
             if favored_dict:
-                print(f"  ⭐ Favoring: {', '.join(list(favored_dict.keys())[:3])}...")
+                logger.info(f"  ⭐ Favoring: {', '.join(list(favored_dict.keys())[:3])}...")
+            
+            # Fixture favorability for every team in one query
+            try:
+                fav_map = self.fixture_agent.get_all_team_favorabilities()
+            except Exception as e:
+                logger.info(f"  ⚠️ Error loading fixture favorability: {e}")
+                fav_map = {}
             
             # Process each recommendation
+            candidates = []
+            fixture_scores = []
+            sentiment_boosts = []
             for rec in player_recs[:30]:  # Top 30
+                # Lowercase once and reuse for both lookups
                 player_name_lower = rec.name.lower()
                 
                 # Check if player is injured/excluded
@@ -232,25 +323,28 @@ class FantasyPLMultiAgentSystem:
                     continue  # Skip injured players
                 
                 # Get fixture data for player's team
-                try:
-                    team_id = self._get_team_id_by_name(rec.team)
-                    fixture_data = get_team_fixture_favorability(self.fixture_agent, team_id)
-                except:
-                    fixture_data = {'favorability_score': 50, 'average_difficulty': 3}
+                fixture_data = fav_map.get(_TEAM_NAME_TO_ID.get(rec.team, 1), DEFAULT_FAV)
                 
                 # Check if player is favored by manager
                 sentiment_boost = 0
                 if player_name_lower in favored_dict:
                     sentiment_boost = 10  # Boost for positive sentiment
                 
-                # Calculate combined score
-                combined_score = self._calculate_combined_score(
-                    rec.predicted_points,
-                    rec.confidence_score,
-                    fixture_data['favorability_score'],
-                    sentiment_boost
-                )
-                
+                candidates.append(rec)
+                fixture_scores.append(fixture_data['favorability_score'])
+                sentiment_boosts.append(sentiment_boost)
+            
+            # Calculate combined scores for all candidates at once
+            combined_scores = self._calculate_combined_scores(
+                np.array([rec.predicted_points for rec in candidates], dtype=float),
+                np.array([rec.confidence_score for rec in candidates], dtype=float),
+                np.array(fixture_scores, dtype=float),
+                np.array(sentiment_boosts, dtype=float)
+            )
+            
+            for rec, fixture_score, sentiment_boost, combined_score in zip(
+                candidates, fixture_scores, sentiment_boosts, combined_scores
+            ):
                 recommendations['player_recommendations'].append({
                     'name': rec.name,
                     'team': rec.team,
@@ -258,25 +352,32 @@ class FantasyPLMultiAgentSystem:
                     'price': rec.price,
                     'predicted_points': rec.predicted_points,
                     'confidence': rec.confidence_score,
-                    'fixture_score': fixture_data['favorability_score'],
+                    'fixture_score': fixture_score,
                     'sentiment_boost': sentiment_boost,
-                    'combined_score': combined_score,
-                    'ownership': rec.key_stats.get('ownership', 0)
+                    'combined_score': float(combined_score),
+                    'ownership': rec.ownership_stat
                 })
         
-        # Sort by combined score
-        recommendations['player_recommendations'].sort(
-            key=lambda x: x['combined_score'], 
-            reverse=True
+        # Keep the top 30 by combined score (highest first)
+        recommendations['player_recommendations'] = heapq.nlargest(
+            30, recommendations['player_recommendations'],
+            key=lambda x: x['combined_score']
         )
         
         # 5. Captain recommendations
-        print("\n👑 Analyzing captain options...")
+        logger.info("\n👑 Analyzing captain options...")
         captains = self.data_agent.analyze_captain_options()
         
-        for cap in captains[:5]:
+        top_captains = heapq.nlargest(5, captains, key=lambda x: x['captain_score'])
+        
+        # Injury status for all captains in one query
+        status_map = self.news_agent.get_player_statuses_bulk(
+            [(cap['name'], cap['team']) for cap in top_captains]
+        )
+        
+        for cap in top_captains:
             # Check injury status
-            player_status = self.news_agent.get_player_status(cap['name'], cap['team'])
+            player_status = status_map.get((cap['name'], cap['team']))
             
             if player_status and player_status.get('play_probability', 100) < 50:
                 cap['injury_risk'] = True
@@ -289,7 +390,7 @@ class FantasyPLMultiAgentSystem:
             recommendations['captain_picks'].append(cap)
         
         # 6. Transfer suggestions
-        print("\n🔄 Generating transfer suggestions...")
+        logger.info("\n🔄 Generating transfer suggestions...")
         
         # Players to transfer out (injured)
         for player in excluded_players[:5]:
@@ -304,7 +405,7 @@ class FantasyPLMultiAgentSystem:
                 })
         
         # Players to transfer in (good fixtures + form)
-        for team in best_fixture_teams[:3]:
+        for team in heapq.nlargest(3, best_fixture_teams, key=lambda x: x['fixture_score']):
             # Get best players from these teams
             team_players = [p for p in recommendations['player_recommendations'] 
                           if p['team'] == team['team_name']][:2]
@@ -318,9 +419,12 @@ class FantasyPLMultiAgentSystem:
                 })
         
         # 7. Differential picks
-        print("\n💎 Finding differential picks...")
+        logger.info("\n💎 Finding differential picks...")
+        # Recommendations are sorted by combined score, so stop at the first one <= 70
         for rec in recommendations['player_recommendations']:
-            if rec['ownership'] < 5 and rec['combined_score'] > 70:
+            if rec['combined_score'] <= 70:
+                break
+            if rec['ownership'] < 5:
                 recommendations['differential_picks'].append({
                     'name': rec['name'],
                     'team': rec['team'],
@@ -333,130 +437,130 @@ class FantasyPLMultiAgentSystem:
     
     def display_recommendations(self, recommendations):
         """Display recommendations in a formatted way"""
-        print("\n" + "="*60)
-        print("📋 COMPLETE FPL RECOMMENDATIONS")
-        print("="*60)
+        logger.info("\n" + "="*60)
+        logger.info("📋 COMPLETE FPL RECOMMENDATIONS")
+        logger.info("="*60)
         
         # Show injury report first if we have excluded players
         if recommendations['transfer_suggestions']['out']:
-            print("\n⚠️  INJURY ALERTS")
-            print("-"*40)
+            logger.info("\n⚠️  INJURY ALERTS")
+            logger.info("-"*40)
             for player in recommendations['transfer_suggestions']['out'][:5]:
                 urgency_icon = "🔴" if player['urgency'] == 'high' else "🟡"
-                print(f"  {urgency_icon} {player['name']} ({player['team']})")
-                print(f"     Status: {player['status']} - {player.get('injury', 'Unknown')}")
-                print(f"     {player['reason']}")
+                logger.info(f"  {urgency_icon} {player['name']} ({player['team']})")
+                logger.info(f"     Status: {player['status']} - {player.get('injury', 'Unknown')}")
+                logger.info(f"     {player['reason']}")
         
         # Rest of the display logic remains the same...
         # [Previous display code continues here]
         
         # 1. Top Player Picks by Position
-        print("\n🎯 TOP PLAYER RECOMMENDATIONS")
-        print("-"*40)
+        logger.info("\n🎯 TOP PLAYER RECOMMENDATIONS")
+        logger.info("-"*40)
         
-        positions = {}
+        positions = defaultdict(list)
         for rec in recommendations['player_recommendations']:
-            pos = rec['position']
-            if pos not in positions:
-                positions[pos] = []
-            positions[pos].append(rec)
+            positions[rec['position']].append(rec)
         
-        for pos in ['GK', 'DEF', 'MID', 'FWD']:
+        for pos in ('GK', 'DEF', 'MID', 'FWD'):
             if pos in positions:
-                print(f"\n{pos}:")
-                for i, player in enumerate(positions[pos][:3], 1):
-                    print(f"  {i}. {player['name']} ({player['team']}) - £{player['price']}m")
-                    print(f"     Score: {player['combined_score']:.1f} | Predicted: {player['predicted_points']:.1f} pts")
+                logger.info(f"\n{pos}:")
+                for i, player in enumerate(itertools.islice(positions[pos], 3), 1):
+                    logger.info(f"  {i}. {player['name']} ({player['team']}) - £{player['price']}m")
+                    logger.info(f"     Score: {player['combined_score']:.1f} | Predicted: {player['predicted_points']:.1f} pts")
                     if player['sentiment_boost'] > 0:
-                        print(f"     ⭐ Favored by manager")
+                        logger.info(f"     ⭐ Favored by manager")
         
         # 2. Captain Picks
-        print("\n👑 CAPTAIN RECOMMENDATIONS")
-        print("-"*40)
+        logger.info("\n👑 CAPTAIN RECOMMENDATIONS")
+        logger.info("-"*40)
         for i, cap in enumerate(recommendations['captain_picks'][:3], 1):
             risk = "⚠️ INJURY RISK " if cap.get('injury_risk') else ""
-            print(f"  {i}. {risk}{cap['name']} ({cap['team']})")
-            print(f"     Captain Score: {cap['captain_score']:.1f}")
+            logger.info(f"  {i}. {risk}{cap['name']} ({cap['team']})")
+            logger.info(f"     Captain Score: {cap['captain_score']:.1f}")
             if cap.get('injury_risk'):
-                print(f"     ⚠️  {cap.get('injury_type', 'Injury')} - Play Probability: {cap['play_probability']:.0f}%")
+                logger.info(f"     ⚠️  {cap.get('injury_type', 'Injury')} - Play Probability: {cap['play_probability']:.0f}%")
         
         # 3. Transfer Suggestions
         if recommendations['transfer_suggestions']['in']:
-            print("\n🔄 TRANSFER SUGGESTIONS")
-            print("-"*40)
-            print("  TRANSFER IN:")
+            logger.info("\n🔄 TRANSFER SUGGESTIONS")
+            logger.info("-"*40)
+            logger.info("  TRANSFER IN:")
             for player in recommendations['transfer_suggestions']['in'][:3]:
-                print(f"    ✅ {player['name']} ({player['team']}) - £{player['price']}m")
-                print(f"       {player['reason']}")
+                logger.info(f"    ✅ {player['name']} ({player['team']}) - £{player['price']}m")
+                logger.info(f"       {player['reason']}")
         
         # 4. Differential Picks
         if recommendations['differential_picks']:
-            print("\n💎 DIFFERENTIAL PICKS")
-            print("-"*40)
+            logger.info("\n💎 DIFFERENTIAL PICKS")
+            logger.info("-"*40)
             for pick in recommendations['differential_picks'][:3]:
-                print(f"  • {pick['name']} ({pick['team']}) - {pick['ownership']:.1f}% owned")
-                print(f"    Score: {pick['score']:.1f} - {pick['reason']}")
+                logger.info(f"  • {pick['name']} ({pick['team']}) - {pick['ownership']:.1f}% owned")
+                logger.info(f"    Score: {pick['score']:.1f} - {pick['reason']}")
+        
+        flush_output()
     
     def export_all_analysis(self):
         """Export all agent analysis to files"""
-        print("\n💾 Exporting all analysis...")
+        logger.info("\n💾 Exporting all analysis...")
         
         # 1. Export individual agent data
         self.data_agent.export_recommendations_to_json("data/exports/player_recommendations.json")
         self.fixture_agent.export_fixture_analysis_to_json("data/exports/fixture_analysis.json")
         self.news_agent.export_news_analysis_to_json("data/exports/news_analysis.json")
         
-        # 2. Export combined recommendations
+        # 2. Export combined recommendations (cached if generated recently)
         recommendations = self.generate_complete_recommendations()
-        with open("data/exports/complete_recommendations.json", 'w') as f:
-            json.dump(recommendations, f, indent=2, default=str)
-        
-        print("✅ All exports completed!")
-        print("  📁 Check data/exports/ for:")
-        print("     • complete_recommendations.json")
-        print("     • player_recommendations.json")
-        print("     • fixture_analysis.json")
-        print("     • news_analysis.json")
+        write_json_file("data/exports/complete_recommendations.json", recommendations, default=str)
+        
+        logger.info("✅ All exports completed!")
+        logger.info("  📁 Check data/exports/ for:")
+        logger.info("     • complete_recommendations.json")
+        logger.info("     • player_recommendations.json")
+        logger.info("     • fixture_analysis.json")
+        logger.info("     • news_analysis.json")
+        flush_output()
     
-    def _calculate_combined_score(self, predicted_points, confidence, fixture_score, sentiment_boost):
-        """Calculate combined score from all factors"""
-        # Weights: 40% predicted points, 25% confidence, 25% fixtures, 10% sentiment
-        score = (
-            (predicted_points * 2) * 0.4 +  # Scale up predicted points
-            confidence * 0.25 +
-            fixture_score * 0.25 +
-            sentiment_boost * 0.1
-        )
-        return round(score, 1)
-    
-    def _get_team_id_by_name(self, team_name):
-        """Get team ID from team name"""
-        team_ids = {
-            'Arsenal': 1, 'Aston Villa': 2, 'Bournemouth': 3, 'Brentford': 4,
-            'Brighton': 5, 'Burnley': 6, 'Chelsea': 7, 'Crystal Palace': 8,
-            'Everton': 9, 'Fulham': 10, 'Liverpool': 11, 'Luton': 12,
-            'Man City': 13, 'Man Utd': 14, 'Newcastle': 15, "Nott'm Forest": 16,
-            'Sheffield Utd': 17, 'Spurs': 18, 'West Ham': 19, 'Wolves': 20
-        }
-        return team_ids.get(team_name, 1)
+    def _calculate_combined_scores(self, predicted_points, confidence, fixture_score, sentiment_boost):
+        """Calculate combined scores from all factors (NumPy arrays or scalars)"""
+        score = combined_score(predicted_points, confidence, fixture_score, sentiment_boost)
+        return np.round(score, 1)
+
+
+# Daily update time (local)
+DAILY_UPDATE_HOUR = 2
+
+def _next_daily_run(now, hour=DAILY_UPDATE_HOUR):
+    """Next occurrence of hour:00 strictly after now"""
+    next_run = now.replace(hour=hour, minute=0, second=0, microsecond=0)
+    if next_run <= now:
+        next_run += timedelta(days=1)
+    return next_run
 
+async def _scheduler_main(system):
+    """Sleep until each daily update instead of polling"""
+    while True:
+        now = datetime.now()
+        delta = _next_daily_run(now) - now
+        await asyncio.sleep(delta.total_seconds())
+        
+        # Run the blocking update off the event loop
+        await asyncio.to_thread(system.run_complete_update)
 
 def main():
     """Main execution function"""
-    print("🚀 Starting FANTASYPL Complete Multi-Agent System")
-    print("="*60)
+    logger.info("🚀 Starting FANTASYPL Complete Multi-Agent System")
+    logger.info("="*60)
     
     try:
         # Initialize the complete system
         system = FantasyPLMultiAgentSystem()
         
-        # Schedule updates
-        schedule.every().day.at("02:00").do(system.run_complete_update)
-        print("\n⏰ Daily updates scheduled for 2:00 AM")
+        logger.info("\n⏰ Daily updates scheduled for 2:00 AM")
         
         # Run initial update with forced news update
-        print("\n🔄 Running initial complete update...")
-        print("⚠️  This may take 10-15 minutes for first run...")
+        logger.info("\n🔄 Running initial complete update...")
+        logger.info("⚠️  This may take 10-15 minutes for first run...")
         system.run_complete_update(force_news=True)  # Force news on first run
         
         # Generate and display recommendations
@@ -466,24 +570,23 @@ def main():
         # Export all analysis
         system.export_all_analysis()
         
-        print("\n" + "="*60)
-        print("✅ FANTASYPL Multi-Agent System is now running!")
-        print("="*60)
-        print("📊 Automatic updates scheduled daily at 2:00 AM")
-        print("📁 Check data/exports/ for detailed analysis")
-        print("📝 Check data/logs/ for system logs")
-        print("\n⌨️  Press Ctrl+C to stop the system")
+        logger.info("\n" + "="*60)
+        logger.info("✅ FANTASYPL Multi-Agent System is now running!")
+        logger.info("="*60)
+        logger.info("📊 Automatic updates scheduled daily at 2:00 AM")
+        logger.info("📁 Check data/exports/ for detailed analysis")
+        logger.info("📝 Check data/logs/ for system logs")
+        logger.info("\n⌨️  Press Ctrl+C to stop the system")
+        flush_output()
         
         # Keep running
-        while True:
-            schedule.run_pending()
-            time.sleep(60)
+        asyncio.run(_scheduler_main(system))
             
     except KeyboardInterrupt:
-        print("\n👋 System stopped by user")
-        print("Thank you for using FANTASYPL Multi-Agent System!")
+        logger.info("\n👋 System stopped by user")
+        logger.info("Thank you for using FANTASYPL Multi-Agent System!")
     except Exception as e:
-        print(f"\n❌ Critical error: {e}")
+        logger.error(f"\n❌ Critical error: {e}")
         import traceback
         traceback.print_exc()
         raise
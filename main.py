@@ -4,15 +4,10 @@ FANTASYPL Multi-Agent System - Main Execution File
 FPL Data Buff Agent with Enhanced Analytics
 """
 
-import sys
-import os
 import schedule
 import time
 from datetime import datetime
 
-# Add src to path for imports
-sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
-
 # Import our agent and configuration
 from agents.data_buff import EnhancedDataBuffAgent
 from config.settings import DATABASE_CONFIG, REDIS_CONFIG
@@ -73,7 +68,7 @@ def main():
             differentials = agent.get_differential_picks(max_ownership=5.0)
             if differentials:
                 for i, diff in enumerate(differentials[:3], 1):
-                    ownership = diff.key_stats['ownership']
+                    ownership = diff.ownership_stat
                     print(f"{i}. {diff.name} ({diff.team}) - {ownership}% owned")
                     print(f"   💰 Price: £{diff.price}m | 📈 Expected: {diff.predicted_points} pts")
                     print()
@@ -2,21 +2,29 @@
 # Multi-agent FPL system with historical data, advanced metrics, and caching
 
 import requests
-import pandas as pd
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import RealDictCursor, execute_values
+from psycopg2.pool import ThreadedConnectionPool
 import time
 import logging
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 import json
 import numpy as np
-from dataclasses import dataclass
+from dataclasses import dataclass, asdict
+from operator import attrgetter
+from contextlib import contextmanager
 import os
-import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import atexit
+import asyncio
+import csv
+import io
+import uuid
+from pathlib import Path
 
-# Add config to path
-sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+from config.settings import BOOTSTRAP_CACHE_FILE
 
 try:
     import redis
@@ -32,6 +40,37 @@ except ImportError:
     BS4_AVAILABLE = False
     print("⚠️  BeautifulSoup not available. Web scraping limited.")
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import aiohttp
+    AIOHTTP_AVAILABLE = True
+except ImportError:
+    AIOHTTP_AVAILABLE = False
+
+try:
+    import numba
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+try:
+    import ijson
+    IJSON_AVAILABLE = True
+except ImportError:
+    IJSON_AVAILABLE = False
+
+try:
+    import httpx
+    import h2  # noqa: F401  (needed for httpx's http2=True)
+    HTTPX_AVAILABLE = True
+except ImportError:
+    HTTPX_AVAILABLE = False
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -43,7 +82,99 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-@dataclass
+# Redis keys for cached FPL API payloads (bump the version when the payload shape changes)
+PLAYER_DETAILS_REDIS_KEY = "fpl:player:{}:v1"
+PLAYER_DETAILS_CACHE_TTL = 900  # seconds
+
+# Cached analysis results: fpl:analysis:{season}:{name}:{args}, cleared by the daily update
+ANALYSIS_REDIS_KEY = "fpl:analysis:{}:{}:{}:v1"
+ANALYSIS_CACHE_TTL = 3600  # seconds
+
+# Concurrent element-summary requests when aiohttp isn't installed
+SYNC_FETCH_WORKERS = 8
+# Gameweek rows buffered before each COPY upsert
+GAMEWEEK_FLUSH_ROWS = 500
+
+def encode_cache_payload(data) -> bytes:
+    """Compact JSON bytes for cache storage"""
+    if ORJSON_AVAILABLE:
+        # NumPy scalars/arrays (e.g. in fixture analysis factors) serialize natively
+        return orjson.dumps(data, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(data, separators=(',', ':')).encode()
+
+def loads_json(payload):
+    """Parse JSON bytes/str, using orjson's C decoder when available"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(payload)
+    return json.loads(payload)
+
+def dumps_json(data: Dict, default=None) -> bytes:
+    """Serialize data as indented JSON bytes, using orjson's C encoder when available"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(
+            data, default=default,
+            option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY
+        )
+    return json.dumps(data, indent=2, default=default).encode()
+
+def write_json_bytes(filename: str, blob: bytes):
+    """Write bytes in one call to a temp file, then atomically replace filename"""
+    tmp_path = Path(filename + '.tmp')
+    tmp_path.write_bytes(blob)
+    os.replace(tmp_path, filename)
+
+def write_json_file(filename: str, data: Dict, default=None):
+    """Write data as indented JSON (atomic replace)"""
+    write_json_bytes(filename, dumps_json(data, default))
+
+
+def safe_decimal(value, max_val=999999.9):
+    """Safely convert values with bounds checking"""
+    try:
+        val = float(value) if value else 0.0
+        return min(val, max_val)  # Cap at maximum
+    except (ValueError, TypeError):
+        return 0.0
+
+
+# gameweek_performance columns loaded from the player history endpoint
+GAMEWEEK_PERFORMANCE_COLUMNS = (
+    'player_id', 'gameweek', 'opponent_team', 'was_home', 'total_points',
+    'minutes', 'goals_scored', 'assists', 'clean_sheets', 'goals_conceded',
+    'saves', 'penalties_saved', 'penalties_missed', 'yellow_cards',
+    'red_cards', 'bonus', 'influence', 'creativity', 'threat', 'ict_index',
+    'expected_goals', 'expected_assists', 'expected_goal_involvements',
+    'expected_goals_conceded', 'season', 'kickoff_time', 'fixture_difficulty'
+)
+
+# Columns refreshed when a gameweek row already exists
+GAMEWEEK_PERFORMANCE_UPDATE_COLUMNS = (
+    'total_points', 'minutes', 'goals_scored', 'assists', 'clean_sheets',
+    'goals_conceded', 'saves', 'penalties_saved', 'penalties_missed',
+    'yellow_cards', 'red_cards', 'bonus', 'influence', 'creativity', 'threat',
+    'ict_index', 'expected_goals', 'expected_assists',
+    'expected_goal_involvements', 'expected_goals_conceded'
+)
+
+# players columns in bootstrap COPY order
+PLAYER_COLUMNS = (
+    'id', 'web_name', 'first_name', 'second_name', 'team_id', 'element_type',
+    'now_cost', 'total_points', 'form', 'selected_by_percent', 'transfers_in',
+    'transfers_out', 'goals_scored', 'assists', 'clean_sheets', 'goals_conceded',
+    'saves', 'penalties_saved', 'penalties_missed', 'yellow_cards', 'red_cards',
+    'bonus', 'influence', 'creativity', 'threat', 'ict_index', 'season', 'updated_at'
+)
+
+# Columns refreshed when a player row already exists
+PLAYER_UPDATE_COLUMNS = (
+    'now_cost', 'total_points', 'form', 'selected_by_percent', 'transfers_in',
+    'transfers_out', 'goals_scored', 'assists', 'clean_sheets', 'goals_conceded',
+    'saves', 'penalties_saved', 'penalties_missed', 'yellow_cards', 'red_cards',
+    'bonus', 'influence', 'creativity', 'threat', 'ict_index', 'updated_at'
+)
+
+
+@dataclass(slots=True, frozen=True)
 class PlayerRecommendation:
     """Data class for player recommendations"""
     player_id: int
@@ -56,50 +187,183 @@ class PlayerRecommendation:
     risk_level: str  # low/medium/high
     value_rating: float
     form_indicator: str
-    key_stats: Dict
+    # Key stats as typed fields (None = not computed for this kind of pick)
+    total_points_stat: int = 0
+    form_stat: Optional[float] = None
+    consistency_stat: Optional[float] = None
+    form_score_stat: Optional[float] = None
+    ownership_stat: float = 0.0
+    differential_score_stat: Optional[float] = None
+    
+    @property
+    def key_stats(self) -> Dict:
+        """Key stats as a dict (built on demand for display and export)"""
+        stats = {
+            'total_points': self.total_points_stat,
+            'form': self.form_stat,
+            'consistency': self.consistency_stat,
+            'form_score': self.form_score_stat,
+            'ownership': self.ownership_stat,
+            'differential_score': self.differential_score_stat
+        }
+        return {key: value for key, value in stats.items() if value is not None}
+
+
+def _captain_score_kernel(expected_points, form_score, ownership):
+    """Captain score: doubled EP, simplified fixture bonus, recent form, ownership safety"""
+    return (
+        expected_points * 2 +  # Base expected points
+        3.0 * 0.5 +  # Fixture difficulty (simplified)
+        form_score * 0.3 +  # Recent form
+        (ownership / 100) * 0.2  # Safety (ownership)
+    )
+
+# Compiled NumPy ufunc when numba is installed, plain array math otherwise
+if NUMBA_AVAILABLE:
+    captain_score = numba.vectorize(
+        ['float64(float64, float64, float64)'], nopython=True
+    )(_captain_score_kernel)
+else:
+    captain_score = _captain_score_kernel
+
+
+# Exported recommendation fields, read in one attrgetter call per recommendation
+RECOMMENDATION_EXPORT_FIELDS = (
+    'player_id', 'name', 'position', 'team', 'price', 'predicted_points',
+    'confidence_score', 'risk_level', 'value_rating', 'form_indicator', 'key_stats'
+)
+_get_export_fields = attrgetter(*RECOMMENDATION_EXPORT_FIELDS)
 
 
 class FPLAPIWrapper:
     """Wrapper for FPL API with rate limiting and error handling"""
     
-    def __init__(self):
+    def __init__(self, bootstrap_cache_file: str = BOOTSTRAP_CACHE_FILE,
+                 requests_per_second: float = 1.0, burst: int = 5, cache=None):
         self.base_url = "https://fantasy.premierleague.com/api"
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        })
-        self.last_request_time = 0
-        self.min_request_interval = 1.0  # 1 second between requests
+        self.cache = cache  # Optional CacheManager shared with the agent
+        headers = {
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+            'Accept-Encoding': 'gzip'  # bootstrap-static is ~3MB uncompressed
+        }
+        
+        # One keep-alive client for every call; HTTP/2 multiplexes over one TLS connection
+        if HTTPX_AVAILABLE:
+            self.session = httpx.Client(
+                http2=True,
+                headers=headers,
+                limits=httpx.Limits(max_keepalive_connections=20, keepalive_expiry=60),
+                timeout=30
+            )
+        else:
+            self.session = requests.Session()
+            self.session.headers.update(headers)
+        
+        # Token bucket: average requests_per_second, bursts of up to `burst` requests
+        self.requests_per_second = requests_per_second
+        self.burst = burst
+        self._tokens = float(burst)
+        self._tokens_updated_at = time.monotonic()
+        self._rate_lock = threading.Lock()
+        
+        # On-disk copy of the latest bootstrap-static, streamed by bootstrap_snapshot
+        self.bootstrap_cache_file = bootstrap_cache_file
     
     def _rate_limit(self):
         """Ensure we don't exceed rate limits"""
-        current_time = time.time()
-        time_since_last = current_time - self.last_request_time
-        if time_since_last < self.min_request_interval:
-            time.sleep(self.min_request_interval - time_since_last)
-        self.last_request_time = time.time()
+        with self._rate_lock:
+            now = time.monotonic()
+            elapsed = now - self._tokens_updated_at
+            self._tokens = min(self.burst, self._tokens + elapsed * self.requests_per_second)
+            self._tokens_updated_at = now
+            
+            if self._tokens < 1:
+                time.sleep((1 - self._tokens) / self.requests_per_second)
+                self._tokens = 1
+                self._tokens_updated_at = time.monotonic()
+            
+            self._tokens -= 1
     
     def get_bootstrap_data(self) -> Dict:
         """Get all static FPL data (players, teams, gameweeks)"""
+        return self._fetch_bootstrap_data()
+    
+    def _fetch_bootstrap_data(self, with_status: bool = False):
+        """Fetch bootstrap-static from the API and update the on-disk cache
+        
+        With with_status=True, returns (data, whether the disk copy was written).
+        """
         self._rate_limit()
         try:
             response = self.session.get(f"{self.base_url}/bootstrap-static/")
             response.raise_for_status()
-            return response.json()
+            data = loads_json(response.content)
         except Exception as e:
             logger.error(f"Error fetching bootstrap data: {e}")
             raise
+        
+        written = self._write_bootstrap_cache(data)
+        return (data, written) if with_status else data
+    
+    @contextmanager
+    def bootstrap_snapshot(self):
+        """Fetch bootstrap-static now and yield a section reader over that one snapshot
+        
+        For ingest, which must store fresh data. With ijson the file just
+        written is streamed item by item through a single open handle, so a
+        concurrent fetch replacing the file can't mix snapshots.
+        """
+        data, written = self._fetch_bootstrap_data(with_status=True)
+        if not IJSON_AVAILABLE or not written:
+            yield lambda section: iter(data[section])
+            return
+        
+        try:
+            f = open(self.bootstrap_cache_file, 'rb')
+        except OSError:
+            yield lambda section: iter(data[section])
+            return
+        del data  # Only the streamed file is read from here on
+        
+        def items(section: str):
+            f.seek(0)
+            return ijson.items(f, f"{section}.item", use_float=True)
+        
+        with f:
+            yield items
+    
+    def _write_bootstrap_cache(self, data: Dict) -> bool:
+        """Atomically replace the on-disk bootstrap cache (False if it couldn't be written)"""
+        try:
+            os.makedirs(os.path.dirname(self.bootstrap_cache_file), exist_ok=True)
+            tmp_file = f"{self.bootstrap_cache_file}.tmp"
+            with open(tmp_file, 'wb') as f:
+                f.write(encode_cache_payload(data))
+            os.replace(tmp_file, self.bootstrap_cache_file)
+            return True
+        except OSError as e:
+            logger.warning(f"Could not write bootstrap cache: {e}")
+            return False
     
     def get_player_details(self, player_id: int) -> Dict:
         """Get detailed player data including gameweek history"""
+        cache_key = PLAYER_DETAILS_REDIS_KEY.format(player_id)
+        payload = self.cache.get(cache_key) if self.cache else None
+        if payload:
+            return loads_json(payload)
+        
         self._rate_limit()
         try:
             response = self.session.get(f"{self.base_url}/element-summary/{player_id}/")
             response.raise_for_status()
-            return response.json()
+            data = loads_json(response.content)
         except Exception as e:
-            logger.error(f"Error fetching player {player_id} details: {e}")
+            logger.error("Error fetching player %s details: %s", player_id, e)
             raise
+        
+        if self.cache:
+            self.cache.set(cache_key, encode_cache_payload(data), expire=PLAYER_DETAILS_CACHE_TTL)
+        return data
     
     def get_fixtures(self) -> List[Dict]:
         """Get all fixtures with difficulty ratings"""
@@ -107,17 +371,100 @@ class FPLAPIWrapper:
         try:
             response = self.session.get(f"{self.base_url}/fixtures/")
             response.raise_for_status()
-            return response.json()
+            return loads_json(response.content)
         except Exception as e:
             logger.error(f"Error fetching fixtures: {e}")
             raise
 
 
+class RateLimiter:
+    """Async token bucket: bursts up to max_tokens, refilled at rate tokens per second"""
+    
+    def __init__(self, rate: float = 10, max_tokens: int = 10):
+        self.rate = rate
+        self.max_tokens = max_tokens
+        self.tokens = max_tokens
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+    
+    async def acquire(self):
+        """Wait until a request token is available"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.max_tokens, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class AsyncFPLAPIWrapper:
+    """Async FPL API client for fetching many players concurrently (requires aiohttp)"""
+    
+    def __init__(self, rate: float = 10, max_tokens: int = 10, concurrency: int = 20):
+        self.base_url = "https://fantasy.premierleague.com/api"
+        self.rate_limiter = RateLimiter(rate, max_tokens)
+        self.concurrency = concurrency
+        self.session = None
+        self._semaphore = None
+    
+    async def __aenter__(self):
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.concurrency, keepalive_timeout=30),
+            headers={'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'},
+            timeout=aiohttp.ClientTimeout(total=30)
+        )
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.session.close()
+    
+    async def get_player_details(self, player_id: int) -> Dict:
+        """Get detailed player data including gameweek history"""
+        async with self._semaphore:
+            await self.rate_limiter.acquire()
+            async with self.session.get(f"{self.base_url}/element-summary/{player_id}/") as response:
+                response.raise_for_status()
+                return loads_json(await response.read())
+    
+    async def fetch_all_player_details(self, player_ids: List[int]):
+        """Yield (player_id, details or exception) pairs as each request completes"""
+        async def fetch(player_id):
+            try:
+                return player_id, await self.get_player_details(player_id)
+            except Exception as e:  # One 404 shouldn't abort the batch
+                return player_id, e
+        
+        for next_done in asyncio.as_completed([fetch(player_id) for player_id in player_ids]):
+            yield await next_done
+
+
+def create_redis_client(redis_config: Dict, max_connections: int = 16):
+    """Create a pooled Redis client that several agents can share (None if unavailable)"""
+    if not REDIS_AVAILABLE:
+        return None
+    try:
+        pool = redis.ConnectionPool(**redis_config, max_connections=max_connections)
+        client = redis.Redis(connection_pool=pool)
+        client.ping()
+        logger.info("Shared Redis connection pool created")
+        return client
+    except Exception as e:
+        logger.warning(f"Redis connection failed: {e}. Proceeding without cache.")
+        return None
+
+
 class CacheManager:
     """Redis cache manager for frequently accessed data"""
     
-    def __init__(self, redis_config: Dict):
-        self.redis_client = None
+    def __init__(self, redis_config: Dict, redis_client=None):
+        # Reuse a shared client (see create_redis_client) when one is given
+        self.redis_client = redis_client
+        if redis_client is not None:
+            return
         if REDIS_AVAILABLE:
             try:
                 self.redis_client = redis.Redis(**redis_config)
@@ -138,6 +485,15 @@ class CacheManager:
         except:
             return None
     
+    def mget(self, keys: List[str]) -> List[Optional[str]]:
+        """Get many cached values in one round-trip (None for misses)"""
+        if not self.redis_client or not keys:
+            return [None] * len(keys)
+        try:
+            return self.redis_client.mget(keys)
+        except:
+            return [None] * len(keys)
+    
     def set(self, key: str, value: str, expire: int = 3600):
         """Set cached data with expiration"""
         if not self.redis_client:
@@ -146,30 +502,79 @@ class CacheManager:
             self.redis_client.setex(key, expire, value)
         except:
             pass
+    
+    def mset_expire(self, mapping: Dict[str, str], expire: int = 3600):
+        """Set many values with the same expiration in one pipelined round-trip"""
+        if not self.redis_client or not mapping:
+            return
+        try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            for key, value in mapping.items():
+                pipe.setex(key, expire, value)
+            pipe.execute()
+        except:
+            pass
+    
+    def delete_pattern(self, pattern: str):
+        """Delete every key matching a glob pattern (SCAN-based, non-blocking)"""
+        if not self.redis_client:
+            return
+        try:
+            keys = list(self.redis_client.scan_iter(match=pattern, count=500))
+            if keys:
+                self.redis_client.unlink(*keys)
+        except:
+            pass
 
 
 class DatabaseManager:
     """Handle PostgreSQL database operations"""
     
-    def __init__(self, db_config: Dict[str, str]):
+    def __init__(self, db_config: Dict[str, str], min_connections: int = 4,
+                 max_connections: int = 16):
         self.db_config = db_config
-        self.connection = None
+        self.min_connections = min_connections
+        self.max_connections = max_connections
+        self.pool = None
     
     def connect(self):
-        """Establish database connection"""
+        """Establish the database connection pool"""
         try:
-            self.connection = psycopg2.connect(**self.db_config)
-            logger.info("Database connection established")
+            self.pool = ThreadedConnectionPool(
+                self.min_connections, self.max_connections, **self.db_config
+            )
+            atexit.register(self.pool.closeall)
+            logger.info("Database connection pool established")
         except Exception as e:
             logger.error(f"Database connection failed: {e}")
             raise
     
-    def create_tables(self):
-        """Create database schema for FPL data"""
-        if not self.connection:
+    @contextmanager
+    def get_connection(self):
+        """Borrow a pooled connection; commits on success, rolls back on error"""
+        if not self.pool:
             self.connect()
         
-        cursor = self.connection.cursor()
+        conn = self.pool.getconn()
+        broken = False
+        try:
+            with conn:
+                yield conn
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            broken = True  # Don't hand a dead connection to the next caller
+            raise
+        finally:
+            self.pool.putconn(conn, close=broken or bool(conn.closed))
+    
+    def create_tables(self):
+        """Create database schema for FPL data"""
+        with self.get_connection() as conn:
+            self._create_tables(conn)
+        logger.info("Database tables created successfully")
+    
+    def _create_tables(self, conn):
+        """Run the schema DDL on a borrowed connection"""
+        cursor = conn.cursor()
         
         # Teams table
         cursor.execute("""
@@ -223,6 +628,13 @@ class DatabaseManager:
             )
         """)
         
+        # Recommendation scans filter by season/position and order by points
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_players_season_type_points
+            ON players (season, element_type, total_points DESC)
+            WHERE total_points > 10
+        """)
+        
         # Gameweek performance table
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS gameweek_performance (
@@ -259,6 +671,76 @@ class DatabaseManager:
             )
         """)
         
+        # Analytics read gameweeks per player/season in gameweek order
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_gp_player_season_gw
+            ON gameweek_performance (player_id, season, gameweek)
+            INCLUDE (total_points, minutes, fixture_difficulty)
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_gp_played
+            ON gameweek_performance (player_id, season, gameweek)
+            WHERE minutes > 0
+        """)
+        
+        # Per-player form and next-gameweek expected points, refreshed by the daily update
+        # (same formulas as AdvancedAnalytics.calculate_expected_points / calculate_form_trend)
+        cursor.execute("""
+            CREATE MATERIALIZED VIEW IF NOT EXISTS player_form_ep AS
+            WITH recent AS (
+                SELECT player_id, season, COALESCE(total_points, 0) AS points,
+                       ROW_NUMBER() OVER (PARTITION BY player_id, season ORDER BY gameweek DESC) - 1 AS recency,
+                       LEAST(COUNT(*) OVER (PARTITION BY player_id, season), 10) AS n_recent
+                FROM gameweek_performance
+            ),
+            weighted AS (
+                SELECT player_id, season, points,
+                       EXP(-1 + CASE WHEN n_recent > 1 THEN recency::float / (n_recent - 1) ELSE 0 END) AS weight
+                FROM recent
+                WHERE recency < 10
+            ),
+            ep AS (
+                SELECT player_id, season,
+                       ROUND((SUM(points * weight) / SUM(weight))::numeric, 2) AS expected_points_next_gw
+                FROM weighted
+                GROUP BY player_id, season
+            ),
+            played AS (
+                SELECT player_id, season, COALESCE(total_points, 0) AS points,
+                       ROW_NUMBER() OVER (PARTITION BY player_id, season ORDER BY gameweek DESC) AS recency
+                FROM gameweek_performance
+                WHERE minutes > 0
+            ),
+            form AS (
+                SELECT player_id, season, COUNT(*) AS games,
+                       REGR_SLOPE(points, -recency) AS slope,
+                       AVG(points) FILTER (WHERE recency <= 4) AS last_four,
+                       AVG(points) FILTER (WHERE recency > 4) AS first_four
+                FROM played
+                WHERE recency <= 8
+                GROUP BY player_id, season
+            )
+            SELECT ep.player_id, ep.season, ep.expected_points_next_gw,
+                   CASE
+                       WHEN COALESCE(form.games, 0) < 4 THEN 'insufficient_data'
+                       WHEN form.slope > 0.5 THEN 'improving'
+                       WHEN form.slope < -0.5 THEN 'declining'
+                       ELSE 'stable'
+                   END AS form_trend,
+                   CASE
+                       WHEN COALESCE(form.games, 0) < 4 THEN 0
+                       WHEN form.games >= 8 THEN ROUND(form.last_four - form.first_four, 2)
+                       ELSE ROUND(form.last_four, 2)
+                   END AS form_score
+            FROM ep
+            LEFT JOIN form USING (player_id, season)
+        """)
+        # Unique index lets the view be refreshed CONCURRENTLY (readers aren't blocked)
+        cursor.execute("""
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_player_form_ep
+            ON player_form_ep (player_id, season)
+        """)
+        
         # Fixtures table
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS fixtures (
@@ -296,30 +778,105 @@ class DatabaseManager:
             )
         """)
         
-        self.connection.commit()
         cursor.close()
-        logger.info("Database tables created successfully")
     
-    def execute_query(self, query: str, params: tuple = None) -> List[Dict]:
-        """Execute a query and return results"""
-        if not self.connection:
-            self.connect()
+    def execute_query(self, query: str, params: tuple = None, stream: bool = False,
+                      itersize: int = 500):
+        """Execute a query and return results
         
-        cursor = self.connection.cursor(cursor_factory=RealDictCursor)
-        cursor.execute(query, params)
-        results = cursor.fetchall()
-        cursor.close()
+        With stream=True, returns an iterator over a server-side cursor that
+        fetches itersize rows at a time instead of a fully materialized list.
+        """
+        if stream:
+            return self.execute_query_stream(query, params, batch=itersize)
+        with self.get_connection() as conn:
+            with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+                cursor.execute(query, params)
+                results = cursor.fetchall()
         return [dict(row) for row in results]
     
+    def execute_query_stream(self, query: str, params: tuple = None, batch: int = 500):
+        """Yield rows from a server-side cursor, fetching `batch` rows at a time"""
+        with self.get_connection() as conn:
+            # Named cursors live server-side, so only one batch is held in client memory
+            with conn.cursor(name=f"stream_{uuid.uuid4().hex}",
+                             cursor_factory=RealDictCursor) as cursor:
+                cursor.itersize = batch
+                cursor.execute(query, params)
+                while True:
+                    rows = cursor.fetchmany(batch)
+                    if not rows:
+                        break
+                    for row in rows:
+                        yield dict(row)
+    
+    def execute_scalar(self, query: str, params: tuple = None):
+        """Execute a query and return the first column of the first row (None if no rows)"""
+        with self.get_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(query, params)
+                row = cursor.fetchone()
+        return row[0] if row else None
+    
     def execute_insert(self, query: str, params: tuple = None):
         """Execute an insert/update query"""
-        if not self.connection:
-            self.connect()
+        with self.get_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(query, params)
+    
+    @contextmanager
+    def transaction(self):
+        """Yield a cursor whose statements commit together when the block exits"""
+        with self.get_connection() as conn:
+            with conn.cursor() as cursor:
+                yield cursor
+    
+    def execute_bulk(self, statements: List[Tuple[str, List[tuple], Optional[str]]],
+                     page_size: int = 500):
+        """Run (query, rows, template) upserts with execute_values in a single transaction"""
+        # Commits once on success, rolls everything back on error
+        with self.get_connection() as conn:
+            with conn.cursor() as cursor:
+                for query, rows, template in statements:
+                    if rows:
+                        execute_values(cursor, query, rows, template=template, page_size=page_size)
+    
+    def copy_upsert(self, table: str, columns: Tuple[str, ...], rows: List[tuple],
+                    conflict_columns: Tuple[str, ...], update_columns: Tuple[str, ...]):
+        """Bulk upsert rows by COPYing them into a temp staging table, then INSERT ... SELECT"""
+        if not rows:
+            return
+        with self.transaction() as cursor:
+            self.copy_upsert_with(cursor, table, columns, rows, conflict_columns, update_columns)
+    
+    def copy_upsert_with(self, cursor, table: str, columns: Tuple[str, ...], rows: List[tuple],
+                         conflict_columns: Tuple[str, ...], update_columns: Tuple[str, ...]):
+        """copy_upsert on an existing cursor, so it can share a transaction with other writes"""
+        if not rows:
+            return
         
-        cursor = self.connection.cursor()
-        cursor.execute(query, params)
-        self.connection.commit()
-        cursor.close()
+        column_list = ", ".join(columns)
+        stage = f"{table}_stage"
+        
+        # ON CONFLICT can't touch the same row twice (e.g. double gameweeks), so keep the last per key
+        key_indexes = [columns.index(col) for col in conflict_columns]
+        unique_rows = {tuple(row[i] for i in key_indexes): row for row in rows}
+        
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(unique_rows.values())
+        buffer.seek(0)
+        
+        cursor.execute(f"""
+            CREATE TEMP TABLE {stage} ON COMMIT DROP AS
+            SELECT {column_list} FROM {table} WITH NO DATA
+        """)
+        cursor.copy_expert(f"COPY {stage} ({column_list}) FROM STDIN WITH CSV", buffer)
+        cursor.execute(f"""
+            INSERT INTO {table} ({column_list})
+            SELECT {column_list} FROM {stage}
+            ON CONFLICT ({", ".join(conflict_columns)}) DO UPDATE SET
+                {", ".join(f"{col} = EXCLUDED.{col}" for col in update_columns)}
+        """)
 
 
 class AdvancedAnalytics:
@@ -327,36 +884,180 @@ class AdvancedAnalytics:
     
     def __init__(self, db_manager):
         self.db = db_manager
+        # Run-scoped memo of loaded histories and expected points (see cache_clear)
+        self._history_cache: Dict[Tuple[str, int], Dict] = {}
+        self._expected_points_cache: Dict[int, float] = {}
     
-    def calculate_expected_points(self, player_id: int, gameweeks_ahead: int = 5) -> float:
-        """Calculate expected points for upcoming gameweeks"""
+    def cache_clear(self):
+        """Forget memoized histories and expected points (call when gameweek data changes)"""
+        self._history_cache.clear()
+        self._expected_points_cache.clear()
+    
+    def load_player_histories(self, player_ids: List[int], season: str = '2024-25') -> Dict[int, Dict]:
+        """Load every player's gameweek points/minutes (ordered by gameweek), memoized per run"""
+        missing = [player_id for player_id in player_ids if (season, player_id) not in self._history_cache]
+        if missing:
+            loaded = self._query_player_histories(missing, season)
+            empty_history = {'points': [], 'minutes': []}
+            for player_id in missing:
+                self._history_cache[(season, player_id)] = loaded.get(player_id, empty_history)
         
-        # Get player's recent performance
+        histories = {}
+        for player_id in player_ids:
+            history = self._history_cache[(season, player_id)]
+            if history['points']:
+                histories[player_id] = history
+        return histories
+    
+    def _query_player_histories(self, player_ids: List[int], season: str) -> Dict[int, Dict]:
+        """Load the given players' gameweek histories in one query"""
         query = """
-            SELECT gp.*, 3 as fixture_difficulty
-            FROM gameweek_performance gp
-            WHERE gp.player_id = %s 
-            AND gp.season = '2024-25'
-            ORDER BY gp.gameweek DESC
-            LIMIT 10
+            SELECT player_id,
+                   array_agg(COALESCE(total_points, 0) ORDER BY gameweek) as points,
+                   array_agg(minutes ORDER BY gameweek) as minutes
+            FROM gameweek_performance
+            WHERE player_id = ANY(%s) AND season = %s
+            GROUP BY player_id
         """
         
-        recent_data = self.db.execute_query(query, (player_id,))
+        rows = self.db.execute_query(query, (list(player_ids), season))
+        return {
+            row['player_id']: {'points': row['points'], 'minutes': row['minutes']}
+            for row in rows
+        }
+    
+    def calculate_batch_metrics(self, histories: List[Dict], now_costs: List[int]) -> Dict[str, np.ndarray]:
+        """Vectorized expected points, value, consistency and form for many players at once
         
-        if not recent_data:
-            return 0.0
+        Same formulas as the per-player calculate_* methods; histories are
+        {'points': [...], 'minutes': [...]} ordered by gameweek, aligned with now_costs.
+        """
+        n_players = len(histories)
+        
+        # Pad per-player lists into 2-D arrays (NaN = no game)
+        recent = np.zeros((n_players, 10))          # latest 10 gameweeks, most recent first
+        recent_counts = np.zeros(n_players, dtype=int)
+        season_points = np.zeros(n_players)
+        played_lists = [
+            [points for points, minutes in zip(history['points'], history['minutes']) if minutes]
+            for history in histories
+        ]
+        played = np.full((n_players, max((len(p) for p in played_lists), default=0) or 1), np.nan)
+        form = np.full((n_players, 8), np.nan)      # last 8 games played, oldest first
+        
+        for i, (history, played_points) in enumerate(zip(histories, played_lists)):
+            recent_points = history['points'][::-1][:10]
+            recent[i, :len(recent_points)] = recent_points
+            recent_counts[i] = len(recent_points)
+            season_points[i] = sum(history['points'])
+            played[i, :len(played_points)] = played_points
+            window = played_points[-8:]
+            form[i, :len(window)] = window
+        
+        # Expected points: exponential weights over however many recent games each player has
+        weight_table = np.zeros((11, 10))
+        for count in range(1, 11):
+            weights = np.exp(np.linspace(-1, 0, count))
+            weight_table[count, :count] = weights / weights.sum()
+        avg_difficulty = 3  # Neutral, as in calculate_expected_points
+        difficulty_adjustment = 1.0 - (avg_difficulty - 3) * 0.1
+        expected_points = np.round((recent * weight_table[recent_counts]).sum(axis=1) * difficulty_adjustment, 2)
         
-        df = pd.DataFrame(recent_data)
+        # Value: points per million
+        price_millions = np.asarray(now_costs, dtype=float) / 10.0
+        safe_price = np.where(price_millions > 0, price_millions, 1.0)
+        value_score = np.where(price_millions > 0, np.round(season_points / safe_price, 2), 0.0)
         
+        # Consistency: 100 - 50 * coefficient of variation (population std)
+        played_mask = ~np.isnan(played)
+        played_counts = played_mask.sum(axis=1)
+        played_mean = np.nansum(played, axis=1) / np.maximum(played_counts, 1)
+        played_dev = np.where(played_mask, played - played_mean[:, None], 0.0)
+        played_std = np.sqrt((played_dev ** 2).sum(axis=1) / np.maximum(played_counts, 1))
+        cv = played_std / np.where(played_mean == 0, 1.0, played_mean)
+        consistency = np.where(
+            played_counts < 3, 50.0,
+            np.where(played_mean == 0, 0.0, np.round(np.maximum(0, 100 - cv * 50), 1))
+        )
+        
+        # Form trend: closed-form least-squares slope over each player's window
+        form_mask = ~np.isnan(form)
+        form_counts = form_mask.sum(axis=1)
+        x = np.arange(8)
+        x_mean = (x * form_mask).sum(axis=1) / np.maximum(form_counts, 1)
+        y_mean = np.nansum(form, axis=1) / np.maximum(form_counts, 1)
+        dx = np.where(form_mask, x - x_mean[:, None], 0.0)
+        dy = np.where(form_mask, form - y_mean[:, None], 0.0)
+        denominator = (dx ** 2).sum(axis=1)
+        slope = (dx * dy).sum(axis=1) / np.where(denominator == 0, 1.0, denominator)
+        
+        form_trend = np.where(
+            form_counts < 4, "insufficient_data",
+            np.where(slope > 0.5, "improving", np.where(slope < -0.5, "declining", "stable"))
+        )
+        
+        # Form score: last 4 games, minus the first 4 when a full window of 8 exists
+        last_four_idx = np.maximum(form_counts - 4, 0)[:, None] + np.arange(4)
+        last_four = np.take_along_axis(np.nan_to_num(form), last_four_idx, axis=1).mean(axis=1)
+        first_four = np.nan_to_num(form[:, :4]).mean(axis=1)
+        form_score = np.round(np.where(
+            form_counts < 4, 0.0,
+            np.where(form_counts >= 8, last_four - first_four, last_four)
+        ), 2)
+        
+        return {
+            'expected_points': expected_points,
+            'value_score': value_score,
+            'consistency': consistency,
+            'form_trend': form_trend,
+            'form_score': form_score
+        }
+    
+    def calculate_expected_points(self, player_id: int, gameweeks_ahead: int = 5,
+                                  recent_points: List[int] = None) -> float:
+        """Calculate expected points for upcoming gameweeks
+        
+        recent_points: up to 10 latest gameweek points, most recent first (queried if omitted)
+        """
+        
+        if recent_points is None and player_id in self._expected_points_cache:
+            return self._expected_points_cache[player_id]
+        
+        if recent_points is None:
+            # Get player's recent performance
+            query = """
+                SELECT gp.total_points
+                FROM gameweek_performance gp
+                WHERE gp.player_id = %s 
+                AND gp.season = '2024-25'
+                ORDER BY gp.gameweek DESC
+                LIMIT 10
+            """
+            recent_data = self.db.execute_query(query, (player_id,))
+            points = np.fromiter((row['total_points'] for row in recent_data), dtype=float, count=len(recent_data))
+        else:
+            points = np.asarray(recent_points, dtype=float)
+        
+        if not len(points):
+            expected_points = 0.0
+        else:
+            expected_points = self._weighted_expected_points(points)
+        
+        if recent_points is None:
+            self._expected_points_cache[player_id] = expected_points
+        return expected_points
+    
+    def _weighted_expected_points(self, points: np.ndarray) -> float:
+        """Exponentially weighted points (most recent first), adjusted for fixture difficulty"""
         # Weight recent games more heavily
-        weights = np.exp(np.linspace(-1, 0, len(df)))
+        weights = np.exp(np.linspace(-1, 0, len(points)))
         weights = weights / weights.sum()
         
         # Calculate weighted averages
-        weighted_points = (df['total_points'] * weights).sum()
+        weighted_points = float(np.dot(points, weights))
         
-        # Adjust for fixture difficulty (simplified)
-        avg_difficulty = df['fixture_difficulty'].mean()
+        # Adjust for fixture difficulty (simplified: neutral 3 until fixtures are joined in)
+        avg_difficulty = 3
         difficulty_adjustment = 1.0 - (avg_difficulty - 3) * 0.1
         
         # Calculate expected points
@@ -364,40 +1065,46 @@ class AdvancedAnalytics:
         
         return round(expected_points, 2)
     
-    def calculate_value_score(self, player_id: int) -> float:
+    def calculate_value_score(self, player_id: int, now_cost: int = None,
+                              season_points: int = None) -> float:
         """Calculate value score (points per million)"""
-        query = """
-            SELECT p.now_cost, COALESCE(SUM(gp.total_points), 0) as total_points
-            FROM players p
-            LEFT JOIN gameweek_performance gp ON p.id = gp.player_id AND gp.season = p.season
-            WHERE p.id = %s AND p.season = '2024-25'
-            GROUP BY p.id, p.now_cost
-        """
-        
-        result = self.db.execute_query(query, (player_id,))
-        if not result:
-            return 0.0
+        if now_cost is None or season_points is None:
+            query = """
+                SELECT p.now_cost, COALESCE(SUM(gp.total_points), 0) as total_points
+                FROM players p
+                LEFT JOIN gameweek_performance gp ON p.id = gp.player_id AND gp.season = p.season
+                WHERE p.id = %s AND p.season = '2024-25'
+                GROUP BY p.id, p.now_cost
+            """
+            
+            result = self.db.execute_query(query, (player_id,))
+            if not result:
+                return 0.0
+            now_cost, season_points = result[0]['now_cost'], result[0]['total_points']
         
-        price_millions = result[0]['now_cost'] / 10.0
-        total_points = result[0]['total_points'] or 0
+        price_millions = now_cost / 10.0
+        total_points = season_points or 0
         
         return round(total_points / price_millions, 2) if price_millions > 0 else 0.0
     
-    def calculate_consistency_score(self, player_id: int) -> float:
-        """Calculate consistency score (inverse of coefficient of variation)"""
-        query = """
-            SELECT total_points FROM gameweek_performance 
-            WHERE player_id = %s AND season = '2024-25' AND minutes > 0
-            ORDER BY gameweek
+    def calculate_consistency_score(self, player_id: int, played_points: List[int] = None) -> float:
+        """Calculate consistency score (inverse of coefficient of variation)
+        
+        played_points: points from gameweeks with minutes > 0, oldest first (queried if omitted)
         """
+        if played_points is None:
+            query = """
+                SELECT total_points FROM gameweek_performance 
+                WHERE player_id = %s AND season = '2024-25' AND minutes > 0
+                ORDER BY gameweek
+            """
+            played_points = [row['total_points'] for row in self.db.execute_query(query, (player_id,))]
         
-        points_data = self.db.execute_query(query, (player_id,))
-        if len(points_data) < 3:
+        if len(played_points) < 3:
             return 50.0  # Default neutral score
         
-        points = [row['total_points'] for row in points_data]
-        mean_points = np.mean(points)
-        std_points = np.std(points)
+        mean_points = np.mean(played_points)
+        std_points = np.std(played_points)
         
         if mean_points == 0:
             return 0.0
@@ -410,21 +1117,25 @@ class AdvancedAnalytics:
         
         return round(consistency_score, 1)
     
-    def calculate_form_trend(self, player_id: int) -> Tuple[str, float]:
-        """Calculate form trend (improving/declining/stable)"""
-        query = """
-            SELECT total_points, gameweek FROM gameweek_performance 
-            WHERE player_id = %s AND season = '2024-25' AND minutes > 0
-            ORDER BY gameweek DESC
-            LIMIT 8
+    def calculate_form_trend(self, player_id: int, played_points: List[int] = None) -> Tuple[str, float]:
+        """Calculate form trend (improving/declining/stable)
+        
+        played_points: points from gameweeks with minutes > 0, oldest first (queried if omitted)
         """
+        if played_points is None:
+            query = """
+                SELECT total_points, gameweek FROM gameweek_performance 
+                WHERE player_id = %s AND season = '2024-25' AND minutes > 0
+                ORDER BY gameweek DESC
+                LIMIT 8
+            """
+            form_data = self.db.execute_query(query, (player_id,))
+            played_points = [row['total_points'] for row in reversed(form_data)]
         
-        form_data = self.db.execute_query(query, (player_id,))
-        if len(form_data) < 4:
+        points = list(played_points[-8:])
+        if len(points) < 4:
             return "insufficient_data", 0.0
         
-        points = [row['total_points'] for row in reversed(form_data)]
-        
         # Calculate trend using linear regression
         x = np.arange(len(points))
         slope = np.polyfit(x, points, 1)[0]
@@ -451,14 +1162,22 @@ class AdvancedAnalytics:
 class EnhancedDataBuffAgent:
     """Enhanced Data Buff agent with all advanced features"""
     
-    def __init__(self, db_config: Dict[str, str], redis_config: Dict[str, str] = None):
-        self.api = FPLAPIWrapper()
+    def __init__(self, db_config: Dict[str, str], redis_config: Dict[str, str] = None,
+                 redis_client=None):
+        self.cache = CacheManager(redis_config or {}, redis_client)
+        self.api = FPLAPIWrapper(cache=self.cache)
         self.db = DatabaseManager(db_config)
-        self.cache = CacheManager(redis_config or {})
         self.analytics = AdvancedAnalytics(self.db)
         
         self.current_season = "2024-25"
         self.positions = {1: "GK", 2: "DEF", 3: "MID", 4: "FWD"}
+        # Lookups built once: name -> element_type, and element_type - 1 -> name
+        self._position_ids = {v: k for k, v in self.positions.items()}
+        self._position_name_tuple = tuple(self.positions[k] for k in sorted(self.positions))
+        
+        # Export directory resolved and created once
+        self._export_dir = Path('data/exports')
+        self._export_dir.mkdir(parents=True, exist_ok=True)
     
     def initialize(self):
         """Initialize the enhanced agent"""
@@ -468,166 +1187,214 @@ class EnhancedDataBuffAgent:
     def fetch_and_store_bootstrap_data(self):
         """Fetch and store all static FPL data"""
         logger.info("Fetching bootstrap data...")
-        data = self.api.get_bootstrap_data()
         
-        # Store teams
-        teams = data['teams']
-        for team in teams:
-            query = """
-                INSERT INTO teams (id, name, short_name, strength_overall_home, 
-                                 strength_overall_away, strength_attack_home, 
-                                 strength_attack_away, strength_defence_home, 
-                                 strength_defence_away)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-                ON CONFLICT (id) DO UPDATE SET
-                    name = EXCLUDED.name,
-                    strength_overall_home = EXCLUDED.strength_overall_home,
-                    strength_overall_away = EXCLUDED.strength_overall_away,
-                    strength_attack_home = EXCLUDED.strength_attack_home,
-                    strength_attack_away = EXCLUDED.strength_attack_away,
-                    strength_defence_home = EXCLUDED.strength_defence_home,
-                    strength_defence_away = EXCLUDED.strength_defence_away
-            """
-            params = (
-                team['id'], team['name'], team['short_name'],
-                team['strength_overall_home'], team['strength_overall_away'],
-                team['strength_attack_home'], team['strength_attack_away'],
-                team['strength_defence_home'], team['strength_defence_away']
-            )
-            self.db.execute_insert(query, params)
+        teams_query = """
+            INSERT INTO teams (id, name, short_name, strength_overall_home, 
+                             strength_overall_away, strength_attack_home, 
+                             strength_attack_away, strength_defence_home, 
+                             strength_defence_away)
+            VALUES %s
+            ON CONFLICT (id) DO UPDATE SET
+                name = EXCLUDED.name,
+                strength_overall_home = EXCLUDED.strength_overall_home,
+                strength_overall_away = EXCLUDED.strength_overall_away,
+                strength_attack_home = EXCLUDED.strength_attack_home,
+                strength_attack_away = EXCLUDED.strength_attack_away,
+                strength_defence_home = EXCLUDED.strength_defence_home,
+                strength_defence_away = EXCLUDED.strength_defence_away
+        """
         
-        # Store players with better error handling
-        players = data['elements']
-        for player in players:
-            try:
-                query = """
-                    INSERT INTO players (id, web_name, first_name, second_name, team_id,
-                                       element_type, now_cost, total_points, form,
-                                       selected_by_percent, transfers_in, transfers_out,
-                                       goals_scored, assists, clean_sheets, goals_conceded,
-                                       saves, penalties_saved, penalties_missed,
-                                       yellow_cards, red_cards, bonus, influence,
-                                       creativity, threat, ict_index, season, updated_at)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s,
-                            %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, CURRENT_TIMESTAMP)
-                    ON CONFLICT (id, season) DO UPDATE SET
-                        now_cost = EXCLUDED.now_cost,
-                        total_points = EXCLUDED.total_points,
-                        form = EXCLUDED.form,
-                        selected_by_percent = EXCLUDED.selected_by_percent,
-                        transfers_in = EXCLUDED.transfers_in,
-                        transfers_out = EXCLUDED.transfers_out,
-                        goals_scored = EXCLUDED.goals_scored,
-                        assists = EXCLUDED.assists,
-                        clean_sheets = EXCLUDED.clean_sheets,
-                        goals_conceded = EXCLUDED.goals_conceded,
-                        saves = EXCLUDED.saves,
-                        penalties_saved = EXCLUDED.penalties_saved,
-                        penalties_missed = EXCLUDED.penalties_missed,
-                        yellow_cards = EXCLUDED.yellow_cards,
-                        red_cards = EXCLUDED.red_cards,
-                        bonus = EXCLUDED.bonus,
-                        influence = EXCLUDED.influence,
-                        creativity = EXCLUDED.creativity,
-                        threat = EXCLUDED.threat,
-                        ict_index = EXCLUDED.ict_index,
-                        updated_at = CURRENT_TIMESTAMP
-                """
-                
-                # Safely convert values with bounds checking
-                def safe_decimal(value, max_val=999999.9):
-                    try:
-                        val = float(value) if value else 0.0
-                        return min(val, max_val)  # Cap at maximum
-                    except (ValueError, TypeError):
-                        return 0.0
-                
-                params = (
-                    player['id'], player['web_name'], player['first_name'],
-                    player['second_name'], player['team'], player['element_type'],
-                    player['now_cost'], player['total_points'], 
-                    safe_decimal(player['form']),
-                    safe_decimal(player['selected_by_percent']),
-                    player['transfers_in'], player['transfers_out'], 
-                    player['goals_scored'], player['assists'],
-                    player['clean_sheets'], player['goals_conceded'], player['saves'],
-                    player['penalties_saved'], player['penalties_missed'],
-                    player['yellow_cards'], player['red_cards'], player['bonus'],
-                    safe_decimal(player['influence']),
-                    safe_decimal(player['creativity']),
-                    safe_decimal(player['threat']),
-                    safe_decimal(player['ict_index']),
-                    self.current_season
+        # Ingest always fetches fresh data; both sections come from that one
+        # snapshot, streamed item by item with ijson
+        with self.api.bootstrap_snapshot() as bootstrap_items:
+            team_rows = [
+                (
+                    team['id'], team['name'], team['short_name'],
+                    team['strength_overall_home'], team['strength_overall_away'],
+                    team['strength_attack_home'], team['strength_attack_away'],
+                    team['strength_defence_home'], team['strength_defence_away']
                 )
-                self.db.execute_insert(query, params)
-                
-            except Exception as e:
-                logger.warning(f"Error storing player {player.get('web_name', 'unknown')}: {e}")
-                continue
+                for team in bootstrap_items('teams')
+            ]
+            
+            # Store players with better error handling
+            player_rows = []
+            append_row = player_rows.append
+            season = self.current_season
+            updated_at = datetime.now()
+            total_players = 0
+            for player in bootstrap_items('elements'):
+                total_players += 1
+                try:
+                    append_row((
+                        player['id'], player['web_name'], player['first_name'],
+                        player['second_name'], player['team'], player['element_type'],
+                        player['now_cost'], player['total_points'], 
+                        safe_decimal(player['form']),
+                        safe_decimal(player['selected_by_percent']),
+                        player['transfers_in'], player['transfers_out'], 
+                        player['goals_scored'], player['assists'],
+                        player['clean_sheets'], player['goals_conceded'], player['saves'],
+                        player['penalties_saved'], player['penalties_missed'],
+                        player['yellow_cards'], player['red_cards'], player['bonus'],
+                        safe_decimal(player['influence']),
+                        safe_decimal(player['creativity']),
+                        safe_decimal(player['threat']),
+                        safe_decimal(player['ict_index']),
+                        season, updated_at
+                    ))
+                except KeyError as e:
+                    logger.warning("Error storing player %s: missing %s", player.get('web_name', 'unknown'), e)
         
-        logger.info(f"Stored {len(teams)} teams and {len(players)} players")
+        # Teams first (players reference them), all in one transaction;
+        # players go through COPY into a staging table, then one upsert
+        with self.db.transaction() as cursor:
+            if team_rows:
+                execute_values(cursor, teams_query, team_rows)
+            self.db.copy_upsert_with(
+                cursor, 'players', PLAYER_COLUMNS, player_rows,
+                conflict_columns=('id', 'season'), update_columns=PLAYER_UPDATE_COLUMNS
+            )
+        
+        logger.info(f"Stored {len(team_rows)} teams and {total_players} players")
     
     def fetch_player_gameweek_data(self, player_id: int):
         """Fetch and store detailed gameweek data for a specific player"""
+        self._store_gameweek_rows(self._fetch_gameweek_rows(player_id))
+    
+    def _fetch_gameweek_rows(self, player_id: int) -> List[tuple]:
+        """Fetch a player's gameweek history as rows (empty on error)"""
         try:
             data = self.api.get_player_details(player_id)
-            history = data['history']
-            
-            for gw in history:
-                query = """
-                    INSERT INTO gameweek_performance (
-                        player_id, gameweek, opponent_team, was_home, total_points,
-                        minutes, goals_scored, assists, clean_sheets, goals_conceded,
-                        saves, penalties_saved, penalties_missed, yellow_cards,
-                        red_cards, bonus, influence, creativity, threat, ict_index,
-                        expected_goals, expected_assists, expected_goal_involvements,
-                        expected_goals_conceded, season, kickoff_time, fixture_difficulty
-                    )
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s,
-                            %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                    ON CONFLICT (player_id, gameweek, season) DO UPDATE SET
-                        total_points = EXCLUDED.total_points,
-                        minutes = EXCLUDED.minutes,
-                        goals_scored = EXCLUDED.goals_scored,
-                        assists = EXCLUDED.assists,
-                        clean_sheets = EXCLUDED.clean_sheets,
-                        goals_conceded = EXCLUDED.goals_conceded,
-                        saves = EXCLUDED.saves,
-                        penalties_saved = EXCLUDED.penalties_saved,
-                        penalties_missed = EXCLUDED.penalties_missed,
-                        yellow_cards = EXCLUDED.yellow_cards,
-                        red_cards = EXCLUDED.red_cards,
-                        bonus = EXCLUDED.bonus,
-                        influence = EXCLUDED.influence,
-                        creativity = EXCLUDED.creativity,
-                        threat = EXCLUDED.threat,
-                        ict_index = EXCLUDED.ict_index,
-                        expected_goals = EXCLUDED.expected_goals,
-                        expected_assists = EXCLUDED.expected_assists,
-                        expected_goal_involvements = EXCLUDED.expected_goal_involvements,
-                        expected_goals_conceded = EXCLUDED.expected_goals_conceded
-                """
-                params = (
-                    player_id, gw['round'], gw['opponent_team'], gw['was_home'],
-                    gw['total_points'], gw['minutes'], gw['goals_scored'],
-                    gw['assists'], gw['clean_sheets'], gw['goals_conceded'],
-                    gw['saves'], gw['penalties_saved'], gw['penalties_missed'],
-                    gw['yellow_cards'], gw['red_cards'], gw['bonus'],
-                    float(gw['influence']), float(gw['creativity']),
-                    float(gw['threat']), float(gw['ict_index']),
-                    float(gw['expected_goals']), float(gw['expected_assists']),
-                    float(gw['expected_goal_involvements']),
-                    float(gw['expected_goals_conceded']), self.current_season,
-                    gw['kickoff_time'], gw['difficulty']
-                )
-                self.db.execute_insert(query, params)
-        
+            return self._gameweek_rows(player_id, data['history'])
         except Exception as e:
-            logger.error(f"Error fetching data for player {player_id}: {e}")
+            logger.error("Error fetching data for player %s: %s", player_id, e)
+            return []
+    
+    async def fetch_players_gameweek_data_async(self, player_ids: List[int], chunk_size: int = 50):
+        """Fetch gameweek data for many players concurrently and store it chunk by chunk"""
+        total_players = len(player_ids)
+        pending_write = None
+        
+        # Serve cached element-summary payloads with one MGET; only fetch the misses
+        cache_keys = [PLAYER_DETAILS_REDIS_KEY.format(player_id) for player_id in player_ids]
+        cached = {
+            player_id: loads_json(payload)
+            for player_id, payload in zip(player_ids, self.cache.mget(cache_keys))
+            if payload
+        }
+        if cached:
+            logger.info(f"Using cached gameweek data for {len(cached)}/{total_players} players")
+        
+        rows = []
+        fresh = {}  # Newly fetched payloads, written to Redis in one pipeline per flush
+        stored = 0
+        
+        def handle(player_id, result):
+            """Convert one player's payload into rows, logging failures"""
+            try:
+                if isinstance(result, Exception):
+                    raise result
+                rows.extend(self._gameweek_rows(player_id, result['history']))
+            except Exception as e:
+                logger.error("Error fetching data for player %s: %s", player_id, e)
+        
+        for player_id, result in cached.items():
+            handle(player_id, result)
+        
+        to_fetch = [player_id for player_id in player_ids if player_id not in cached]
+        done = len(cached)
+        
+        async with AsyncFPLAPIWrapper() as api:
+            # Results arrive in completion order; every chunk_size players is written
+            # in a worker thread while the remaining requests keep downloading
+            async for player_id, result in api.fetch_all_player_details(to_fetch):
+                if not isinstance(result, Exception):
+                    fresh[PLAYER_DETAILS_REDIS_KEY.format(player_id)] = encode_cache_payload(result)
+                handle(player_id, result)
+                done += 1
+                
+                if done - stored >= chunk_size or done == total_players:
+                    logger.info("Processed %d/%d players", done, total_players)
+                    self.cache.mset_expire(fresh, expire=PLAYER_DETAILS_CACHE_TTL)
+                    fresh = {}
+                    if pending_write:
+                        await pending_write
+                    batch, rows = rows, []
+                    pending_write = asyncio.create_task(asyncio.to_thread(self._store_gameweek_rows, batch))
+                    stored = done
+        
+        if rows:
+            if pending_write:
+                await pending_write
+            pending_write = asyncio.create_task(asyncio.to_thread(self._store_gameweek_rows, rows))
+        
+        if pending_write:
+            await pending_write
+    
+    def _gameweek_rows(self, player_id: int, history: List[Dict]) -> List[tuple]:
+        """Convert a player's gameweek history into gameweek_performance rows"""
+        season = self.current_season
+        return [
+            (
+                player_id, gw['round'], gw['opponent_team'], gw['was_home'],
+                gw['total_points'], gw['minutes'], gw['goals_scored'],
+                gw['assists'], gw['clean_sheets'], gw['goals_conceded'],
+                gw['saves'], gw['penalties_saved'], gw['penalties_missed'],
+                gw['yellow_cards'], gw['red_cards'], gw['bonus'],
+                *map(float, (
+                    gw['influence'], gw['creativity'], gw['threat'], gw['ict_index'],
+                    gw['expected_goals'], gw['expected_assists'],
+                    gw['expected_goal_involvements'], gw['expected_goals_conceded']
+                )),
+                season, gw['kickoff_time'], gw['difficulty']
+            )
+            for gw in history
+        ]
+    
+    def _store_gameweek_rows(self, rows: List[tuple]):
+        """Upsert gameweek_performance rows via COPY"""
+        self.db.copy_upsert(
+            'gameweek_performance', GAMEWEEK_PERFORMANCE_COLUMNS, rows,
+            conflict_columns=('player_id', 'gameweek', 'season'),
+            update_columns=GAMEWEEK_PERFORMANCE_UPDATE_COLUMNS
+        )
+        if rows:
+            self.analytics.cache_clear()  # Memoized histories are stale now
+    
+    def _analysis_cache_key(self, name: str, *args) -> str:
+        """Redis key for one cached analysis result"""
+        return ANALYSIS_REDIS_KEY.format(self.current_season, name, ":".join(map(str, args)))
+    
+    def _cached_recommendations(self, cache_key: str, build) -> List[PlayerRecommendation]:
+        """Cache-aside for lists of PlayerRecommendation"""
+        payload = self.cache.get(cache_key)
+        if payload:
+            return [PlayerRecommendation(**fields) for fields in loads_json(payload)]
+        
+        recommendations = build()
+        self.cache.set(
+            cache_key, encode_cache_payload([asdict(rec) for rec in recommendations]),
+            expire=ANALYSIS_CACHE_TTL
+        )
+        return recommendations
+    
+    def invalidate_analysis_cache(self):
+        """Drop cached analysis results for the current season"""
+        self.cache.delete_pattern(ANALYSIS_REDIS_KEY.format(self.current_season, "*", "*"))
     
     def generate_player_recommendations(self, position: str = None, 
                                       max_price: float = None,
                                       gameweeks_ahead: int = 5) -> List[PlayerRecommendation]:
+        """Generate comprehensive player recommendations (cached until the next daily update)"""
+        return self._cached_recommendations(
+            self._analysis_cache_key("recommendations", position, max_price, gameweeks_ahead),
+            lambda: self._build_player_recommendations(position, max_price, gameweeks_ahead)
+        )
+    
+    def _build_player_recommendations(self, position: str = None, 
+                                      max_price: float = None,
+                                      gameweeks_ahead: int = 5) -> List[PlayerRecommendation]:
         """Generate comprehensive player recommendations"""
         
         # Build query with filters
@@ -635,7 +1402,7 @@ class EnhancedDataBuffAgent:
         params = [self.current_season]
         
         if position:
-            position_id = {v: k for k, v in self.positions.items()}.get(position.upper())
+            position_id = self._position_ids.get(position.upper())
             if position_id:
                 where_conditions.append("p.element_type = %s")
                 params.append(position_id)
@@ -646,8 +1413,10 @@ class EnhancedDataBuffAgent:
         
         where_clause = " AND ".join(where_conditions)
         
+        # Only the columns the recommendation needs, streamed from a server-side cursor
         query = f"""
-            SELECT p.*, t.name as team_name
+            SELECT p.id, p.web_name, p.element_type, p.now_cost, p.total_points,
+                   p.form, p.selected_by_percent, t.name as team_name
             FROM players p
             JOIN teams t ON p.team_id = t.id
             WHERE {where_clause}
@@ -656,71 +1425,104 @@ class EnhancedDataBuffAgent:
             LIMIT 100
         """
         
-        players = self.db.execute_query(query, params)
+        players = list(self.db.execute_query_stream(query, params))
         
-        recommendations = []
+        # Calculate all metrics for every player in one query and one vectorized pass
+        metrics = self._batch_metrics(players)
         
-        for player in players:
-            player_id = player['id']
-            
-            # Calculate all metrics
-            expected_points = self.analytics.calculate_expected_points(player_id, gameweeks_ahead)
-            value_score = self.analytics.calculate_value_score(player_id)
-            consistency = self.analytics.calculate_consistency_score(player_id)
-            form_trend, form_score = self.analytics.calculate_form_trend(player_id)
-            
-            # Calculate confidence score
-            confidence_factors = [
-                min(consistency * 0.3, 30),  # Consistency (0-30)
-                min(abs(form_score) * 10, 25),  # Form strength (0-25)
-                min(expected_points * 5, 25),  # Expected performance (0-25)
-                min(player['total_points'] / 5, 20)  # Season performance (0-20)
-            ]
-            confidence_score = int(sum(confidence_factors))
-            
-            # Determine risk level
-            if consistency > 70 and form_trend != "declining":
-                risk_level = "low"
-            elif consistency > 40 and expected_points > 3:
-                risk_level = "medium"
-            else:
-                risk_level = "high"
-            
-            # Create recommendation
-            recommendation = PlayerRecommendation(
-                player_id=player_id,
+        expected_points = metrics['expected_points']
+        consistency = metrics['consistency']
+        form_trend = metrics['form_trend']
+        form_score = metrics['form_score']
+        total_points = np.array([player['total_points'] for player in players], dtype=float)
+        
+        # Calculate confidence score
+        confidence_scores = (
+            np.minimum(consistency * 0.3, 30) +  # Consistency (0-30)
+            np.minimum(np.abs(form_score) * 10, 25) +  # Form strength (0-25)
+            np.minimum(expected_points * 5, 25) +  # Expected performance (0-25)
+            np.minimum(total_points / 5, 20)  # Season performance (0-20)
+        ).astype(int)
+        
+        # Determine risk level
+        risk_levels = np.where(
+            (consistency > 70) & (form_trend != "declining"), "low",
+            np.where((consistency > 40) & (expected_points > 3), "medium", "high")
+        )
+        
+        # Rank on the arrays and keep only the top 50 rows (stable, like list.sort)
+        ranking = expected_points * (confidence_scores / 100)
+        top = np.argsort(-ranking, kind='stable')[:50]
+        players = [players[i] for i in top.tolist()]
+        expected_points = expected_points[top]
+        confidence_scores = confidence_scores[top]
+        risk_levels = risk_levels[top]
+        value_score = metrics['value_score'][top]
+        form_trend = form_trend[top]
+        consistency = consistency[top]
+        form_score = form_score[top]
+        
+        # Per-column conversions done once as array ops; .tolist() hands back Python scalars
+        positions = np.array(self._position_name_tuple)[
+            np.fromiter((player['element_type'] for player in players), dtype=int, count=len(players)) - 1
+        ]
+        prices = np.fromiter((player['now_cost'] for player in players), dtype=float, count=len(players)) / 10.0
+        forms = np.array([player['form'] or 0 for player in players], dtype=float)
+        ownership = np.array([player['selected_by_percent'] for player in players], dtype=float)
+        
+        # Create recommendations from the finished arrays
+        recommendations = [
+            PlayerRecommendation(
+                player_id=player['id'],
                 name=player['web_name'],
-                position=self.positions[player['element_type']],
+                position=position,
                 team=player['team_name'],
-                price=player['now_cost'] / 10.0,
-                predicted_points=expected_points,
-                confidence_score=confidence_score,
-                risk_level=risk_level,
-                value_rating=value_score,
-                form_indicator=form_trend,
-                key_stats={
-                    'total_points': player['total_points'],
-                    'form': float(player['form']) if player['form'] else 0,
-                    'consistency': consistency,
-                    'form_score': form_score,
-                    'ownership': float(player['selected_by_percent'])
-                }
+                price=price,
+                predicted_points=points,
+                confidence_score=confidence,
+                risk_level=risk,
+                value_rating=value,
+                form_indicator=trend,
+                total_points_stat=player['total_points'],
+                form_stat=form,
+                consistency_stat=consistency_value,
+                form_score_stat=form_score_value,
+                ownership_stat=owned
             )
-            
-            recommendations.append(recommendation)
+            for (player, position, price, points, confidence, risk, value, trend,
+                 form, consistency_value, form_score_value, owned) in zip(
+                players, positions.tolist(), prices.tolist(), expected_points.tolist(),
+                confidence_scores.tolist(), risk_levels.tolist(), value_score.tolist(),
+                form_trend.tolist(), forms.tolist(), consistency.tolist(), form_score.tolist(),
+                ownership.tolist()
+            )
+        ]
         
-        # Sort by predicted points and confidence
-        recommendations.sort(
-            key=lambda x: (x.predicted_points * (x.confidence_score / 100)), 
-            reverse=True
+        return recommendations  # Top 50, sorted by predicted points and confidence
+    
+    def _batch_metrics(self, players: List[Dict]) -> Dict[str, np.ndarray]:
+        """Load every player's history in one query and compute all metrics, aligned with players"""
+        histories = self.analytics.load_player_histories(
+            [player['id'] for player in players], self.current_season
+        )
+        empty_history = {'points': [], 'minutes': []}
+        return self.analytics.calculate_batch_metrics(
+            [histories.get(player['id'], empty_history) for player in players],
+            [player['now_cost'] for player in players]
         )
-        
-        return recommendations[:50]  # Return top 50 recommendations
     
     def get_differential_picks(self, max_ownership: float = 10.0) -> List[PlayerRecommendation]:
+        """Get low-owned differential picks (cached until the next daily update)"""
+        return self._cached_recommendations(
+            self._analysis_cache_key("differentials", max_ownership),
+            lambda: self._build_differential_picks(max_ownership)
+        )
+    
+    def _build_differential_picks(self, max_ownership: float = 10.0) -> List[PlayerRecommendation]:
         """Get low-owned differential picks"""
         query = """
-            SELECT p.*, t.name as team_name
+            SELECT p.*, t.name as team_name, p.selected_by_percent::float8 as ownership,
+                   p.total_points / GREATEST(p.selected_by_percent::float8, 0.1) as differential_score
             FROM players p
             JOIN teams t ON p.team_id = t.id
             WHERE p.season = %s
@@ -732,40 +1534,50 @@ class EnhancedDataBuffAgent:
         """
         
         players = self.db.execute_query(query, (self.current_season, max_ownership))
-        recommendations = []
+        metrics = self._batch_metrics(players)
         
-        for player in players:
-            player_id = player['id']
-            expected_points = self.analytics.calculate_expected_points(player_id)
-            value_score = self.analytics.calculate_value_score(player_id)
-            
-            recommendation = PlayerRecommendation(
-                player_id=player_id,
+        position_names = self._position_name_tuple
+        return [
+            PlayerRecommendation(
+                player_id=player['id'],
                 name=player['web_name'],
-                position=self.positions[player['element_type']],
+                position=position_names[player['element_type'] - 1],
                 team=player['team_name'],
                 price=player['now_cost'] / 10.0,
-                predicted_points=expected_points,
+                predicted_points=float(metrics['expected_points'][i]),
                 confidence_score=75,  # Medium confidence for differentials
                 risk_level="medium",
-                value_rating=value_score,
+                value_rating=float(metrics['value_score'][i]),
                 form_indicator="differential",
-                key_stats={
-                    'total_points': player['total_points'],
-                    'ownership': float(player['selected_by_percent']),
-                    'differential_score': player['total_points'] / max(float(player['selected_by_percent']), 0.1)
-                }
+                total_points_stat=player['total_points'],
+                ownership_stat=player['ownership'],
+                differential_score_stat=player['differential_score']
             )
-            recommendations.append(recommendation)
-        
-        return recommendations
+            for i, player in enumerate(players)
+        ]
     
     def analyze_captain_options(self) -> List[Dict]:
+        """Analyze best captain options (cached until the next daily update)"""
+        cache_key = self._analysis_cache_key("captains")
+        payload = self.cache.get(cache_key)
+        if payload:
+            return loads_json(payload)
+        
+        captain_options = self._build_captain_options()
+        self.cache.set(cache_key, encode_cache_payload(captain_options), expire=ANALYSIS_CACHE_TTL)
+        return captain_options
+    
+    def _build_captain_options(self) -> List[Dict]:
         """Analyze best captain options for upcoming gameweek"""
+        # Form and next-gameweek EP come precomputed from player_form_ep: one round-trip
         query = """
-            SELECT p.*, t.name as team_name
+            SELECT p.*, t.name as team_name, p.selected_by_percent::float8 as ownership,
+                   COALESCE(v.form_trend, 'insufficient_data') as form_trend,
+                   COALESCE(v.form_score, 0)::float8 as form_score,
+                   COALESCE(v.expected_points_next_gw, 0)::float8 as expected_points_next_gw
             FROM players p
             JOIN teams t ON p.team_id = t.id
+            LEFT JOIN player_form_ep v ON v.player_id = p.id AND v.season = p.season
             WHERE p.season = %s
             AND p.total_points > 50
             AND p.selected_by_percent > 5  -- Reasonable ownership for captains
@@ -774,58 +1586,75 @@ class EnhancedDataBuffAgent:
         """
         
         players = self.db.execute_query(query, (self.current_season,))
-        captain_options = []
+        expected_points = np.array([player['expected_points_next_gw'] for player in players], dtype=float)
+        form_score = np.array([player['form_score'] for player in players], dtype=float)
+        ownership = np.array([player['ownership'] for player in players], dtype=float)
         
-        for player in players:
-            player_id = player['id']
-            expected_points = self.analytics.calculate_expected_points(player_id, 1)  # Next gameweek only
-            form_trend, form_score = self.analytics.calculate_form_trend(player_id)
-            
-            # Captain score calculation
-            captain_score = (
-                expected_points * 2 +  # Base expected points
-                3.0 * 0.5 +  # Fixture difficulty (simplified)
-                form_score * 0.3 +  # Recent form
-                (float(player['selected_by_percent']) / 100) * 0.2  # Safety (ownership)
-            )
-            
-            captain_option = {
-                'player_id': player_id,
+        # Captain score calculation
+        captain_scores = np.round(captain_score(expected_points, form_score, ownership), 2)
+        
+        # Top 10 by captain score: O(N) partition, then order just those (ties keep query order)
+        top = np.arange(len(players))
+        if len(players) > 10:
+            top = np.argpartition(-captain_scores, 10)[:10]
+        top = top[np.lexsort((top, -captain_scores[top]))]
+        
+        position_names = self._position_name_tuple
+        captain_options = [
+            {
+                'player_id': player['id'],
                 'name': player['web_name'],
                 'team': player['team_name'],
-                'position': self.positions[player['element_type']],
-                'expected_points': expected_points,
-                'captain_score': round(captain_score, 2),
+                'position': position_names[player['element_type'] - 1],
+                'expected_points': float(expected_points[i]),
+                'captain_score': float(captain_scores[i]),
                 'fixture_favorability': 3.0,  # Simplified
-                'form_trend': form_trend,
-                'ownership': float(player['selected_by_percent']),
-                'safety_level': 'safe' if float(player['selected_by_percent']) > 20 else 'risky'
+                'form_trend': player['form_trend'],
+                'ownership': player['ownership'],
+                'safety_level': 'safe' if player['ownership'] > 20 else 'risky'
             }
-            
-            captain_options.append(captain_option)
+            for i, player in ((i, players[i]) for i in top.tolist())
+        ]
         
-        # Sort by captain score
-        captain_options.sort(key=lambda x: x['captain_score'], reverse=True)
-        
-        return captain_options[:10]
+        return captain_options
     
-    def enhanced_daily_update(self):
-        """Enhanced daily update with all features"""
+    def enhanced_daily_update(self, on_bootstrap_stored=None):
+        """Enhanced daily update with all features
+        
+        on_bootstrap_stored, if given, is called once teams and players are
+        stored, so work that depends on them can start while gameweek data loads.
+        """
         logger.info("Starting enhanced daily update...")
         
+        # Start each run with fresh analytics memos
+        self.analytics.cache_clear()
+        
         try:
             # 1. Update core FPL data
             self.fetch_and_store_bootstrap_data()
+            if on_bootstrap_stored:
+                on_bootstrap_stored()
             
             # 2. Update gameweek data for sample of players (to avoid long delays)
             self.update_sample_player_data()
             
+            # 3. Recompute the precomputed form/EP view from the new gameweek rows
+            self.refresh_form_view()
+            
+            # 4. Cached recommendations are stale now
+            self.invalidate_analysis_cache()
+            
             logger.info("Enhanced daily update completed successfully")
             
         except Exception as e:
             logger.error(f"Error during daily update: {e}")
             raise
     
+    def refresh_form_view(self):
+        """Refresh the player_form_ep materialized view"""
+        self.db.execute_insert("REFRESH MATERIALIZED VIEW CONCURRENTLY player_form_ep")
+        logger.info("Refreshed player form/EP view")
+    
     def update_sample_player_data(self):
         """Update gameweek data for a sample of players to avoid timeouts"""
         query = """
@@ -835,29 +1664,40 @@ class EnhancedDataBuffAgent:
             ORDER BY total_points DESC
             LIMIT 50  -- Sample size for testing
         """
-        players = self.db.execute_query(query, (self.current_season,))
+        # Only the ids are kept; rows stream from a server-side cursor
+        player_ids = [row['id'] for row in self.db.execute_query(query, (self.current_season,), stream=True)]
         
-        total_players = len(players)
+        total_players = len(player_ids)
         logger.info(f"Updating data for {total_players} top players")
         
-        for i, player in enumerate(players):
-            try:
-                if i % 10 == 0:  # Log progress every 10 players
-                    logger.info(f"Processing player {i+1}/{total_players}")
+        # Overlap the API requests when aiohttp is installed
+        if AIOHTTP_AVAILABLE:
+            asyncio.run(self.fetch_players_gameweek_data_async(player_ids))
+            return
+        
+        # Otherwise overlap them on worker threads; the API wrapper's token bucket
+        # keeps the request rate polite, so no per-request sleep is needed
+        rows = []
+        with ThreadPoolExecutor(max_workers=SYNC_FETCH_WORKERS) as executor:
+            for i, player_rows in enumerate(executor.map(self._fetch_gameweek_rows, player_ids)):
+                if i % 10 == 0:  # Log progress every 10 players (lazy formatting: cheap when INFO is off)
+                    logger.info("Processed player %d/%d", i + 1, total_players)
                 
-                self.fetch_player_gameweek_data(player['id'])
-                time.sleep(1)  # Rate limiting
-            except Exception as e:
-                logger.error(f"Error updating player {player['id']}: {e}")
-                continue
+                # Accumulate across players and write with one COPY per batch
+                rows.extend(player_rows)
+                if len(rows) >= GAMEWEEK_FLUSH_ROWS:
+                    self._store_gameweek_rows(rows)
+                    rows = []
+        
+        self._store_gameweek_rows(rows)
     
     def export_recommendations_to_json(self, filename: str = None):
         """Export recommendations to JSON file"""
         if not filename:
-            filename = f"data/exports/fantasypl_recommendations_{datetime.now().strftime('%Y%m%d')}.json"
-        
-        # Ensure the directory exists
-        os.makedirs(os.path.dirname(filename), exist_ok=True)
+            filename = str(self._export_dir / f"fantasypl_recommendations_{datetime.now():%Y%m%d}.json")
+        else:
+            # Custom paths may point anywhere; make sure their directory exists
+            os.makedirs(os.path.dirname(filename) or '.', exist_ok=True)
         
         try:
             logger.info("Generating recommendations for export...")
@@ -872,26 +1712,13 @@ class EnhancedDataBuffAgent:
                 'generated_at': datetime.now().isoformat(),
                 'season': self.current_season,
                 'total_recommendations': len(recommendations),
-                'recommendations': []
+                'recommendations': [
+                    dict(zip(RECOMMENDATION_EXPORT_FIELDS, _get_export_fields(rec)))
+                    for rec in recommendations
+                ]
             }
             
-            for rec in recommendations:
-                json_data['recommendations'].append({
-                    'player_id': rec.player_id,
-                    'name': rec.name,
-                    'position': rec.position,
-                    'team': rec.team,
-                    'price': rec.price,
-                    'predicted_points': rec.predicted_points,
-                    'confidence_score': rec.confidence_score,
-                    'risk_level': rec.risk_level,
-                    'value_rating': rec.value_rating,
-                    'form_indicator': rec.form_indicator,
-                    'key_stats': rec.key_stats
-                })
-            
-            with open(filename, 'w') as f:
-                json.dump(json_data, f, indent=2)
+            write_json_file(filename, json_data)
             
             logger.info(f"Recommendations exported to {filename}")
             return filename
@@ -908,8 +1735,7 @@ class EnhancedDataBuffAgent:
             }
             
             try:
-                with open(filename, 'w') as f:
-                    json.dump(basic_data, f, indent=2)
+                write_json_file(filename, basic_data)
                 logger.info(f"Basic export file created at {filename}")
             except Exception as file_error:
                 logger.error(f"Could not create export file: {file_error}")
@@ -2,21 +2,20 @@
 # Analyzes fixture difficulty, congestion, and optimal timing
 
 import requests
+import asyncio
 import pandas as pd
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import RealDictCursor, execute_values
 import time
+import heapq
 import logging
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
-import json
 import numpy as np
-from dataclasses import dataclass
+from dataclasses import dataclass, fields
+from operator import attrgetter, itemgetter
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import os
-import sys
-
-# Add config to path
-sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
 
 try:
     import redis
@@ -24,6 +23,18 @@ try:
 except ImportError:
     REDIS_AVAILABLE = False
 
+try:
+    import aiohttp
+    AIOHTTP_AVAILABLE = True
+except ImportError:
+    AIOHTTP_AVAILABLE = False
+
+try:
+    import numba
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -35,7 +46,99 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-@dataclass
+# Redis keys for form/H2H computed from the database: (team, games_back, gameweek)
+# and (lower team id, higher team id, seasons_back, gameweek)
+FORM_CACHE_KEY = "fpl:form:{}:{}:{}:v1"
+H2H_CACHE_KEY = "fpl:h2h:{}:{}:{}:{}:v1"
+FORM_CACHE_TTL = 3600  # seconds
+
+# Seconds a looked-up current gameweek is reused (also reset when fixtures are refetched)
+CURRENT_GAMEWEEK_TTL = 60
+
+# Worker threads for the per-fixture factor lookups (bounded by the DB pool size)
+FIXTURE_ANALYSIS_WORKERS = 8
+
+# Favorability starting score by FPL difficulty (1-5), index 0 unused; the only
+# place the (6 - difficulty) * 15 base lives
+BASE_FAV = (6 - np.arange(6, dtype=np.float64)) * 15
+
+# Congestion levels as ints so the confidence and score arrays stay numeric
+CONGESTION_LEVEL_CODES = {'low': 0, 'medium': 1, 'high': 2}
+CONGESTION_LEVEL_NAMES = ('low', 'medium', 'high')
+# Fixture score penalty indexed by congestion level code
+CONGESTION_SCORE_PENALTIES = np.array([0.0, 15.0, 25.0])
+
+# Congestion level code and score by (fixture count, whole days between
+# fixtures), both clamped; replaces the threshold if/elif cascade
+CONGESTION_MAX_FIXTURES = 4
+CONGESTION_MAX_DAYS = 5
+EUROPEAN_CONGESTION_PENALTY = 0.2
+
+def _build_congestion_tables() -> Tuple[np.ndarray, np.ndarray]:
+    """Precompute the level/score lookup tables from the congestion thresholds"""
+    levels = np.zeros((CONGESTION_MAX_FIXTURES + 1, CONGESTION_MAX_DAYS + 1), dtype=np.int8)
+    scores = np.full(levels.shape, 0.2)
+    for count in range(CONGESTION_MAX_FIXTURES + 1):
+        for days in range(CONGESTION_MAX_DAYS + 1):
+            # avg < N is the same as floor(avg) < N for non-negative gaps
+            if count >= 4 and days < 4:
+                levels[count, days], scores[count, days] = 2, 0.8
+            elif count >= 3 and days < 5:
+                levels[count, days], scores[count, days] = 1, 0.6
+            elif count >= 2 and days < 3:
+                levels[count, days], scores[count, days] = 1, 0.5
+    return levels, scores
+
+CONGESTION_LUT, CONGESTION_SCORE_LUT = _build_congestion_tables()
+
+def classify_congestion(fixture_counts, avg_days_between, is_european):
+    """Congestion level codes and scores for scalars or arrays, no branching"""
+    counts = np.clip(fixture_counts, 0, CONGESTION_MAX_FIXTURES).astype(np.intp)
+    days = np.clip(np.floor(avg_days_between), 0, CONGESTION_MAX_DAYS).astype(np.intp)
+    scores = CONGESTION_SCORE_LUT[counts, days] + EUROPEAN_CONGESTION_PENALTY * np.asarray(is_european)
+    return CONGESTION_LUT[counts, days], np.minimum(scores, 1.0)
+
+
+# Fixture-run recommendations, first matching rule wins
+FIXTURE_RECOMMENDATIONS = (
+    "EXCELLENT - Strong target for transfers",
+    "GOOD - Consider for transfers",
+    "AVOID - Difficult fixture run",
+    "CAUTION - High fixture congestion"
+)
+NEUTRAL_RECOMMENDATION = "NEUTRAL - Average fixture difficulty"
+
+def fixture_recommendations(avg_difficulty, easy_fixtures, hard_fixtures, congestion_codes) -> np.ndarray:
+    """Recommendation per team run, classified for the whole batch at once"""
+    return np.select(
+        [
+            (avg_difficulty <= 2.0) & (easy_fixtures >= 3),
+            (avg_difficulty <= 2.5) & (easy_fixtures >= 2),
+            (avg_difficulty >= 4.0) | (hard_fixtures >= 3),
+            congestion_codes == CONGESTION_LEVEL_CODES['high']
+        ],
+        FIXTURE_RECOMMENDATIONS,
+        default=NEUTRAL_RECOMMENDATION
+    )
+
+def _fixture_score_kernel(avg_difficulty, easy_fixtures, hard_fixtures, home_fixtures, congestion_code):
+    """Fixture score per team run (0-100, higher is better); works on scalars or arrays"""
+    # Inverted difficulty (20-100) + easy bonus - hard penalty + home bonus - congestion
+    score = ((6 - avg_difficulty) * 20 + easy_fixtures * 10 - hard_fixtures * 15 + home_fixtures * 5
+             - CONGESTION_SCORE_PENALTIES[congestion_code])
+    return np.minimum(np.maximum(score, 0.0), 100.0)
+
+# Compiled with explicit signatures when numba is installed (nopython, cached on disk)
+if NUMBA_AVAILABLE:
+    # Compiled NumPy ufunc: one call scores a whole array of runs
+    fixture_scores = numba.vectorize(
+        ['float64(float64, int64, int64, int64, int64)'], nopython=True, cache=True
+    )(_fixture_score_kernel)
+else:
+    # Same kernel, evaluated elementwise by NumPy broadcasting
+    fixture_scores = _fixture_score_kernel
+
+@dataclass(slots=True, frozen=True)
 class FixtureAnalysis:
     """Data class for fixture analysis results"""
     team_id: int
@@ -54,7 +157,7 @@ class FixtureAnalysis:
     confidence: int
     analysis_factors: Dict
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class FixtureRun:
     """Data class for analyzing runs of fixtures"""
     team_id: int
@@ -70,6 +173,20 @@ class FixtureRun:
     congestion_level: str
     recommendation: str
 
+# Scalar FixtureAnalysis fields, one DataFrame column each (analysis_factors stays on the objects)
+FIXTURE_ANALYSIS_COLUMNS = tuple(
+    field.name for field in fields(FixtureAnalysis) if field.name != 'analysis_factors'
+)
+_get_analysis_columns = attrgetter(*FIXTURE_ANALYSIS_COLUMNS)
+
+def fixture_analyses_frame(analyses: List[FixtureAnalysis]) -> pd.DataFrame:
+    """Columnar (one array per field) view of fixture analyses for vectorized filtering/sorting"""
+    if not analyses:
+        return pd.DataFrame(columns=FIXTURE_ANALYSIS_COLUMNS)
+    # Transpose the per-object tuples into columns in one pass
+    columns = zip(*map(_get_analysis_columns, analyses))
+    return pd.DataFrame(dict(zip(FIXTURE_ANALYSIS_COLUMNS, columns)))
+
 
 class FixtureAPIWrapper:
     """Extended API wrapper for fixture-specific data"""
@@ -82,6 +199,8 @@ class FixtureAPIWrapper:
         })
         self.last_request_time = 0
         self.min_request_interval = 1.0
+        # Finished fixtures per team, newest first; rebuilt on every get_fixtures()
+        self._results_by_team = None
     
     def _rate_limit(self):
         """Ensure we don't exceed rate limits"""
@@ -93,62 +212,166 @@ class FixtureAPIWrapper:
     
     def get_fixtures(self) -> List[Dict]:
         """Get all fixtures with enhanced data"""
+        from agents.data_buff import loads_json
+        
         self._rate_limit()
         try:
             response = self.session.get(f"{self.base_url}/fixtures/")
             response.raise_for_status()
-            return response.json()
+            fixtures = loads_json(response.content)
         except Exception as e:
             logger.error(f"Error fetching fixtures: {e}")
             raise
+        
+        self.index_results(fixtures)
+        return fixtures
+    
+    def index_results(self, fixtures: List[Dict]):
+        """Bucket finished fixtures by team in one pass, newest first"""
+        results_by_team = {}
+        for fixture in fixtures:
+            if fixture['finished']:
+                results_by_team.setdefault(fixture['team_h'], []).append(fixture)
+                results_by_team.setdefault(fixture['team_a'], []).append(fixture)
+        for team_fixtures in results_by_team.values():
+            team_fixtures.sort(key=lambda x: x['kickoff_time'] or '', reverse=True)
+        self._results_by_team = results_by_team
     
     def get_team_results(self, team_id: int, last_n_games: int = 6) -> List[Dict]:
         """Get recent results for form analysis"""
         # This would typically come from a football data API
         # For now, we'll simulate with FPL data
         try:
-            fixtures = self.get_fixtures()
-            team_fixtures = []
-            
-            for fixture in fixtures:
-                if (fixture['team_h'] == team_id or fixture['team_a'] == team_id) and fixture['finished']:
-                    team_fixtures.append(fixture)
-            
-            # Sort by kickoff time and get last n games
-            team_fixtures.sort(key=lambda x: x['kickoff_time'], reverse=True)
-            return team_fixtures[:last_n_games]
+            # Fetch once per session; later calls read the index
+            if self._results_by_team is None:
+                self.get_fixtures()
+            return self._results_by_team.get(team_id, [])[:last_n_games]
             
         except Exception as e:
             logger.error(f"Error fetching team results for {team_id}: {e}")
             return []
 
 
+class AsyncFixtureAPIWrapper:
+    """Async twin of FixtureAPIWrapper: overlaps endpoint fetches under a shared rate limit (requires aiohttp)"""
+    
+    def __init__(self, rate: float = 1.0, max_tokens: int = 1):
+        from agents.data_buff import RateLimiter
+        
+        self.base_url = "https://fantasy.premierleague.com/api"
+        self.rate_limiter = RateLimiter(rate, max_tokens)
+        self.session = None
+    
+    async def __aenter__(self):
+        self.session = aiohttp.ClientSession(
+            headers={'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'},
+            timeout=aiohttp.ClientTimeout(total=30)
+        )
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.session.close()
+    
+    async def get_json(self, path: str):
+        """GET one API endpoint, e.g. 'fixtures/'"""
+        from agents.data_buff import loads_json
+        
+        await self.rate_limiter.acquire()
+        async with self.session.get(f"{self.base_url}/{path}") as response:
+            response.raise_for_status()
+            return loads_json(await response.read())
+    
+    async def get_many(self, paths: List[str]) -> List:
+        """Fetch several endpoints concurrently; results in path order"""
+        return await asyncio.gather(*(self.get_json(path) for path in paths))
+    
+    async def get_fixtures(self) -> List[Dict]:
+        """Get all fixtures with enhanced data"""
+        return await self.get_json("fixtures/")
+
+
 class FormAnalyzer:
     """Analyzes team form to adjust fixture difficulty"""
     
-    def __init__(self, db_manager):
+    def __init__(self, db_manager, cache=None):
         self.db = db_manager
+        self.cache = cache  # Optional CacheManager for results computed from the database
+        self.cache_gameweek = 0  # Part of the cache keys, so a new gameweek never reads old form
+        # Finished results per team, newest first (filled by prefetch, None = query per call)
+        self._results_by_team: Optional[Dict[int, List[Dict]]] = None
+        # Per-run memo of computed form/H2H, valid while a prefetch is loaded
+        self._memo: Dict[tuple, Dict] = {}
     
-    def calculate_team_form(self, team_id: int, games_back: int = 6) -> Dict:
-        """Calculate team's recent form"""
-        # Ensure team_id is integer
-        team_id = int(team_id)
-        games_back = int(games_back)
-        
+    def prefetch(self, team_ids: List[int]):
+        """Load every finished result for these teams in one query; form/H2H read from it"""
+        team_ids = sorted(set(team_ids))
         query = """
-            SELECT 
-                f.team_h, f.team_a, f.team_h_score, f.team_a_score,
-                f.kickoff_time, f.finished
+            SELECT f.team_h, f.team_a, f.team_h_score, f.team_a_score, f.kickoff_time
             FROM fixtures f
-            WHERE (f.team_h = %s OR f.team_a = %s) 
+            WHERE (f.team_h = ANY(%s) OR f.team_a = ANY(%s))
             AND f.finished = TRUE
             AND f.team_h_score IS NOT NULL
             AND f.team_a_score IS NOT NULL
             ORDER BY f.kickoff_time DESC
-            LIMIT %s
         """
-        
-        results = self.db.execute_query(query, (team_id, team_id, games_back))
+        results_by_team = {team_id: [] for team_id in team_ids}
+        for row in self.db.execute_query_stream(query, (team_ids, team_ids), batch=1000):
+            for team_id in (row['team_h'], row['team_a']):
+                if team_id in results_by_team:
+                    results_by_team[team_id].append(row)
+        self._results_by_team = results_by_team
+        self._memo.clear()
+    
+    def clear_prefetch(self):
+        """Go back to querying the database per call"""
+        self._results_by_team = None
+        self._memo.clear()
+    
+    def _cached(self, memo_key: tuple, cache_key: str, compute) -> Dict:
+        """In-process memo while prefetched, Redis cache-aside otherwise"""
+        if self._results_by_team is not None:
+            # setdefault keeps one result per key when worker threads race on a miss
+            result = self._memo.get(memo_key)
+            if result is None:
+                result = self._memo.setdefault(memo_key, compute())
+            return result
+        
+        from agents.data_buff import loads_json, encode_cache_payload
+        
+        payload = self.cache.get(cache_key) if self.cache else None
+        if payload:
+            return loads_json(payload)
+        result = compute()
+        if self.cache:
+            self.cache.set(cache_key, encode_cache_payload(result), expire=FORM_CACHE_TTL)
+        return result
+    
+    def calculate_team_form(self, team_id: int, games_back: int = 6) -> Dict:
+        """Calculate team's recent form"""
+        return self._cached(
+            ('form', team_id, games_back),
+            FORM_CACHE_KEY.format(team_id, games_back, self.cache_gameweek),
+            lambda: self._compute_team_form(team_id, games_back)
+        )
+    
+    def _compute_team_form(self, team_id: int, games_back: int) -> Dict:
+        """Compute a team's form from its last games_back results"""
+        if self._results_by_team is not None and team_id in self._results_by_team:
+            results = self._results_by_team[team_id][:games_back]
+        else:
+            query = """
+                SELECT 
+                    f.team_h, f.team_a, f.team_h_score, f.team_a_score,
+                    f.kickoff_time, f.finished
+                FROM fixtures f
+                WHERE (f.team_h = %s OR f.team_a = %s) 
+                AND f.finished = TRUE
+                AND f.team_h_score IS NOT NULL
+                AND f.team_a_score IS NOT NULL
+                ORDER BY f.kickoff_time DESC
+                LIMIT %s
+            """
+            results = self.db.execute_query(query, (team_id, team_id, games_back))
         
         if not results:
             return {
@@ -163,34 +386,13 @@ class FormAnalyzer:
                 'defense_strength': 1.0
             }
         
-        wins = draws = losses = 0
-        goals_for = goals_against = 0
-        
-        for result in results:
-            try:
-                # Ensure all values are integers
-                team_h = int(result['team_h'])
-                team_a = int(result['team_a'])
-                team_h_score = int(result['team_h_score']) if result['team_h_score'] is not None else 0
-                team_a_score = int(result['team_a_score']) if result['team_a_score'] is not None else 0
-                
-                is_home = team_h == team_id
-                team_score = team_h_score if is_home else team_a_score
-                opp_score = team_a_score if is_home else team_h_score
-                
-                goals_for += team_score
-                goals_against += opp_score
-                
-                if team_score > opp_score:
-                    wins += 1
-                elif team_score == opp_score:
-                    draws += 1
-                else:
-                    losses += 1
-                    
-            except (ValueError, TypeError) as e:
-                logger.warning(f"Skipping invalid result data for team {team_id}: {e}")
-                continue
+        # Outcomes as boolean masks, goals as array sums
+        team_score, opp_score = _side_scores(results, team_id)
+        wins = int((team_score > opp_score).sum())
+        draws = int((team_score == opp_score).sum())
+        losses = len(results) - wins - draws
+        goals_for = int(team_score.sum())
+        goals_against = int(opp_score.sum())
         
         games_played = len(results)
         points = (wins * 3) + draws
@@ -215,54 +417,53 @@ class FormAnalyzer:
     
     def get_head_to_head_record(self, team1_id: int, team2_id: int, seasons_back: int = 3) -> Dict:
         """Get historical head-to-head record"""
-        # Ensure integer types
-        team1_id = int(team1_id)
-        team2_id = int(team2_id)
-        seasons_back = int(seasons_back)
-        
-        query = """
-            SELECT 
-                f.team_h, f.team_a, f.team_h_score, f.team_a_score,
-                f.kickoff_time
-            FROM fixtures f
-            WHERE ((f.team_h = %s AND f.team_a = %s) OR 
-                   (f.team_h = %s AND f.team_a = %s))
-            AND f.finished = TRUE
-            AND f.team_h_score IS NOT NULL
-            AND f.team_a_score IS NOT NULL
-            ORDER BY f.kickoff_time DESC
-            LIMIT %s
-        """
-        
-        results = self.db.execute_query(query, (team1_id, team2_id, team2_id, team1_id, seasons_back * 2))
+        # H2H is symmetric: compute/cache it once from the lower id's side, flip for the other
+        low_id, high_id = sorted((team1_id, team2_id))
+        record = self._cached(
+            ('h2h', low_id, high_id, seasons_back),
+            H2H_CACHE_KEY.format(low_id, high_id, seasons_back, self.cache_gameweek),
+            lambda: self._compute_head_to_head(low_id, high_id, seasons_back)
+        )
+        if team1_id == low_id:
+            return record
         
-        team1_wins = team1_draws = team1_losses = 0
-        total_games = 0
+        total_games = record['total_games']
+        return {
+            'total_games': total_games,
+            'team1_wins': record['team1_losses'],
+            'team1_draws': record['team1_draws'],
+            'team1_losses': record['team1_wins'],
+            'team1_win_rate': record['team1_losses'] / total_games if total_games > 0 else 0.5
+        }
+    
+    def _compute_head_to_head(self, team1_id: int, team2_id: int, seasons_back: int) -> Dict:
+        """Compute the head-to-head record from team1's side"""
+        if self._results_by_team is not None and team1_id in self._results_by_team:
+            results = [
+                row for row in self._results_by_team[team1_id]
+                if team2_id in (row['team_h'], row['team_a'])
+            ][:seasons_back * 2]
+        else:
+            query = """
+                SELECT 
+                    f.team_h, f.team_a, f.team_h_score, f.team_a_score,
+                    f.kickoff_time
+                FROM fixtures f
+                WHERE ((f.team_h = %s AND f.team_a = %s) OR 
+                       (f.team_h = %s AND f.team_a = %s))
+                AND f.finished = TRUE
+                AND f.team_h_score IS NOT NULL
+                AND f.team_a_score IS NOT NULL
+                ORDER BY f.kickoff_time DESC
+                LIMIT %s
+            """
+            results = self.db.execute_query(query, (team1_id, team2_id, team2_id, team1_id, seasons_back * 2))
         
-        for result in results:
-            try:
-                # Ensure integer conversion
-                team_h = int(result['team_h'])
-                team_a = int(result['team_a'])
-                team_h_score = int(result['team_h_score']) if result['team_h_score'] is not None else 0
-                team_a_score = int(result['team_a_score']) if result['team_a_score'] is not None else 0
-                
-                team1_is_home = team_h == team1_id
-                team1_score = team_h_score if team1_is_home else team_a_score
-                team2_score = team_a_score if team1_is_home else team_h_score
-                
-                if team1_score > team2_score:
-                    team1_wins += 1
-                elif team1_score == team2_score:
-                    team1_draws += 1
-                else:
-                    team1_losses += 1
-                
-                total_games += 1
-                
-            except (ValueError, TypeError) as e:
-                logger.warning(f"Skipping invalid H2H data for teams {team1_id} vs {team2_id}: {e}")
-                continue
+        team1_score, team2_score = _side_scores(results, team1_id)
+        total_games = len(results)
+        team1_wins = int((team1_score > team2_score).sum())
+        team1_draws = int((team1_score == team2_score).sum())
+        team1_losses = total_games - team1_wins - team1_draws
         
         return {
             'total_games': total_games,
@@ -273,18 +474,63 @@ class FormAnalyzer:
         }
 
 
+def _side_scores(results: List[Dict], team_id: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Goals scored and conceded by team_id in each result, as int arrays (missing scores = 0)"""
+    count = len(results)
+    team_h = np.fromiter((result['team_h'] for result in results), dtype=np.int32, count=count)
+    h_score = np.fromiter((result['team_h_score'] or 0 for result in results), dtype=np.int32, count=count)
+    a_score = np.fromiter((result['team_a_score'] or 0 for result in results), dtype=np.int32, count=count)
+    is_home = team_h == team_id
+    return np.where(is_home, h_score, a_score), np.where(is_home, a_score, h_score)
+
+
 class CongestionAnalyzer:
     """Analyzes fixture congestion and its impact"""
     
     def __init__(self, api_wrapper, db_manager):
         self.api = api_wrapper
         self.db = db_manager  # Add database manager
-        # Teams in European competitions (would be updated dynamically)
-        self.european_teams = {
-            1: "Arsenal", 2: "Aston Villa", 3: "Chelsea", 4: "Liverpool", 
-            5: "Man City", 6: "Man Utd", 7: "Newcastle", 8: "Tottenham"
+        # Teams in European competitions (would be updated dynamically):
+        # Arsenal, Aston Villa, Chelsea, Liverpool, Man City, Man Utd, Newcastle, Tottenham
+        self.european_team_ids = np.array([1, 2, 3, 4, 5, 6, 7, 8])
+        # team_id -> (gameweeks, kickoffs) sorted by gameweek (filled by prefetch, None = query per call)
+        self._fixtures_by_team: Optional[Dict[int, Tuple[np.ndarray, np.ndarray]]] = None
+    
+    def prefetch(self, start_gameweek: int, end_gameweek: int):
+        """Load every fixture in the gameweek range once; congestion windows then come from array slices"""
+        query = """
+            SELECT team_h, team_a, gameweek, kickoff_time
+            FROM fixtures
+            WHERE gameweek BETWEEN %s AND %s
+        """
+        rows = self.db.execute_query(query, (max(1, start_gameweek), min(38, end_gameweek)))
+        if not rows:
+            self._fixtures_by_team = {}
+            return
+        
+        # Both sides of each fixture, grouped by team and sorted by gameweek
+        teams = np.array([row['team_h'] for row in rows] + [row['team_a'] for row in rows])
+        gameweeks = np.tile(np.array([row['gameweek'] for row in rows]), 2)
+        kickoffs = np.tile(
+            pd.to_datetime(
+                pd.Series([row['kickoff_time'] for row in rows], dtype=object), utc=True, errors='coerce'
+            ).dt.tz_localize(None).to_numpy(dtype='datetime64[s]'),
+            2
+        )
+        order = np.lexsort((gameweeks, teams))
+        teams, gameweeks, kickoffs = teams[order], gameweeks[order], kickoffs[order]
+        
+        team_ids, starts = np.unique(teams, return_index=True)
+        bounds = np.append(starts, len(teams))
+        self._fixtures_by_team = {
+            team_id: (gameweeks[lo:hi], kickoffs[lo:hi])
+            for team_id, lo, hi in zip(team_ids.tolist(), bounds[:-1], bounds[1:])
         }
     
+    def clear_prefetch(self):
+        """Go back to querying the database per call"""
+        self._fixtures_by_team = None
+    
     def calculate_fixture_congestion(self, team_id: int, gameweek: int, window_days: int = 14) -> Dict:
         """Calculate fixture congestion around a specific gameweek"""
         
@@ -300,80 +546,56 @@ class CongestionAnalyzer:
         
         start_gw = max(1, gameweek - 2)
         end_gw = min(38, gameweek + 2)
+        is_european = bool(np.isin(team_id, self.european_team_ids))
         
-        # Convert to int to ensure type safety
-        team_id = int(team_id)
-        start_gw = int(start_gw)
-        end_gw = int(end_gw)
-        
-        fixtures = self.db.execute_query(query, (team_id, team_id, team_id, start_gw, end_gw))
+        if self._fixtures_by_team is not None:
+            # Binary-search the team's gameweek-sorted arrays for the window
+            gameweeks, kickoffs = self._fixtures_by_team.get(
+                team_id, (np.empty(0, dtype=np.int64), np.empty(0, dtype='datetime64[s]'))
+            )
+            lo = np.searchsorted(gameweeks, start_gw, side='left')
+            hi = np.searchsorted(gameweeks, end_gw, side='right')
+            fixture_count = int(hi - lo)
+            window = kickoffs[lo:hi]
+            window = np.sort(window[~np.isnat(window)])
+            days_between = (np.diff(window) // np.timedelta64(1, 'D')).astype(int).tolist()
+        else:
+            fixtures = self.db.execute_query(query, (team_id, team_id, team_id, start_gw, end_gw))
+            fixture_count = len(fixtures)
+            days_between = self._days_between(fixtures) if fixtures else []
         
-        if not fixtures:
+        if not fixture_count:
             return {
                 'fixture_count': 0,
                 'congestion_level': 'none',
                 'congestion_score': 0,
                 'days_between_fixtures': [],
-                'has_european_football': team_id in self.european_teams
+                'has_european_football': is_european
             }
         
-        # Calculate days between fixtures
-        fixture_dates = []
-        for fixture in fixtures:
-            if fixture['kickoff_time']:
-                try:
-                    kickoff_str = str(fixture['kickoff_time'])
-                    if kickoff_str and kickoff_str != 'None':
-                        if isinstance(fixture['kickoff_time'], str):
-                            if 'T' in kickoff_str:
-                                # ISO format
-                                fixture_dates.append(datetime.fromisoformat(kickoff_str.replace('Z', '+00:00')))
-                            else:
-                                # Skip invalid format
-                                continue
-                        else:
-                            # Already a datetime object
-                            fixture_dates.append(fixture['kickoff_time'])
-                except Exception as e:
-                    logger.warning(f"Skipping invalid kickoff time: {fixture['kickoff_time']}")
-                    continue
-        
-        fixture_dates.sort()
-        days_between = []
-        
-        for i in range(1, len(fixture_dates)):
-            days_diff = (fixture_dates[i] - fixture_dates[i-1]).days
-            days_between.append(days_diff)
-        
         # Determine congestion level
-        fixture_count = len(fixtures)
-        avg_days_between = np.mean(days_between) if days_between else 7
-        
-        if fixture_count >= 4 and avg_days_between < 4:
-            congestion_level = 'high'
-            congestion_score = 0.8
-        elif fixture_count >= 3 and avg_days_between < 5:
-            congestion_level = 'medium'
-            congestion_score = 0.6
-        elif fixture_count >= 2 and avg_days_between < 3:
-            congestion_level = 'medium'
-            congestion_score = 0.5
-        else:
-            congestion_level = 'low'
-            congestion_score = 0.2
+        avg_days_between = sum(days_between) / len(days_between) if days_between else 7
         
-        # Extra penalty for European teams
-        if team_id in self.european_teams:
-            congestion_score += 0.2
+        # Table lookup, plus the European penalty capped at 1.0
+        level_code, congestion_score = classify_congestion(fixture_count, avg_days_between, is_european)
         
         return {
             'fixture_count': fixture_count,
-            'congestion_level': congestion_level,
-            'congestion_score': min(congestion_score, 1.0),
+            'congestion_level': CONGESTION_LEVEL_NAMES[int(level_code)],
+            'congestion_score': float(congestion_score),
             'days_between_fixtures': days_between,
             'avg_days_between': round(avg_days_between, 1),
-            'has_european_football': team_id in self.european_teams
+            'has_european_football': is_european
         }
+    
+    @staticmethod
+    def _days_between(fixtures: List[Dict]) -> List[int]:
+        """Whole days between consecutive kickoffs (bulk parse; unparseable times become NaT and drop out)"""
+        kickoff_times = pd.to_datetime(
+            pd.Series([fixture['kickoff_time'] for fixture in fixtures], dtype=object),
+            utc=True, errors='coerce'
+        ).dropna().sort_values()
+        return kickoff_times.diff().dt.days.dropna().astype(int).tolist()
 
 
 class AdvancedDifficultyCalculator:
@@ -383,213 +605,155 @@ class AdvancedDifficultyCalculator:
         self.form_analyzer = form_analyzer
         self.congestion_analyzer = congestion_analyzer
     
-    def calculate_advanced_difficulty(self, fixture: Dict, team_id: int) -> Dict:
-        """Calculate comprehensive difficulty analysis"""
-        
-        try:
-            # Ensure integers
-            team_id = int(team_id)
-            is_home = int(fixture['team_h']) == team_id
-            opponent_id = int(fixture['team_a']) if is_home else int(fixture['team_h'])
-            gameweek = int(fixture.get('gameweek') or fixture.get('event', 1))
-            
-            # Base FPL difficulty
-            base_difficulty = int(fixture['team_h_difficulty']) if is_home else int(fixture['team_a_difficulty'])
-            
-            logger.debug(f"Starting advanced difficulty calculation for team {team_id} vs {opponent_id}")
-            
-            # Get team and opponent form
-            logger.debug("Calculating team form...")
-            team_form = self.form_analyzer.calculate_team_form(team_id)
-            logger.debug("Calculating opponent form...")
-            opponent_form = self.form_analyzer.calculate_team_form(opponent_id)
-            
-            # Get head-to-head record
-            logger.debug("Getting head-to-head record...")
-            h2h = self.form_analyzer.get_head_to_head_record(team_id, opponent_id)
-            
-            # Get congestion analysis
-            logger.debug("Calculating fixture congestion...")
-            congestion = self.congestion_analyzer.calculate_fixture_congestion(team_id, gameweek)
-            
-            # Calculate form-adjusted difficulty
-            logger.debug("Calculating form multiplier...")
-            form_multiplier = self._calculate_form_multiplier(team_form, opponent_form, is_home)
-            form_adjusted_difficulty = base_difficulty * form_multiplier
-            
-            # Calculate favorability score (0-100, higher is better for the team)
-            logger.debug("Calculating favorability score...")
-            favorability_score = self._calculate_favorability_score(
-                base_difficulty, team_form, opponent_form, h2h, congestion, is_home
-            )
-            
-            # Advanced difficulty (1-10 scale, lower is easier)
-            logger.debug("Calculating final difficulty...")
-            advanced_difficulty = self._calculate_final_difficulty(
-                base_difficulty, form_multiplier, congestion['congestion_score'], h2h['team1_win_rate']
-            )
-            
-            # Confidence in the analysis
-            logger.debug("Calculating confidence...")
-            confidence = self._calculate_confidence(team_form, opponent_form, h2h, congestion)
-            
-            return {
-                'base_difficulty': base_difficulty,
-                'advanced_difficulty': round(advanced_difficulty, 2),
-                'form_adjusted_difficulty': round(form_adjusted_difficulty, 2),
-                'favorability_score': round(favorability_score, 1),
-                'confidence': confidence,
-                'team_form': team_form,
-                'opponent_form': opponent_form,
-                'head_to_head': h2h,
-                'congestion': congestion,
-                'form_multiplier': round(form_multiplier, 2)
-            }
-            
-        except Exception as e:
-            logger.error(f"Error in calculate_advanced_difficulty for team {team_id}: {e}")
-            # Return simplified analysis if advanced fails
-            base_difficulty = int(fixture['team_h_difficulty']) if int(fixture['team_h']) == int(team_id) else int(fixture['team_a_difficulty'])
-            return {
-                'base_difficulty': base_difficulty,
-                'advanced_difficulty': float(base_difficulty),
-                'form_adjusted_difficulty': float(base_difficulty),
-                'favorability_score': (6 - base_difficulty) * 20,
-                'confidence': 50,
-                'team_form': {'form_score': 50.0},
-                'opponent_form': {'form_score': 50.0},
-                'head_to_head': {'team1_win_rate': 0.5},
-                'congestion': {'congestion_score': 0.2},
-                'form_multiplier': 1.0
+    def calculate_advanced_difficulties(self, pairs: List[Tuple[Dict, int]]) -> List[Dict]:
+        """Advanced difficulty analysis for many (fixture, team_id) pairs, arithmetic done as arrays"""
+        results = [None] * len(pairs)
+        rows = []
+        
+        # Gather form/H2H/congestion per pair on a thread pool: congestion
+        # lookups hit the database, and each worker borrows its own pooled connection
+        with ThreadPoolExecutor(max_workers=FIXTURE_ANALYSIS_WORKERS) as executor:
+            futures = {
+                executor.submit(self._difficulty_factors, fixture, team_id): index
+                for index, (fixture, team_id) in enumerate(pairs)
             }
-    
-    def _calculate_form_multiplier(self, team_form: Dict, opponent_form: Dict, is_home: bool) -> float:
-        """Calculate how current form affects difficulty"""
-        
-        # Team form impact (better form = easier for opponents)
-        team_form_score = team_form['form_score']
-        opponent_form_score = opponent_form['form_score']
-        
-        # Relative form difference
-        form_difference = opponent_form_score - team_form_score
-        
-        # Convert to multiplier (range 0.7 - 1.3)
-        base_multiplier = 1.0 + (form_difference / 200)  # /200 to scale
-        
-        # Home advantage
-        if is_home:
-            base_multiplier *= 0.9  # Slightly easier at home
-        else:
-            base_multiplier *= 1.1  # Slightly harder away
-        
-        # Bound the multiplier
-        return max(0.5, min(1.5, base_multiplier))
-    
-    def _calculate_favorability_score(self, base_difficulty: int, team_form: Dict, 
-                                    opponent_form: Dict, h2h: Dict, congestion: Dict, 
-                                    is_home: bool) -> float:
-        """Calculate overall favorability (0-100, higher is better)"""
-        
-        # Start with inverse of difficulty (5 = easiest, 1 = hardest)
-        base_score = (6 - base_difficulty) * 15  # Scale 15-75
-        
-        # Form adjustments
-        form_bonus = (team_form['form_score'] - opponent_form['form_score']) / 4
-        base_score += form_bonus
-        
-        # Home advantage
-        if is_home:
-            base_score += 10
+            for future in as_completed(futures):
+                index = futures[future]
+                try:
+                    rows.append((index,) + future.result())
+                except Exception as e:
+                    fixture, team_id = pairs[index]
+                    logger.error("Error in calculate_advanced_difficulties for team %s: %s", team_id, e)
+                    results[index] = self._fallback_difficulty(fixture, team_id)
+        
+        if not rows:
+            return results
+        
+        difficulty = np.clip(np.array([row[1] for row in rows], dtype=np.intp), 1, 5)
+        base = difficulty.astype(np.float64)
+        is_home = np.array([row[2] for row in rows], dtype=bool)
+        team_score = np.array([row[3]['form_score'] for row in rows], dtype=np.float64)
+        opponent_score = np.array([row[4]['form_score'] for row in rows], dtype=np.float64)
+        h2h_rate = np.array([row[5]['team1_win_rate'] for row in rows], dtype=np.float64)
+        congestion_score = np.array([row[6]['congestion_score'] for row in rows], dtype=np.float64)
+        team_games = np.array([row[3]['games_played'] for row in rows])
+        opponent_games = np.array([row[4]['games_played'] for row in rows])
+        h2h_games = np.array([row[5]['total_games'] for row in rows])
+        congestion_code = np.array(
+            [CONGESTION_LEVEL_CODES.get(row[6]['congestion_level'], 0) for row in rows]
+        )
         
-        # Head-to-head bonus
-        h2h_bonus = (h2h['team1_win_rate'] - 0.5) * 20  # -10 to +10
-        base_score += h2h_bonus
+        # Form multiplier, favorability, difficulty and confidence, one pass per column
+        form_mul = np.clip(
+            (1.0 + (opponent_score - team_score) / 200) * np.where(is_home, 0.9, 1.1), 0.5, 1.5
+        )
+        form_adjusted = base * form_mul
+        favorability = np.clip(
+            BASE_FAV[difficulty] + (team_score - opponent_score) / 4 + np.where(is_home, 10.0, 0.0)
+            + (h2h_rate - 0.5) * 20 - congestion_score * 15,
+            0.0, 100.0
+        )
+        advanced = np.clip(form_adjusted + congestion_score * 2 + (0.5 - h2h_rate) * 2, 1.0, 10.0)
+        confidence = np.clip(
+            50
+            + np.select([team_games >= 5, team_games >= 3], [20, 10], 0)
+            + np.select([opponent_games >= 5, opponent_games >= 3], [15, 8], 0)
+            + np.select([h2h_games >= 6, h2h_games >= 3], [10, 5], 0)
+            - np.select([congestion_code == 2, congestion_code == 1], [15, 8], 0),
+            0, 100
+        )
         
-        # Congestion penalty
-        congestion_penalty = congestion['congestion_score'] * 15
-        base_score -= congestion_penalty
+        columns = zip(
+            np.round(advanced, 2).tolist(), np.round(form_adjusted, 2).tolist(),
+            np.round(favorability, 1).tolist(), confidence.tolist(), np.round(form_mul, 2).tolist()
+        )
+        for row, (adv, adjusted, favor, conf, mul) in zip(rows, columns):
+            results[row[0]] = {
+                'base_difficulty': row[1],
+                'advanced_difficulty': adv,
+                'form_adjusted_difficulty': adjusted,
+                'favorability_score': favor,
+                'confidence': conf,
+                'team_form': row[3],
+                'opponent_form': row[4],
+                'head_to_head': row[5],
+                'congestion': row[6],
+                'form_multiplier': mul
+            }
         
-        # Bound to 0-100
-        return max(0, min(100, base_score))
+        return results
     
-    def _calculate_final_difficulty(self, base_difficulty: int, form_multiplier: float, 
-                                  congestion_score: float, h2h_win_rate: float) -> float:
-        """Calculate final advanced difficulty score"""
-        
-        # Start with form-adjusted difficulty
-        difficulty = base_difficulty * form_multiplier
-        
-        # Add congestion impact
-        difficulty += congestion_score * 2  # Up to +2 for high congestion
-        
-        # Adjust for historical performance
-        h2h_adjustment = (0.5 - h2h_win_rate) * 2  # -1 to +1
-        difficulty += h2h_adjustment
-        
-        # Bound to reasonable range
-        return max(1.0, min(10.0, difficulty))
+    def _difficulty_factors(self, fixture: Dict, team_id: int) -> Tuple:
+        """Base difficulty, venue, both forms, H2H and congestion for one (fixture, team) pair"""
+        is_home = fixture['team_h'] == team_id
+        opponent_id = fixture['team_a'] if is_home else fixture['team_h']
+        gameweek = fixture.get('gameweek') or fixture.get('event', 1)
+        base_difficulty = fixture['team_h_difficulty'] if is_home else fixture['team_a_difficulty']
+        
+        return (
+            base_difficulty, is_home,
+            self.form_analyzer.calculate_team_form(team_id),
+            self.form_analyzer.calculate_team_form(opponent_id),
+            self.form_analyzer.get_head_to_head_record(team_id, opponent_id),
+            self.congestion_analyzer.calculate_fixture_congestion(team_id, gameweek)
+        )
     
-    def _calculate_confidence(self, team_form: Dict, opponent_form: Dict, 
-                            h2h: Dict, congestion: Dict) -> int:
-        """Calculate confidence in the analysis (0-100)"""
-        
-        confidence = 50  # Base confidence
-        
-        # More games = higher confidence
-        if team_form['games_played'] >= 5:
-            confidence += 20
-        elif team_form['games_played'] >= 3:
-            confidence += 10
-        
-        if opponent_form['games_played'] >= 5:
-            confidence += 15
-        elif opponent_form['games_played'] >= 3:
-            confidence += 8
-        
-        # Head-to-head history
-        if h2h['total_games'] >= 6:
-            confidence += 10
-        elif h2h['total_games'] >= 3:
-            confidence += 5
-        
-        # Less confidence if high congestion (unpredictable)
-        if congestion['congestion_level'] == 'high':
-            confidence -= 15
-        elif congestion['congestion_level'] == 'medium':
-            confidence -= 8
-        
-        return max(0, min(100, confidence))
+    def _fallback_difficulty(self, fixture: Dict, team_id: int) -> Dict:
+        """Simplified analysis from the FPL difficulty alone"""
+        base_difficulty = fixture['team_h_difficulty'] if fixture['team_h'] == team_id else fixture['team_a_difficulty']
+        return {
+            'base_difficulty': base_difficulty,
+            'advanced_difficulty': float(base_difficulty),
+            'form_adjusted_difficulty': float(base_difficulty),
+            'favorability_score': (6 - base_difficulty) * 20,
+            'confidence': 50,
+            'team_form': {'form_score': 50.0},
+            'opponent_form': {'form_score': 50.0},
+            'head_to_head': {'team1_win_rate': 0.5},
+            'congestion': {'congestion_score': 0.2},
+            'form_multiplier': 1.0
+        }
 
 
 class FixtureAgent:
     """Main Fixture Agent for advanced fixture analysis"""
     
-    def __init__(self, db_config: Dict[str, str], redis_config: Dict[str, str] = None):
+    def __init__(self, db_config: Dict[str, str], redis_config: Dict[str, str] = None,
+                 redis_client=None):
         from agents.data_buff import DatabaseManager, CacheManager
         
         self.api = FixtureAPIWrapper()
         self.db = DatabaseManager(db_config)
-        self.cache = CacheManager(redis_config or {})
+        self.cache = CacheManager(redis_config or {}, redis_client)
         
-        self.form_analyzer = FormAnalyzer(self.db)
+        self.form_analyzer = FormAnalyzer(self.db, self.cache)
         self.congestion_analyzer = CongestionAnalyzer(self.api, self.db)  # Pass db_manager
         self.difficulty_calculator = AdvancedDifficultyCalculator(
             self.form_analyzer, self.congestion_analyzer
         )
         
         self.current_season = "2024-25"
+        self._current_gameweek: Optional[Tuple[float, int]] = None  # (monotonic time, gameweek)
+        # (gameweeks_ahead, current gameweek) -> fixture runs, shared by the update/export helpers
+        self._runs_cache: Dict[Tuple[int, int], List[FixtureRun]] = {}
+        # (current gameweek, end gameweek, analyses) from the last upcoming-fixture analysis
+        self._analyses_cache: Optional[Tuple[int, int, List[FixtureAnalysis]]] = None
     
     def initialize(self):
         """Initialize the fixture agent"""
+        self._current_gameweek = None
         self._create_fixture_tables()
         logger.info("Fixture Agent initialized successfully")
     
     def _create_fixture_tables(self):
         """Create additional tables for fixture analysis"""
-        if not self.db.connection:
-            self.db.connect()
-        
-        cursor = self.db.connection.cursor()
+        with self.db.get_connection() as conn:
+            self._create_fixture_tables_on(conn)
+        logger.info("Fixture analysis tables created successfully")
+    
+    def _create_fixture_tables_on(self, conn):
+        """Run the fixture DDL on a borrowed connection"""
+        cursor = conn.cursor()
         
         # Fixture analysis table
         cursor.execute("""
@@ -630,309 +794,373 @@ class FixtureAgent:
             )
         """)
         
-        self.db.connection.commit()
+        # Form/H2H read a team's finished results newest first
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_fixtures_team_h_kickoff
+            ON fixtures (team_h, kickoff_time DESC)
+            WHERE finished
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_fixtures_team_a_kickoff
+            ON fixtures (team_a, kickoff_time DESC)
+            WHERE finished
+        """)
+        # Gameweek-range scans (upcoming analysis, view refresh, congestion prefetch)
+        # read teams and difficulties straight from the index; supersedes idx_fixtures_gameweek
+        cursor.execute("DROP INDEX IF EXISTS idx_fixtures_gameweek")
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_fixtures_gw_teams
+            ON fixtures (gameweek, finished)
+            INCLUDE (team_h, team_a, team_h_difficulty, team_a_difficulty)
+        """)
+        # Per-team gameweek windows (team_h = ? OR team_a = ?) become a BitmapOr of two index scans
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_fixtures_team_h_gw
+            ON fixtures (team_h, gameweek)
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_fixtures_team_a_gw
+            ON fixtures (team_a, gameweek)
+        """)
+        
+        # Upcoming fixtures from each team's side (difficulty, venue), shared by
+        # the fixture-run and favorability reads; refreshed after each fixture fetch
+        cursor.execute("""
+            CREATE MATERIALIZED VIEW IF NOT EXISTS team_upcoming_fixtures AS
+            SELECT id AS fixture_id, team_h AS team_id, gameweek,
+                   TRUE AS is_home, team_h_difficulty AS difficulty
+            FROM fixtures
+            WHERE finished = FALSE
+            UNION ALL
+            SELECT id AS fixture_id, team_a AS team_id, gameweek,
+                   FALSE AS is_home, team_a_difficulty AS difficulty
+            FROM fixtures
+            WHERE finished = FALSE
+        """)
+        # Unique index lets the view be refreshed CONCURRENTLY (readers aren't blocked)
+        cursor.execute("""
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_team_upcoming_fixtures
+            ON team_upcoming_fixtures (fixture_id, team_id)
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_team_upcoming_fixtures_gw
+            ON team_upcoming_fixtures (gameweek, team_id)
+        """)
+        
         cursor.close()
-        logger.info("Fixture analysis tables created successfully")
     
     def analyze_upcoming_fixtures(self, gameweeks_ahead: int = 6) -> List[FixtureAnalysis]:
-        """Analyze upcoming fixtures for all teams"""
+        """Analyze upcoming fixtures for all teams (reuses the last run's results when they cover the range)"""
         
         current_gameweek = self._get_current_gameweek()
         end_gameweek = min(38, current_gameweek + gameweeks_ahead)
         
-        # Get upcoming fixtures
+        # Each analysis depends only on its fixture and the current gameweek, so a
+        # longer-horizon run (e.g. the daily update's 8) also answers shorter ones
+        cached = self._analyses_cache
+        if cached and cached[0] == current_gameweek and cached[1] >= end_gameweek:
+            return [analysis for analysis in cached[2] if analysis.gameweek <= end_gameweek]
+        
+        analyses = self._compute_upcoming_analyses(current_gameweek, end_gameweek)
+        self._analyses_cache = (current_gameweek, end_gameweek, analyses)
+        return list(analyses)
+    
+    def _compute_upcoming_analyses(self, current_gameweek: int, end_gameweek: int) -> List[FixtureAnalysis]:
+        """Run the upcoming fixture analysis for current_gameweek..end_gameweek"""
+        # Get upcoming fixtures with both team names joined in; rows arrive
+        # typed and complete, so the analysis never coerces fields in Python
         query = """
-            SELECT * FROM fixtures 
-            WHERE gameweek BETWEEN %s AND %s 
-            AND finished = FALSE
-            ORDER BY gameweek, kickoff_time
+            SELECT f.id, f.gameweek, f.team_h, f.team_a,
+                   f.team_h_difficulty, f.team_a_difficulty,
+                   f.kickoff_time, f.finished,
+                   COALESCE(th.name, 'Team ' || f.team_h) AS home_name,
+                   COALESCE(ta.name, 'Team ' || f.team_a) AS away_name
+            FROM fixtures f
+            LEFT JOIN teams th ON th.id = f.team_h
+            LEFT JOIN teams ta ON ta.id = f.team_a
+            WHERE f.gameweek BETWEEN %s AND %s 
+            AND f.finished = FALSE
+            AND f.team_h_difficulty IS NOT NULL
+            AND f.team_a_difficulty IS NOT NULL
+            ORDER BY f.gameweek, f.kickoff_time
         """
         
         fixtures = self.db.execute_query(query, (current_gameweek, end_gameweek))
         analyses = []
+        self.form_analyzer.cache_gameweek = current_gameweek
         
         logger.info(f"Analyzing {len(fixtures)} upcoming fixtures...")
         
-        for fixture in fixtures:
-            # Analyze for both teams
-            for team_id in [fixture['team_h'], fixture['team_a']]:
-                try:
-                    # Advanced analysis with detailed error tracking
-                    logger.debug(f"Starting analysis for fixture {fixture['id']}, team {team_id}")
-                    
-                    # Ensure all fixture data is properly typed
-                    typed_fixture = {
-                        'id': int(fixture['id']),
-                        'team_h': int(fixture['team_h']),
-                        'team_a': int(fixture['team_a']),
-                        'team_h_difficulty': int(fixture['team_h_difficulty']),
-                        'team_a_difficulty': int(fixture['team_a_difficulty']),
-                        'gameweek': int(fixture.get('gameweek') or fixture.get('event', 1)),
-                        'kickoff_time': fixture['kickoff_time'],
-                        'finished': fixture['finished']
-                    }
-                    
-                    analysis_data = self.difficulty_calculator.calculate_advanced_difficulty(
-                        typed_fixture, int(team_id)
-                    )
-                    
-                    is_home = int(fixture['team_h']) == int(team_id)
-                    opponent_id = int(fixture['team_a']) if is_home else int(fixture['team_h'])
-                    
-                    # Get team names
-                    team_name = self._get_team_name(team_id)
-                    opponent_name = self._get_team_name(opponent_id)
-                    
-                    # Safe datetime parsing
-                    def parse_kickoff_time(kickoff_str):
-                        """Safely parse kickoff time string"""
-                        if not kickoff_str or kickoff_str == 'None':
-                            return datetime.now()
-                        
-                        try:
-                            # Handle different possible formats
-                            if 'T' in str(kickoff_str):
-                                # ISO format: 2024-08-17T14:00:00Z
-                                return datetime.fromisoformat(str(kickoff_str).replace('Z', '+00:00'))
-                            else:
-                                # Try parsing as timestamp or other format
-                                return datetime.now()  # Fallback to now
-                        except (ValueError, TypeError) as e:
-                            logger.warning(f"Could not parse kickoff time '{kickoff_str}': {e}")
-                            return datetime.now()
-                    
-                    analysis = FixtureAnalysis(
-                        team_id=int(team_id),
-                        team_name=team_name,
-                        fixture_id=int(fixture['id']),
-                        opponent_id=opponent_id,
-                        opponent_name=opponent_name,
-                        gameweek=int(fixture.get('gameweek') or fixture.get('event', 1)),
-                        is_home=is_home,
-                        kickoff_time=parse_kickoff_time(fixture.get('kickoff_time')),
-                        fpl_difficulty=int(fixture['team_h_difficulty']) if is_home else int(fixture['team_a_difficulty']),
-                        advanced_difficulty=analysis_data['advanced_difficulty'],
-                        form_adjusted_difficulty=analysis_data['form_adjusted_difficulty'],
-                        congestion_impact=analysis_data['congestion']['congestion_score'],
-                        favorability_score=analysis_data['favorability_score'],
-                        confidence=analysis_data['confidence'],
-                        analysis_factors=analysis_data
-                    )
-                    
-                    analyses.append(analysis)
-                    
-                except Exception as e:
-                    logger.error(f"Error analyzing fixture {fixture['id']} for team {team_id}: {e}")
-                    # Add more detailed debug info
-                    logger.error(f"Fixture data: team_h={fixture.get('team_h')}, team_a={fixture.get('team_a')}, "
-                               f"difficulty_h={fixture.get('team_h_difficulty')}, difficulty_a={fixture.get('team_a_difficulty')}")
-                    
-                    # Add stack trace for debugging
-                    import traceback
-                    logger.error(f"Stack trace: {traceback.format_exc()}")
-                    continue
+        # Every team's results in one query instead of form/H2H queries per fixture
+        self.form_analyzer.prefetch(
+            {fixture['team_h'] for fixture in fixtures} | {fixture['team_a'] for fixture in fixtures}
+        )
+        # Fixtures covering every congestion window (gameweek +/- 2) in one query as well
+        self.congestion_analyzer.prefetch(current_gameweek - 2, end_gameweek + 2)
+        try:
+            self._analyze_fixtures(fixtures, analyses)
+        finally:
+            self.form_analyzer.clear_prefetch()
+            self.congestion_analyzer.clear_prefetch()
         
         logger.info(f"Successfully analyzed {len(analyses)} fixture analyses")
         return analyses
     
-    def analyze_fixture_runs(self, gameweeks_ahead: int = 6) -> List[FixtureRun]:
-        """Analyze runs of fixtures for each team"""
+    def analyze_upcoming_fixtures_frame(self, gameweeks_ahead: int = 6) -> pd.DataFrame:
+        """analyze_upcoming_fixtures as a DataFrame, one column per field"""
+        return fixture_analyses_frame(self.analyze_upcoming_fixtures(gameweeks_ahead))
+    
+    def _analyze_fixtures(self, fixtures: List[Dict], analyses: List[FixtureAnalysis]):
+        """Run the difficulty analysis for both teams of every fixture, appending to analyses"""
+        # Analyze for both teams
+        pairs = [
+            (fixture, team_id)
+            for fixture in fixtures
+            for team_id in (fixture['team_h'], fixture['team_a'])
+        ]
+        
+        # One vectorized difficulty pass over every (fixture, team) pair
+        difficulties = self.difficulty_calculator.calculate_advanced_difficulties(pairs)
+        
+        for (fixture, team_id), analysis_data in zip(pairs, difficulties):
+            try:
+                is_home = fixture['team_h'] == team_id
+                opponent_id = fixture['team_a'] if is_home else fixture['team_h']
+                
+                analysis = FixtureAnalysis(
+                    team_id=team_id,
+                    team_name=fixture['home_name'] if is_home else fixture['away_name'],
+                    fixture_id=fixture['id'],
+                    opponent_id=opponent_id,
+                    opponent_name=fixture['away_name'] if is_home else fixture['home_name'],
+                    gameweek=fixture['gameweek'],
+                    is_home=is_home,
+                    kickoff_time=self._parse_kickoff_time(fixture['kickoff_time']),
+                    fpl_difficulty=fixture['team_h_difficulty'] if is_home else fixture['team_a_difficulty'],
+                    advanced_difficulty=analysis_data['advanced_difficulty'],
+                    form_adjusted_difficulty=analysis_data['form_adjusted_difficulty'],
+                    congestion_impact=analysis_data['congestion']['congestion_score'],
+                    favorability_score=analysis_data['favorability_score'],
+                    confidence=analysis_data['confidence'],
+                    analysis_factors=analysis_data
+                )
+                
+                analyses.append(analysis)
+                
+            except Exception as e:
+                # Stack trace only when debugging; formatting one per failed row is costly
+                logger.error("Error analyzing fixture %s for team %s: %s", fixture['id'], team_id, e,
+                             exc_info=logger.isEnabledFor(logging.DEBUG))
+                continue
+    
+    @staticmethod
+    def _parse_kickoff_time(kickoff_str) -> datetime:
+        """Safely parse kickoff time string"""
+        if not kickoff_str or kickoff_str == 'None':
+            return datetime.now()
+        
+        try:
+            # Handle different possible formats
+            if 'T' in str(kickoff_str):
+                # ISO format: 2024-08-17T14:00:00Z
+                return datetime.fromisoformat(str(kickoff_str).replace('Z', '+00:00'))
+            else:
+                # Try parsing as timestamp or other format
+                return datetime.now()  # Fallback to now
+        except (ValueError, TypeError) as e:
+            logger.warning("Could not parse kickoff time '%s': %s", kickoff_str, e)
+            return datetime.now()
+    
+    def analyze_fixture_runs(self, gameweeks_ahead: int = 6,
+                             top_k: Optional[int] = None) -> List[FixtureRun]:
+        """Analyze runs of fixtures for each team (memoized until fixtures are refetched)
+        
+        With top_k, only the top_k most favorable runs are returned.
+        """
         
         current_gameweek = self._get_current_gameweek()
+        cache_key = (gameweeks_ahead, current_gameweek)
+        if cache_key not in self._runs_cache:
+            self._runs_cache[cache_key] = self._compute_fixture_runs(current_gameweek, gameweeks_ahead)
+        # Runs are frozen and stored best-first; slicing copies the list so callers can reorder it freely
+        return self._runs_cache[cache_key][:top_k]
+    
+    def _compute_fixture_runs(self, current_gameweek: int, gameweeks_ahead: int) -> List[FixtureRun]:
+        """Build the fixture runs starting at current_gameweek"""
         end_gameweek = min(38, current_gameweek + gameweeks_ahead)
         
-        # Get all teams
-        teams = self.db.execute_query("SELECT id, name FROM teams")
-        fixture_runs = []
+        # Per-team run statistics aggregated by Postgres in one grouped scan,
+        # already ordered most favorable run first
+        query = """
+            SELECT t.id AS team_id, t.name AS team_name,
+                   COUNT(*) AS fixture_count,
+                   AVG(u.difficulty)::float8 AS average_difficulty,
+                   COUNT(*) FILTER (WHERE u.difficulty <= 2) AS easy_fixtures,
+                   COUNT(*) FILTER (WHERE u.difficulty >= 4) AS hard_fixtures,
+                   COUNT(*) FILTER (WHERE u.is_home) AS home_fixtures
+            FROM team_upcoming_fixtures u
+            JOIN teams t ON t.id = u.team_id
+            WHERE u.gameweek BETWEEN %s AND %s
+            GROUP BY t.id, t.name
+            ORDER BY ROUND(AVG(u.difficulty), 2), t.id
+        """
+        team_stats = self.db.execute_query(query, (current_gameweek, end_gameweek))
+        if not team_stats:
+            return []
         
-        for team in teams:
-            team_id = team['id']
-            team_name = team['name']
-            
-            # Get team's fixtures
-            query = """
-                SELECT f.*, 
-                       CASE WHEN f.team_h = %s THEN f.team_h_difficulty 
-                            ELSE f.team_a_difficulty END as difficulty
-                FROM fixtures f
-                WHERE (f.team_h = %s OR f.team_a = %s)
-                AND f.gameweek BETWEEN %s AND %s
-                AND f.finished = FALSE
-                ORDER BY f.gameweek
-            """
-            
-            fixtures = self.db.execute_query(query, (team_id, team_id, team_id, current_gameweek, end_gameweek))
-            
-            if not fixtures:
-                continue
-            
-            # Calculate run statistics
-            difficulties = [f['difficulty'] for f in fixtures]
-            avg_difficulty = np.mean(difficulties)
-            
-            easy_fixtures = sum(1 for d in difficulties if d <= 2)
-            hard_fixtures = sum(1 for d in difficulties if d >= 4)
-            home_fixtures = sum(1 for f in fixtures if f['team_h'] == team_id)
-            away_fixtures = len(fixtures) - home_fixtures
-            
-            # Determine congestion level
-            congestion = self.congestion_analyzer.calculate_fixture_congestion(
-                team_id, current_gameweek + 3, 14
-            )
-            
-            # Generate recommendation
-            recommendation = self._generate_fixture_recommendation(
-                avg_difficulty, easy_fixtures, hard_fixtures, congestion['congestion_level']
-            )
-            
-            fixture_run = FixtureRun(
-                team_id=team_id,
-                team_name=team_name,
+        # Congestion for every team (window around current_gameweek + 3) from one query too
+        congestion_gameweek = current_gameweek + 3
+        self.congestion_analyzer.prefetch(congestion_gameweek - 2, congestion_gameweek + 2)
+        try:
+            congestion_levels = [
+                self.congestion_analyzer.calculate_fixture_congestion(
+                    stats['team_id'], congestion_gameweek, 14
+                )['congestion_level']
+                for stats in team_stats
+            ]
+        finally:
+            self.congestion_analyzer.clear_prefetch()
+        
+        # Classify every team's run in one batch
+        recommendations = fixture_recommendations(
+            np.array([stats['average_difficulty'] for stats in team_stats]),
+            np.array([stats['easy_fixtures'] for stats in team_stats]),
+            np.array([stats['hard_fixtures'] for stats in team_stats]),
+            np.array([CONGESTION_LEVEL_CODES.get(level, 0) for level in congestion_levels])
+        ).tolist()
+        
+        fixture_runs = [
+            FixtureRun(
+                team_id=stats['team_id'],
+                team_name=stats['team_name'],
                 start_gameweek=current_gameweek,
                 end_gameweek=end_gameweek,
-                fixture_count=len(fixtures),
-                average_difficulty=round(avg_difficulty, 2),
-                easy_fixtures=easy_fixtures,
-                hard_fixtures=hard_fixtures,
-                home_fixtures=home_fixtures,
-                away_fixtures=away_fixtures,
-                congestion_level=congestion['congestion_level'],
+                fixture_count=stats['fixture_count'],
+                average_difficulty=round(stats['average_difficulty'], 2),
+                easy_fixtures=stats['easy_fixtures'],
+                hard_fixtures=stats['hard_fixtures'],
+                home_fixtures=stats['home_fixtures'],
+                away_fixtures=stats['fixture_count'] - stats['home_fixtures'],
+                congestion_level=congestion_level,
                 recommendation=recommendation
             )
-            
-            fixture_runs.append(fixture_run)
-        
-        # Sort by most favorable runs first
-        fixture_runs.sort(key=lambda x: x.average_difficulty)
+            for stats, congestion_level, recommendation in zip(team_stats, congestion_levels, recommendations)
+        ]
         
         return fixture_runs
     
     def get_best_fixture_teams(self, gameweeks_ahead: int = 4, min_fixtures: int = 2) -> List[Dict]:
         """Get teams with the best upcoming fixture runs"""
         
-        fixture_runs = self.analyze_fixture_runs(gameweeks_ahead)
-        
-        best_teams = []
-        for run in fixture_runs:
-            if run.fixture_count >= min_fixtures:
-                score = self._calculate_fixture_score(run)
-                
-                best_teams.append({
-                    'team_id': run.team_id,
-                    'team_name': run.team_name,
-                    'fixture_count': run.fixture_count,
-                    'average_difficulty': run.average_difficulty,
-                    'easy_fixtures': run.easy_fixtures,
-                    'hard_fixtures': run.hard_fixtures,
-                    'home_fixtures': run.home_fixtures,
-                    'congestion_level': run.congestion_level,
-                    'fixture_score': score,
-                    'recommendation': run.recommendation
-                })
-        
-        # Sort by fixture score (higher is better)
-        best_teams.sort(key=lambda x: x['fixture_score'], reverse=True)
+        fixture_runs = [
+            run for run in self.analyze_fixture_runs(gameweeks_ahead) if run.fixture_count >= min_fixtures
+        ]
+        if not fixture_runs:
+            return []
         
-        return best_teams[:10]  # Top 10 teams
+        # Score every eligible run in one batch
+        scores = fixture_scores(
+            np.array([run.average_difficulty for run in fixture_runs]),
+            np.array([run.easy_fixtures for run in fixture_runs]),
+            np.array([run.hard_fixtures for run in fixture_runs]),
+            np.array([run.home_fixtures for run in fixture_runs]),
+            np.array([CONGESTION_LEVEL_CODES.get(run.congestion_level, 0) for run in fixture_runs])
+        ).tolist()
+        
+        # Top 10 by fixture score (higher is better); nlargest keeps sorted()'s tie order
+        top = heapq.nlargest(10, zip(scores, fixture_runs), key=itemgetter(0))
+        
+        return [
+            {
+                'team_id': run.team_id,
+                'team_name': run.team_name,
+                'fixture_count': run.fixture_count,
+                'average_difficulty': run.average_difficulty,
+                'easy_fixtures': run.easy_fixtures,
+                'hard_fixtures': run.hard_fixtures,
+                'home_fixtures': run.home_fixtures,
+                'congestion_level': run.congestion_level,
+                'fixture_score': score,
+                'recommendation': run.recommendation
+            }
+            for score, run in top
+        ]
     
-    def get_transfer_timing_recommendations(self) -> List[Dict]:
-        """Get recommendations for optimal transfer timing"""
+    def get_all_team_favorabilities(self, gameweeks_ahead: int = 5) -> Dict[int, Dict]:
+        """Get fixture favorability for every team with a single query"""
         
         current_gameweek = self._get_current_gameweek()
-        recommendations = []
+        end_gameweek = min(38, current_gameweek + gameweeks_ahead)
         
-        # Look ahead for teams with improving fixtures
-        for gw_offset in range(1, 4):  # Next 3 gameweeks
-            target_gameweek = current_gameweek + gw_offset
-            
-            # Get teams with good upcoming runs starting from target gameweek
-            upcoming_runs = self.analyze_fixture_runs(6)  # 6 gameweeks ahead
-            
-            for run in upcoming_runs:
-                if run.average_difficulty <= 2.5 and run.easy_fixtures >= 2:
-                    recommendations.append({
-                        'team_name': run.team_name,
-                        'recommended_transfer_gameweek': target_gameweek,
-                        'fixture_run_start': run.start_gameweek,
-                        'average_difficulty': run.average_difficulty,
-                        'easy_fixtures': run.easy_fixtures,
-                        'reasoning': f"Easy run of {run.easy_fixtures} fixtures starting GW{run.start_gameweek}"
-                    })
-        
-        # Remove duplicates and sort by transfer gameweek
-        seen_teams = set()
-        unique_recommendations = []
-        
-        for rec in recommendations:
-            if rec['team_name'] not in seen_teams:
-                unique_recommendations.append(rec)
-                seen_teams.add(rec['team_name'])
-        
-        unique_recommendations.sort(key=lambda x: x['recommended_transfer_gameweek'])
-        
-        return unique_recommendations[:15]  # Top 15 recommendations
-    
-    def _get_current_gameweek(self) -> int:
-        """Get current gameweek from fixtures"""
+        # One row per (team, fixture) covering both home and away sides
         query = """
-            SELECT MIN(gameweek) as current_gw 
-            FROM fixtures 
-            WHERE finished = FALSE
+            SELECT team_id, difficulty, gameweek
+            FROM team_upcoming_fixtures
+            WHERE gameweek BETWEEN %s AND %s
+            ORDER BY gameweek
         """
-        result = self.db.execute_query(query)
-        return result[0]['current_gw'] if result and result[0]['current_gw'] else 1
-    
-    def _get_team_name(self, team_id: int) -> str:
-        """Get team name from ID"""
-        query = "SELECT name FROM teams WHERE id = %s"
-        result = self.db.execute_query(query, (team_id,))
-        return result[0]['name'] if result else f"Team {team_id}"
-    
-    def _generate_fixture_recommendation(self, avg_difficulty: float, easy_fixtures: int, 
-                                       hard_fixtures: int, congestion_level: str) -> str:
-        """Generate fixture run recommendation"""
-        
-        if avg_difficulty <= 2.0 and easy_fixtures >= 3:
-            return "EXCELLENT - Strong target for transfers"
-        elif avg_difficulty <= 2.5 and easy_fixtures >= 2:
-            return "GOOD - Consider for transfers"
-        elif avg_difficulty >= 4.0 or hard_fixtures >= 3:
-            return "AVOID - Difficult fixture run"
-        elif congestion_level == 'high':
-            return "CAUTION - High fixture congestion"
-        else:
-            return "NEUTRAL - Average fixture difficulty"
-    
-    def _calculate_fixture_score(self, run: FixtureRun) -> float:
-        """Calculate fixture score (higher is better)"""
         
-        # Base score from difficulty (invert so lower difficulty = higher score)
-        base_score = (6 - run.average_difficulty) * 20  # 20-100 range
+        rows = self.db.execute_query(query, (current_gameweek, end_gameweek))
         
-        # Bonus for easy fixtures
-        easy_bonus = run.easy_fixtures * 10
+        difficulties_by_team = {}
+        for row in rows:
+            difficulties_by_team.setdefault(row['team_id'], []).append(row['difficulty'])
         
-        # Penalty for hard fixtures
-        hard_penalty = run.hard_fixtures * 15
+        return {
+            team_id: _summarize_favorability(team_id, difficulties)
+            for team_id, difficulties in difficulties_by_team.items()
+        }
+    
+    def get_transfer_timing_recommendations(self) -> List[Dict]:
+        """Get recommendations for optimal transfer timing"""
         
-        # Home advantage bonus
-        home_bonus = run.home_fixtures * 5
+        current_gameweek = self._get_current_gameweek()
         
-        # Congestion penalty
-        congestion_penalty = 0
-        if run.congestion_level == 'high':
-            congestion_penalty = 25
-        elif run.congestion_level == 'medium':
-            congestion_penalty = 15
+        # Teams with good upcoming runs (6 gameweeks ahead), best first
+        upcoming_runs = self.analyze_fixture_runs(6)
         
-        final_score = base_score + easy_bonus - hard_penalty + home_bonus - congestion_penalty
+        # The criterion doesn't depend on the look-ahead offset (1-3 gameweeks),
+        # so the earliest offset always qualifies first
+        target_gameweek = current_gameweek + 1
         
-        return max(0, min(100, final_score))
+        # One recommendation per team, built in a single pass
+        recommendations = {}
+        for run in upcoming_runs:
+            if run.average_difficulty <= 2.5 and run.easy_fixtures >= 2 and run.team_name not in recommendations:
+                recommendations[run.team_name] = {
+                    'team_name': run.team_name,
+                    'recommended_transfer_gameweek': target_gameweek,
+                    'fixture_run_start': run.start_gameweek,
+                    'average_difficulty': run.average_difficulty,
+                    'easy_fixtures': run.easy_fixtures,
+                    'reasoning': f"Easy run of {run.easy_fixtures} fixtures starting GW{run.start_gameweek}"
+                }
+                if len(recommendations) == 15:  # Top 15 recommendations
+                    break
+        
+        return list(recommendations.values())
+    
+    def _get_current_gameweek(self) -> int:
+        """Get current gameweek from fixtures (memoized briefly, and until fixtures are refetched)"""
+        now = time.monotonic()
+        if self._current_gameweek is None or now - self._current_gameweek[0] > CURRENT_GAMEWEEK_TTL:
+            query = """
+                SELECT COALESCE(MIN(gameweek), 1)
+                FROM fixtures 
+                WHERE finished = FALSE
+            """
+            gameweek = self.db.execute_scalar(query)
+            self._current_gameweek = (now, gameweek)
+        return self._current_gameweek[1]
     
     def fetch_and_store_fixtures(self):
         """Fetch and store fixture data"""
         logger.info("Fetching fixture data...")
-        fixtures = self.api.get_fixtures()
+        if AIOHTTP_AVAILABLE:
+            fixtures = asyncio.run(self._fetch_fixtures_async())
+            self.api.index_results(fixtures)
+        else:
+            fixtures = self.api.get_fixtures()
         
         logger.info(f"Retrieved {len(fixtures)} fixtures from API")
         
@@ -940,20 +1168,21 @@ class FixtureAgent:
         if fixtures:
             logger.info(f"Sample fixture keys: {list(fixtures[0].keys())}")
         
+        query = """
+            INSERT INTO fixtures (id, gameweek, team_h, team_a, team_h_difficulty,
+                                team_a_difficulty, kickoff_time, finished,
+                                team_h_score, team_a_score, season)
+            VALUES %s
+            ON CONFLICT (id) DO UPDATE SET
+                gameweek = EXCLUDED.gameweek,
+                team_h_score = EXCLUDED.team_h_score,
+                team_a_score = EXCLUDED.team_a_score,
+                finished = EXCLUDED.finished
+        """
+        rows = []
         for fixture in fixtures:
             try:
-                query = """
-                    INSERT INTO fixtures (id, gameweek, team_h, team_a, team_h_difficulty,
-                                        team_a_difficulty, kickoff_time, finished,
-                                        team_h_score, team_a_score, season)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                    ON CONFLICT (id) DO UPDATE SET
-                        gameweek = EXCLUDED.gameweek,
-                        team_h_score = EXCLUDED.team_h_score,
-                        team_a_score = EXCLUDED.team_a_score,
-                        finished = EXCLUDED.finished
-                """
-                params = (
+                rows.append((
                     fixture['id'], 
                     fixture.get('event') or fixture.get('gameweek', 1),  # Handle both field names
                     fixture['team_h'], fixture['team_a'],
@@ -961,50 +1190,100 @@ class FixtureAgent:
                     fixture['kickoff_time'], fixture['finished'],
                     fixture['team_h_score'], fixture['team_a_score'],
                     self.current_season
-                )
-                self.db.execute_insert(query, params)
-                
+                ))
             except Exception as e:
-                logger.error(f"Error storing fixture {fixture.get('id', 'unknown')}: {e}")
+                logger.error("Error storing fixture %s: %s", fixture.get('id', 'unknown'), e)
                 continue
         
+        # Multi-row VALUES upserts (500 fixtures per statement) and one commit
+        self.db.execute_bulk([(query, rows, None)])
+        self._current_gameweek = None  # Finished flags may have moved on
+        self._runs_cache.clear()
+        self._analyses_cache = None
+        self.refresh_upcoming_view()
+        
         logger.info(f"Stored {len(fixtures)} fixtures")
     
+    async def _fetch_fixtures_async(self) -> List[Dict]:
+        """Fetch fixtures through the async wrapper (token-bucket limited, no blocking sleep)"""
+        async with AsyncFixtureAPIWrapper() as api:
+            return await api.get_fixtures()
+    
+    def refresh_upcoming_view(self):
+        """Refresh the team_upcoming_fixtures materialized view"""
+        self.db.execute_insert("REFRESH MATERIALIZED VIEW CONCURRENTLY team_upcoming_fixtures")
+        logger.info("Refreshed team upcoming fixtures view")
+    
     def store_fixture_analysis(self, analyses: List[FixtureAnalysis]):
         """Store fixture analysis results"""
-        
-        # Clear old analysis for current season
-        delete_query = "DELETE FROM fixture_analysis WHERE season = %s"
-        self.db.execute_insert(delete_query, (self.current_season,))
-        
+        with self.db.transaction() as cursor:
+            self._write_fixture_analysis(cursor, analyses)
+    
+    def store_fixture_runs(self, fixture_runs: List[FixtureRun]):
+        """Store fixture run analysis"""
+        with self.db.transaction() as cursor:
+            self._write_fixture_runs(cursor, fixture_runs)
+    
+    def _write_fixture_analysis(self, cursor, analyses: List[FixtureAnalysis]):
+        """Replace the season's fixture_analysis rows on cursor (multi-row VALUES inserts)"""
+        query = """
+            INSERT INTO fixture_analysis (
+                fixture_id, team_id, opponent_id, gameweek, is_home,
+                base_difficulty, advanced_difficulty, form_adjusted_difficulty,
+                favorability_score, confidence, congestion_level,
+                congestion_score, season
+            )
+            VALUES %s
+        """
+        rows = []
         for analysis in analyses:
             try:
-                query = """
-                    INSERT INTO fixture_analysis (
-                        fixture_id, team_id, opponent_id, gameweek, is_home,
-                        base_difficulty, advanced_difficulty, form_adjusted_difficulty,
-                        favorability_score, confidence, congestion_level,
-                        congestion_score, season
-                    )
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                """
-                params = (
+                rows.append((
                     analysis.fixture_id, analysis.team_id, analysis.opponent_id,
                     analysis.gameweek, analysis.is_home, analysis.fpl_difficulty,
                     analysis.advanced_difficulty, analysis.form_adjusted_difficulty,
                     analysis.favorability_score, analysis.confidence,
                     analysis.analysis_factors['congestion']['congestion_level'],
                     analysis.congestion_impact, self.current_season
-                )
-                self.db.execute_insert(query, params)
-                
+                ))
             except Exception as e:
-                logger.error(f"Error storing analysis for fixture {analysis.fixture_id}: {e}")
+                logger.error("Error storing analysis for fixture %s: %s", analysis.fixture_id, e)
                 continue
+        
+        # Delete and insert in the caller's transaction: readers never see an empty table
+        cursor.execute("DELETE FROM fixture_analysis WHERE season = %s", (self.current_season,))
+        if rows:
+            execute_values(cursor, query, rows, page_size=500)
+    
+    def _write_fixture_runs(self, cursor, fixture_runs: List[FixtureRun]):
+        """Replace the season's fixture_runs rows on cursor"""
+        query = """
+            INSERT INTO fixture_runs (
+                team_id, start_gameweek, end_gameweek, fixture_count,
+                average_difficulty, easy_fixtures, hard_fixtures,
+                congestion_level, recommendation, season
+            )
+            VALUES %s
+        """
+        rows = [
+            (
+                run.team_id, run.start_gameweek, run.end_gameweek, run.fixture_count,
+                run.average_difficulty, run.easy_fixtures, run.hard_fixtures,
+                run.congestion_level, run.recommendation, self.current_season
+            )
+            for run in fixture_runs
+        ]
+        
+        cursor.execute("DELETE FROM fixture_runs WHERE season = %s", (self.current_season,))
+        if rows:
+            execute_values(cursor, query, rows, page_size=500)
     
     def daily_update(self):
         """Perform daily fixture analysis update"""
         logger.info("Starting fixture agent daily update...")
+        self._current_gameweek = None
+        self._runs_cache.clear()
+        self._analyses_cache = None
         
         try:
             # 1. Fetch latest fixture data
@@ -1012,11 +1291,15 @@ class FixtureAgent:
             
             # 2. Analyze upcoming fixtures
             analyses = self.analyze_upcoming_fixtures(8)
-            self.store_fixture_analysis(analyses)
             
             # 3. Generate fixture run analysis
             fixture_runs = self.analyze_fixture_runs(6)
             
+            # 4. Store both in one transaction (single commit)
+            with self.db.transaction() as cursor:
+                self._write_fixture_analysis(cursor, analyses)
+                self._write_fixture_runs(cursor, fixture_runs)
+            
             logger.info(f"Analyzed {len(analyses)} fixtures and {len(fixture_runs)} fixture runs")
             logger.info("Fixture agent daily update completed successfully")
             
@@ -1026,6 +1309,8 @@ class FixtureAgent:
     
     def export_fixture_analysis_to_json(self, filename: str = None):
         """Export fixture analysis to JSON"""
+        from agents.data_buff import write_json_file
+        
         if not filename:
             filename = f"data/exports/fixture_analysis_{datetime.now().strftime('%Y%m%d')}.json"
         
@@ -1085,8 +1370,7 @@ class FixtureAgent:
                     'congestion_impact': analysis.congestion_impact
                 })
             
-            with open(filename, 'w') as f:
-                json.dump(json_data, f, indent=2)
+            write_json_file(filename, json_data)
             
             logger.info(f"Fixture analysis exported to {filename}")
             return filename
@@ -1106,21 +1390,22 @@ def get_team_fixture_favorability(fixture_agent: FixtureAgent, team_id: int,
     
     # Get team's upcoming fixtures
     query = """
-        SELECT f.*,
-               CASE WHEN f.team_h = %s THEN f.team_h_difficulty 
-                    ELSE f.team_a_difficulty END as difficulty
-        FROM fixtures f
-        WHERE (f.team_h = %s OR f.team_a = %s)
-        AND f.gameweek BETWEEN %s AND %s
-        AND f.finished = FALSE
-        ORDER BY f.gameweek
+        SELECT difficulty
+        FROM team_upcoming_fixtures
+        WHERE team_id = %s
+        AND gameweek BETWEEN %s AND %s
+        ORDER BY gameweek
     """
     
-    fixtures = fixture_agent.db.execute_query(
-        query, (team_id, team_id, team_id, current_gameweek, end_gameweek)
-    )
+    fixtures = fixture_agent.db.execute_query(query, (team_id, current_gameweek, end_gameweek))
     
-    if not fixtures:
+    return _summarize_favorability(team_id, [f['difficulty'] for f in fixtures])
+
+
+def _summarize_favorability(team_id: int, difficulties: List[int]) -> Dict:
+    """Summarize a team's upcoming fixture difficulties into a favorability dict"""
+    
+    if not difficulties:
         return {
             'team_id': team_id,
             'fixture_count': 0,
@@ -1130,8 +1415,7 @@ def get_team_fixture_favorability(fixture_agent: FixtureAgent, team_id: int,
         }
     
     # Calculate averages
-    difficulties = [f['difficulty'] for f in fixtures]
-    avg_difficulty = np.mean(difficulties)
+    avg_difficulty = sum(difficulties) / len(difficulties)
     
     # Simple favorability score
     favorability_score = (6 - avg_difficulty) * 20  # 20-100 scale
@@ -1148,7 +1432,7 @@ def get_team_fixture_favorability(fixture_agent: FixtureAgent, team_id: int,
     
     return {
         'team_id': team_id,
-        'fixture_count': len(fixtures),
+        'fixture_count': len(difficulties),
         'average_difficulty': round(avg_difficulty, 2),
         'favorability_score': round(favorability_score, 1),
         'easy_fixtures': sum(1 for d in difficulties if d <= 2),
@@ -1162,12 +1446,6 @@ def test_fixture_agent():
     """Test the fixture agent functionality"""
     print("🧪 Testing FANTASYPL Fixture Agent...")
     
-    # Add src to path for imports
-    import sys
-    import os
-    sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
-    
-    # Import after adding path
     from agents.data_buff import DatabaseManager, CacheManager
     from config.settings import DATABASE_CONFIG
     
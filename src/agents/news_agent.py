@@ -5,18 +5,19 @@ Simplified and optimized for integration with existing agents
 """
 
 import requests
-from bs4 import BeautifulSoup
-import psycopg2
+from lxml import etree
 from psycopg2.extras import RealDictCursor
-import json
+from psycopg2.pool import ThreadedConnectionPool
 import re
+import csv
+import io
 from datetime import datetime, timedelta
 from typing import List, Dict, Tuple, Optional
 import time
 from dataclasses import dataclass
 from enum import Enum
 import logging
-from fuzzywuzzy import fuzz
+import atexit
 import hashlib
 
 # Sentiment analysis imports (optional)
@@ -46,7 +47,7 @@ class ManagerSentiment(Enum):
     NEGATIVE = "negative"
     VERY_NEGATIVE = "very_negative"
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class PlayerNews:
     """Player news/injury data"""
     player_name: str
@@ -60,6 +61,75 @@ class PlayerNews:
     manager_sentiment: Optional[ManagerSentiment] = None
     play_probability: float = 50.0
 
+# Writable player_news columns (id, created_at and news_hash are filled in by the DB/agent)
+PLAYER_NEWS_COLUMNS = (
+    'player_name', 'team', 'status', 'injury_type', 'expected_return',
+    'play_probability', 'manager_sentiment', 'source', 'confidence_score',
+    'last_updated'
+)
+
+# Columns returned by each news report (subsets of the recent-news query)
+EXCLUDED_PLAYER_FIELDS = (
+    'player_name', 'team', 'status', 'injury_type', 'expected_return',
+    'play_probability', 'manager_sentiment'
+)
+FAVORED_PLAYER_FIELDS = (
+    'player_name', 'team', 'status', 'play_probability', 'manager_sentiment',
+    'confidence_score'
+)
+INJURY_REPORT_FIELDS = (
+    'player_name', 'team', 'status', 'injury_type', 'expected_return',
+    'play_probability', 'last_updated'
+)
+
+# Scraped team name -> FPL team name, for every club in recent Premier League seasons
+TEAM_MAPPINGS = {
+    'Arsenal': 'Arsenal',
+    'Aston Villa': 'Aston Villa',
+    'AFC Bournemouth': 'Bournemouth',
+    'Bournemouth': 'Bournemouth',
+    'Brentford': 'Brentford',
+    'Brighton & Hove Albion': 'Brighton',
+    'Brighton and Hove Albion': 'Brighton',
+    'Burnley': 'Burnley',
+    'Chelsea': 'Chelsea',
+    'Crystal Palace': 'Crystal Palace',
+    'Everton': 'Everton',
+    'Fulham': 'Fulham',
+    'Ipswich Town': 'Ipswich',
+    'Leeds United': 'Leeds',
+    'Leicester City': 'Leicester',
+    'Liverpool': 'Liverpool',
+    'Luton Town': 'Luton',
+    'Manchester City': 'Man City',
+    'Manchester United': 'Man Utd',
+    'Man United': 'Man Utd',
+    'Newcastle United': 'Newcastle',
+    'Norwich City': 'Norwich',
+    'Nottingham Forest': "Nott'm Forest",
+    'Sheffield United': 'Sheffield Utd',
+    'Southampton': 'Southampton',
+    'Sunderland': 'Sunderland',
+    'Tottenham Hotspur': 'Spurs',
+    'Tottenham': 'Spurs',
+    'Watford': 'Watford',
+    'West Bromwich Albion': 'West Brom',
+    'West Ham United': 'West Ham',
+    'Wolverhampton Wanderers': 'Wolves'
+}
+# Lowercased full and FPL names -> FPL name; anything else is not guessed at
+TEAM_NAME_LOOKUP = {name.lower(): short for name, short in TEAM_MAPPINGS.items()}
+TEAM_NAME_LOOKUP.update({short.lower(): short for short in TEAM_MAPPINGS.values()})
+
+# Injury table selectors, compiled once and evaluated in libxml2
+INJURY_ROWS_XPATH = etree.XPath("//table//tr[td]")
+INJURY_CELL_TEXT_XPATH = etree.XPath("normalize-space(.)", smart_strings=False)
+
+# Cached news reports, keyed by (min_probability, min_sentiment); dropped whenever player_news is written
+NEWS_CACHE_KEY = "fpl:news:reports:{}:{}:v1"
+NEWS_CACHE_PATTERN = "fpl:news:*"
+NEWS_CACHE_TTL = 3600  # seconds
+
 # ============= Simplified News Agent =============
 
 class NewsAgent:
@@ -67,10 +137,15 @@ class NewsAgent:
     Simplified News Agent for FANTASYPL system integration
     """
     
-    def __init__(self, db_config: dict, redis_config: dict = None):
+    def __init__(self, db_config: dict, redis_config: dict = None, redis_client=None):
         """Initialize the News Agent"""
+        from agents.data_buff import CacheManager
+        
         self.db_config = db_config
         self.redis_config = redis_config
+        self.cache = CacheManager(redis_config or {}, redis_client)
+        self.pool = None  # Connection pool, opened on first use
+        self._status_cache = {}  # (player, team) -> latest news row, see get_player_status
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
@@ -88,33 +163,23 @@ class NewsAgent:
         self.logger = logging.getLogger('NewsAgent')
         
         # Team name mappings
-        self.team_mappings = {
-            'Manchester United': 'Man Utd',
-            'Manchester City': 'Man City',
-            'Tottenham Hotspur': 'Spurs',
-            'Tottenham': 'Spurs',
-            'Newcastle United': 'Newcastle',
-            'Nottingham Forest': "Nott'm Forest",
-            'Wolverhampton Wanderers': 'Wolves',
-            'Brighton & Hove Albion': 'Brighton',
-            'Leicester City': 'Leicester',
-            'West Ham United': 'West Ham'
-        }
-        
-        # Injury keywords
-        self.injury_keywords = {
-            InjuryStatus.OUT: ['out', 'ruled out', 'sidelined', 'unavailable'],
-            InjuryStatus.DOUBTFUL: ['doubt', 'doubtful', 'major doubt', 'unlikely'],
-            InjuryStatus.QUESTIONABLE: ['questionable', 'uncertain', '50-50'],
-            InjuryStatus.PROBABLE: ['probable', 'likely', 'expected to play'],
-            InjuryStatus.FIT: ['fit', 'available', 'returned to training'],
-            InjuryStatus.SUSPENDED: ['suspended', 'ban', 'banned', 'red card']
-        }
+        self.team_mappings = TEAM_MAPPINGS
+
+    def _get_conn(self):
+        """Borrow a pooled database connection (return it with _put_conn)"""
+        if self.pool is None:
+            self.pool = ThreadedConnectionPool(1, 8, **self.db_config)
+            atexit.register(self.pool.closeall)
+        return self.pool.getconn()
+
+    def _put_conn(self, conn):
+        """Return a borrowed connection; the pool rolls back anything left uncommitted"""
+        self.pool.putconn(conn, close=bool(conn.closed))
 
     def initialize(self):
         """Initialize database tables"""
         try:
-            conn = psycopg2.connect(**self.db_config)
+            conn = self._get_conn()
             cur = conn.cursor()
             
             # Simplified player news table
@@ -139,6 +204,13 @@ class NewsAgent:
             # Create indexes
             cur.execute("CREATE INDEX IF NOT EXISTS idx_player_news_name ON player_news(player_name)")
             cur.execute("CREATE INDEX IF NOT EXISTS idx_player_news_status ON player_news(status)")
+            # Range delete in _cleanup_old_data
+            cur.execute("CREATE INDEX IF NOT EXISTS idx_player_news_last_updated ON player_news(last_updated)")
+            # Latest row per (player, team) for the DISTINCT ON reports, read in index order
+            cur.execute("""
+                CREATE INDEX IF NOT EXISTS idx_player_news_latest
+                ON player_news(player_name, team, last_updated DESC)
+            """)
             
             conn.commit()
             self.logger.info("News Agent database tables initialized")
@@ -147,7 +219,7 @@ class NewsAgent:
             self.logger.error(f"Error initializing database: {e}")
         finally:
             cur.close()
-            conn.close()
+            self._put_conn(conn)
 
     def daily_update(self):
         """Daily update - simplified for integration"""
@@ -158,8 +230,7 @@ class NewsAgent:
             injuries = self._scrape_basic_injuries()
             
             # Save to database
-            for injury in injuries:
-                self._save_player_news(injury)
+            self.save_player_news_bulk(injuries)
             
             # Clean old data
             self._cleanup_old_data()
@@ -182,7 +253,12 @@ class NewsAgent:
             response = self.session.get(url, timeout=10)
             
             if response.status_code == 200:
-                soup = BeautifulSoup(response.content, 'html.parser')
+                tree = etree.HTML(response.content)
+                # Cell text per injury table row, extracted by libxml2
+                rows = [
+                    [INJURY_CELL_TEXT_XPATH(cell) for cell in row.iterfind('td')]
+                    for row in INJURY_ROWS_XPATH(tree)
+                ]
                 # Parse injuries (simplified)
                 # This would need actual parsing logic based on the site structure
                 pass
@@ -192,193 +268,262 @@ class NewsAgent:
         
         return injuries
 
-    def get_excluded_players(self, min_probability: float = 0.3) -> List[Dict]:
-        """Get players to exclude from selection"""
-        conn = psycopg2.connect(**self.db_config)
+    def _recent_news(self) -> Optional[List[Dict]]:
+        """All player news from the last 7 days, newest first within each (player, team)"""
+        conn = self._get_conn()
         cur = conn.cursor(cursor_factory=RealDictCursor)
         
         try:
             cur.execute("""
-                SELECT DISTINCT ON (player_name, team)
+                SELECT
                     player_name,
                     team,
                     status,
                     injury_type,
                     expected_return,
                     play_probability,
-                    manager_sentiment
+                    manager_sentiment,
+                    confidence_score,
+                    last_updated
                 FROM player_news
-                WHERE play_probability < %s
-                    AND last_updated > NOW() - INTERVAL '7 days'
+                WHERE last_updated > NOW() - INTERVAL '7 days'
                 ORDER BY player_name, team, last_updated DESC
-            """, (min_probability,))
+            """)
             
             return cur.fetchall()
             
         except Exception as e:
-            self.logger.error(f"Error getting excluded players: {e}")
-            return []
+            self.logger.error(f"Error getting recent player news: {e}")
+            return None
         finally:
             cur.close()
-            conn.close()
+            self._put_conn(conn)
+
+    @staticmethod
+    def _latest_per_player(rows: List[Dict], fields: Tuple[str, ...], predicate=None) -> List[Dict]:
+        """Newest matching row per (player, team), like SELECT DISTINCT ON over the filtered rows"""
+        latest = {}
+        for row in rows:
+            key = (row['player_name'], row['team'])
+            if key not in latest and (predicate is None or predicate(row)):
+                latest[key] = {field: row[field] for field in fields}
+        return list(latest.values())
+
+    def _excluded_players(self, rows: List[Dict], min_probability: float) -> List[Dict]:
+        """Players whose latest news puts their play probability below min_probability"""
+        return self._latest_per_player(
+            rows, EXCLUDED_PLAYER_FIELDS,
+            lambda row: row['play_probability'] is not None and row['play_probability'] < min_probability
+        )
+
+    def _favored_players(self, rows: List[Dict], min_sentiment: float) -> List[Dict]:
+        """Players with positive manager sentiment and play probability of at least min_sentiment"""
+        return self._latest_per_player(
+            rows, FAVORED_PLAYER_FIELDS,
+            lambda row: (row['play_probability'] is not None
+                         and row['play_probability'] >= min_sentiment
+                         and row['manager_sentiment'] in ('positive', 'very_positive'))
+        )
+
+    def _injury_report(self, rows: List[Dict]) -> Dict:
+        """Latest news per player, categorized by status"""
+        report = {
+            'out': [],
+            'doubtful': [],
+            'questionable': [],
+            'probable': [],
+            'suspended': [],
+            'last_updated': datetime.now().isoformat()
+        }
+        
+        for news in self._latest_per_player(rows, INJURY_REPORT_FIELDS):
+            status = news['status']
+            if status in report:
+                report[status].append({
+                    'name': news['player_name'],
+                    'team': news['team'],
+                    'injury': news['injury_type'],
+                    'return': news['expected_return'],
+                    'probability': news['play_probability']
+                })
+        
+        return report
+
+    @staticmethod
+    def _normalize_team(name: str) -> str:
+        """FPL team name for a scraped team name; names outside TEAM_MAPPINGS are returned unchanged"""
+        return TEAM_NAME_LOOKUP.get(name.strip().lower(), name)
+
+    def get_excluded_players(self, min_probability: float = 0.3) -> List[Dict]:
+        """Get players to exclude from selection"""
+        return self.get_news_reports(min_probability=min_probability)['excluded_players']
 
     def get_favored_players(self, min_sentiment: float = 0.7) -> List[Dict]:
         """Get players with positive manager sentiment"""
-        conn = psycopg2.connect(**self.db_config)
-        cur = conn.cursor(cursor_factory=RealDictCursor)
-        
-        try:
-            cur.execute("""
-                SELECT DISTINCT ON (player_name, team)
-                    player_name,
-                    team,
-                    status,
-                    play_probability,
-                    manager_sentiment,
-                    confidence_score
-                FROM player_news
-                WHERE play_probability >= %s
-                    AND last_updated > NOW() - INTERVAL '7 days'
-                    AND (manager_sentiment = 'positive' OR manager_sentiment = 'very_positive')
-                ORDER BY player_name, team, last_updated DESC
-            """, (min_sentiment,))
-            
-            return cur.fetchall()
-            
-        except Exception as e:
-            self.logger.error(f"Error getting favored players: {e}")
-            return []
-        finally:
-            cur.close()
-            conn.close()
+        return self.get_news_reports(min_sentiment=min_sentiment)['favored_players']
 
     def get_injury_report(self) -> Dict:
         """Get comprehensive injury report for integration"""
-        conn = psycopg2.connect(**self.db_config)
-        cur = conn.cursor(cursor_factory=RealDictCursor)
+        return self.get_news_reports()['injury_report']
+
+    def get_news_reports(self, min_probability: float = 0.3, min_sentiment: float = 0.7) -> Dict:
+        """Injury report, excluded and favored players built from a single query (cached in Redis)"""
+        from agents.data_buff import loads_json, encode_cache_payload
         
-        try:
-            # Get all recent injury news
-            cur.execute("""
-                SELECT DISTINCT ON (player_name, team)
-                    player_name,
-                    team,
-                    status,
-                    injury_type,
-                    expected_return,
-                    play_probability,
-                    last_updated
-                FROM player_news
-                WHERE last_updated > NOW() - INTERVAL '7 days'
-                ORDER BY player_name, team, last_updated DESC
-            """)
-            
-            all_news = cur.fetchall()
-            
-            # Categorize by status
-            report = {
-                'out': [],
-                'doubtful': [],
-                'questionable': [],
-                'probable': [],
-                'suspended': [],
-                'last_updated': datetime.now().isoformat()
-            }
-            
-            for news in all_news:
-                status = news['status']
-                if status in report:
-                    report[status].append({
-                        'name': news['player_name'],
-                        'team': news['team'],
-                        'injury': news['injury_type'],
-                        'return': news['expected_return'],
-                        'probability': news['play_probability']
-                    })
-            
-            return report
-            
-        except Exception as e:
-            self.logger.error(f"Error getting injury report: {e}")
-            return {}
-        finally:
-            cur.close()
-            conn.close()
+        cache_key = NEWS_CACHE_KEY.format(min_probability, min_sentiment)
+        payload = self.cache.get(cache_key)
+        if payload:
+            return loads_json(payload)
+        
+        rows = self._recent_news()
+        if rows is None:
+            return {'injury_report': {}, 'excluded_players': [], 'favored_players': []}
+        reports = {
+            'injury_report': self._injury_report(rows),
+            'excluded_players': self._excluded_players(rows, min_probability),
+            'favored_players': self._favored_players(rows, min_sentiment)
+        }
+        self.cache.set(cache_key, encode_cache_payload(reports), expire=NEWS_CACHE_TTL)
+        return reports
+
+    def invalidate_cache(self):
+        """Drop cached news reports and player statuses (after player_news changes)"""
+        self.cache.delete_pattern(NEWS_CACHE_PATTERN)
+        self._status_cache.clear()
+
+    def _news_hash(self, news: PlayerNews) -> str:
+        """Create unique hash for a news item"""
+        return self._news_hash_values(news.player_name, news.team, news.status.value, news.injury_type)
 
-    def _save_player_news(self, news: PlayerNews):
-        """Save player news to database"""
-        conn = psycopg2.connect(**self.db_config)
+    def _news_hash_values(self, player_name: str, team: str, status: str,
+                          injury_type: Optional[str]) -> str:
+        """Create unique hash from raw column values (same digest as _news_hash)"""
+        news_text = f"{player_name}{team}{InjuryStatus(status)}{injury_type}"
+        # Dedupe key only (not security-sensitive): 128-bit BLAKE2b is cheaper than SHA-256
+        return hashlib.blake2b(news_text.encode(), digest_size=16).hexdigest()
+
+    def save_player_news_bulk(self, news_items: List[PlayerNews]):
+        """Save many player news items with one COPY and one commit"""
+        rows = [
+            (news.player_name, news.team, news.status.value,
+             news.injury_type, news.expected_return, news.play_probability,
+             news.manager_sentiment.value if news.manager_sentiment else None,
+             news.source, news.confidence_score, news.last_updated)
+            for news in news_items
+        ]
+        self.save_player_news_rows(PLAYER_NEWS_COLUMNS, rows)
+
+    def save_player_news_rows(self, columns: Tuple[str, ...], rows: List[Tuple]):
+        """Save raw player_news rows (status/sentiment as enum values) without building PlayerNews objects"""
+        if not rows:
+            return
+        
+        unknown = set(columns) - set(PLAYER_NEWS_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown player_news columns: {sorted(unknown)}")
+        
+        # Stamp rows that don't carry their own update time
+        if 'last_updated' not in columns:
+            now = datetime.now()
+            columns = tuple(columns) + ('last_updated',)
+            rows = [tuple(row) + (now,) for row in rows]
+        
+        name_idx, team_idx = columns.index('player_name'), columns.index('team')
+        status_idx, injury_idx = columns.index('status'), columns.index('injury_type')
+        
+        # ON CONFLICT can't touch the same row twice in one statement, so keep the latest per hash
+        unique_rows = {}
+        for row in rows:
+            news_hash = self._news_hash_values(
+                row[name_idx], row[team_idx], row[status_idx], row[injury_idx]
+            )
+            unique_rows[news_hash] = tuple(row) + (news_hash,)
+        
+        column_list = f"{', '.join(columns)}, news_hash"
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(unique_rows.values())
+        buffer.seek(0)
+        
+        conn = self._get_conn()
         cur = conn.cursor()
         
         try:
-            # Create unique hash
-            news_text = f"{news.player_name}{news.team}{news.status}{news.injury_type}"
-            news_hash = hashlib.sha256(news_text.encode()).hexdigest()
-            
-            cur.execute("""
-                INSERT INTO player_news 
-                (player_name, team, status, injury_type, expected_return,
-                 play_probability, manager_sentiment, source, confidence_score, 
-                 last_updated, news_hash)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+            # News is re-scraped daily, so don't wait for this commit's WAL flush
+            cur.execute("SET LOCAL synchronous_commit TO OFF")
+            # COPY everything into a staging table (temp, so never WAL-logged), then upsert it in one statement
+            cur.execute(f"""
+                CREATE TEMP TABLE player_news_stage ON COMMIT DROP AS
+                SELECT {column_list} FROM player_news WITH NO DATA
+            """)
+            cur.copy_expert(f"COPY player_news_stage ({column_list}) FROM STDIN WITH CSV", buffer)
+            cur.execute(f"""
+                INSERT INTO player_news ({column_list})
+                SELECT {column_list} FROM player_news_stage
                 ON CONFLICT (news_hash) DO UPDATE
                 SET status = EXCLUDED.status,
                     play_probability = EXCLUDED.play_probability,
                     last_updated = EXCLUDED.last_updated
-            """, (
-                news.player_name, news.team, news.status.value,
-                news.injury_type, news.expected_return, news.play_probability,
-                news.manager_sentiment.value if news.manager_sentiment else None,
-                news.source, news.confidence_score, news.last_updated, news_hash
-            ))
+            """)
             
             conn.commit()
+            self.invalidate_cache()
             
         except Exception as e:
-            self.logger.error(f"Error saving player news: {e}")
+            self.logger.error(f"Error bulk saving player news: {e}")
             conn.rollback()
         finally:
             cur.close()
-            conn.close()
+            self._put_conn(conn)
 
     def _cleanup_old_data(self, days: int = 30):
         """Remove old news data"""
-        conn = psycopg2.connect(**self.db_config)
+        conn = self._get_conn()
         cur = conn.cursor()
         
         try:
             cur.execute("""
                 DELETE FROM player_news 
-                WHERE last_updated < NOW() - INTERVAL '%s days'
+                WHERE last_updated < NOW() - make_interval(days => %s)
             """, (days,))
             
             conn.commit()
+            self.invalidate_cache()
             
         except Exception as e:
             self.logger.error(f"Error cleaning up old data: {e}")
             conn.rollback()
         finally:
             cur.close()
-            conn.close()
+            self._put_conn(conn)
 
     def export_news_analysis_to_json(self, filepath: str = "data/exports/news_analysis.json"):
         """Export news analysis to JSON for integration"""
         analysis = {
             'generated_at': datetime.now().isoformat(),
-            'injury_report': self.get_injury_report(),
-            'excluded_players': self.get_excluded_players(),
-            'favored_players': self.get_favored_players()
+            **self.get_news_reports()
         }
         
-        with open(filepath, 'w') as f:
-            json.dump(analysis, f, indent=2, default=str)
+        from agents.data_buff import write_json_file
+        write_json_file(filepath, analysis, default=str)
         
         self.logger.info(f"News analysis exported to {filepath}")
         return analysis
 
     def get_player_status(self, player_name: str, team: str = None) -> Dict:
-        """Get specific player's injury/news status"""
-        conn = psycopg2.connect(**self.db_config)
+        """Get specific player's injury/news status (memoized until player_news changes)"""
+        key = (player_name.lower(), team.lower() if team else None)
+        status = self._status_cache.get(key)
+        if status is None:
+            status = self._query_player_status(player_name, team)
+            if status is None:
+                return {}
+            self._status_cache[key] = status
+        # Copy so callers can't alter the memoized row
+        return dict(status)
+
+    def _query_player_status(self, player_name: str, team: str = None) -> Optional[Dict]:
+        """Latest player_news row for a player ({} if none, None on error)"""
+        conn = self._get_conn()
         cur = conn.cursor(cursor_factory=RealDictCursor)
         
         try:
@@ -399,7 +544,43 @@ class NewsAgent:
             
         except Exception as e:
             self.logger.error(f"Error getting player status: {e}")
+            return None
+        finally:
+            cur.close()
+            self._put_conn(conn)
+
+    def get_player_statuses_bulk(self, pairs: List[Tuple[str, str]]) -> Dict[Tuple[str, str], Dict]:
+        """Get latest injury/news status for many (player_name, team) pairs in one query"""
+        if not pairs:
+            return {}
+        
+        lowered = {(name.lower(), team.lower()) for name, team in pairs}
+        
+        conn = self._get_conn()
+        cur = conn.cursor(cursor_factory=RealDictCursor)
+        
+        try:
+            # Latest row per (player, team), matched case-insensitively like get_player_status
+            cur.execute("""
+                SELECT DISTINCT ON (LOWER(player_name), LOWER(team)) *
+                FROM player_news
+                WHERE (LOWER(player_name), LOWER(team)) IN %s
+                ORDER BY LOWER(player_name), LOWER(team), last_updated DESC
+            """, (tuple(lowered),))
+            
+            latest = {
+                (row['player_name'].lower(), row['team'].lower()): row
+                for row in cur.fetchall()
+            }
+            return {
+                (name, team): latest[(name.lower(), team.lower())]
+                for name, team in pairs
+                if (name.lower(), team.lower()) in latest
+            }
+            
+        except Exception as e:
+            self.logger.error(f"Error getting player statuses: {e}")
             return {}
         finally:
             cur.close()
-            conn.close()
\ No newline at end of file
+            self._put_conn(conn)
\ No newline at end of file
@@ -1,6 +1,4 @@
 # Test script: test_agents.py
-import sys
-sys.path.append('src')
 
 from agents.data_buff import EnhancedDataBuffAgent
 from agents.fixture_agent import FixtureAgent
@@ -4,18 +4,13 @@ Simple test file for FANTASYPL Fixture Agent
 Place this in your root directory and run: python test_fixture.py
 """
 
-import sys
-import os
-
-# Add src to path
-sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
 
 def test_fixture_agent():
     """Test the fixture agent functionality"""
     print("🧪 Testing FANTASYPL Fixture Agent...")
     
     try:
-        # Import after setting path
+        # Requires the package installed (pip install -e .)
         from agents.fixture_agent import FixtureAgent
         from config.settings import DATABASE_CONFIG
         
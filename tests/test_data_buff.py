@@ -0,0 +1,116 @@
+import csv
+import io
+import unittest
+from contextlib import contextmanager
+
+from agents.data_buff import AdvancedAnalytics, DatabaseManager
+
+
+class FakeCursor:
+    """Records statements and the CSV handed to COPY"""
+
+    def __init__(self):
+        self.statements = []
+        self.copied = None
+
+    def execute(self, query, params=None):
+        self.statements.append(' '.join(query.split()))
+
+    def copy_expert(self, query, file):
+        self.statements.append(query)
+        self.copied = list(csv.reader(io.StringIO(file.read())))
+
+
+class CopyUpsertTests(unittest.TestCase):
+    columns = ('player_id', 'gameweek', 'season', 'total_points')
+    conflict_columns = ('player_id', 'gameweek', 'season')
+    update_columns = ('total_points',)
+
+    def test_keeps_last_row_per_conflict_key(self):
+        cursor = FakeCursor()
+        rows = [(1, 5, '2024-25', 3), (2, 5, '2024-25', 4), (1, 5, '2024-25', 9)]
+        DatabaseManager({}).copy_upsert_with(
+            cursor, 'gameweek_performance', self.columns, rows,
+            self.conflict_columns, self.update_columns
+        )
+        self.assertEqual(cursor.copied, [['1', '5', '2024-25', '9'], ['2', '5', '2024-25', '4']])
+
+    def test_stages_then_upserts(self):
+        cursor = FakeCursor()
+        DatabaseManager({}).copy_upsert_with(
+            cursor, 'gameweek_performance', self.columns, [(1, 5, '2024-25', 3)],
+            self.conflict_columns, self.update_columns
+        )
+        create, copy, insert = cursor.statements
+        self.assertTrue(create.startswith('CREATE TEMP TABLE gameweek_performance_stage ON COMMIT DROP'))
+        self.assertEqual(
+            copy,
+            'COPY gameweek_performance_stage (player_id, gameweek, season, total_points) FROM STDIN WITH CSV'
+        )
+        self.assertIn('FROM gameweek_performance_stage', insert)
+        self.assertIn('ON CONFLICT (player_id, gameweek, season) DO UPDATE SET', insert)
+        self.assertIn('total_points = EXCLUDED.total_points', insert)
+
+    def test_copy_upsert_runs_in_one_transaction(self):
+        db = DatabaseManager({})
+        cursor = FakeCursor()
+        entered = []
+
+        @contextmanager
+        def transaction():
+            entered.append(True)
+            yield cursor
+
+        db.transaction = transaction
+        db.copy_upsert(
+            'players', ('id', 'season', 'now_cost'), [(1, '2024-25', 55), (1, '2024-25', 60)],
+            ('id', 'season'), ('now_cost',)
+        )
+        self.assertEqual(entered, [True])
+        self.assertEqual(cursor.copied, [['1', '2024-25', '60']])
+
+    def test_no_rows_touch_nothing(self):
+        db = DatabaseManager({})
+        cursor = FakeCursor()
+        db.transaction = None  # Would fail if copy_upsert opened a transaction
+        db.copy_upsert('players', ('id',), [], ('id',), ())
+        db.copy_upsert_with(cursor, 'players', ('id',), [], ('id',), ())
+        self.assertEqual(cursor.statements, [])
+
+
+class BatchMetricsTests(unittest.TestCase):
+    histories = [
+        {'points': [2, 6, 1, 8, 3, 0, 12, 5, 7, 2, 9], 'minutes': [90, 90, 45, 90, 90, 0, 90, 90, 90, 60, 90]},
+        {'points': [0, 0, 0, 0], 'minutes': [0, 0, 0, 0]},
+        {'points': [3, 5], 'minutes': [90, 90]},
+        {'points': [4, 4, 4, 4, 4], 'minutes': [90, 90, 90, 90, 90]},
+        {'points': [1, 2, 3, 4, 5, 6, 7, 8, 9], 'minutes': [90] * 9},
+        {'points': [0, 0, 0, 0, 0], 'minutes': [90] * 5},
+        {'points': [10, 1, 8, 2, 6, 0], 'minutes': [90, 90, 90, 90, 90, 90]},
+        {'points': [], 'minutes': []},
+    ]
+    now_costs = [55, 45, 0, 60, 100, 40, 75, 50]
+
+    def test_matches_per_player_formulas(self):
+        analytics = AdvancedAnalytics(None)
+        metrics = analytics.calculate_batch_metrics(self.histories, self.now_costs)
+
+        for i, (history, now_cost) in enumerate(zip(self.histories, self.now_costs)):
+            played = [p for p, m in zip(history['points'], history['minutes']) if m]
+            trend, form_score = analytics.calculate_form_trend(i, played)
+            with self.subTest(player=i):
+                self.assertAlmostEqual(
+                    metrics['expected_points'][i],
+                    analytics.calculate_expected_points(i, recent_points=history['points'][::-1][:10])
+                )
+                self.assertAlmostEqual(
+                    metrics['value_score'][i],
+                    analytics.calculate_value_score(i, now_cost, sum(history['points']))
+                )
+                self.assertAlmostEqual(metrics['consistency'][i], analytics.calculate_consistency_score(i, played))
+                self.assertEqual(metrics['form_trend'][i], trend)
+                self.assertAlmostEqual(metrics['form_score'][i], form_score)
+
+
+if __name__ == '__main__':
+    unittest.main()
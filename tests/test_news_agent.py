@@ -0,0 +1,59 @@
+import unittest
+
+from agents.news_agent import NewsAgent
+
+
+class NormalizeTeamTests(unittest.TestCase):
+    def test_known_names_map_to_fpl_names(self):
+        cases = {
+            'Manchester United': 'Man Utd',
+            'manchester city': 'Man City',
+            ' Tottenham ': 'Spurs',
+            'West Ham United': 'West Ham',
+            'West Bromwich Albion': 'West Brom',
+            'Sheffield United': 'Sheffield Utd',
+            'Leeds United': 'Leeds',
+            'man utd': 'Man Utd',
+        }
+        for name, expected in cases.items():
+            with self.subTest(name=name):
+                self.assertEqual(NewsAgent._normalize_team(name), expected)
+
+    def test_similar_names_are_not_misrouted(self):
+        self.assertEqual(NewsAgent._normalize_team('West Brom'), 'West Brom')
+        self.assertEqual(NewsAgent._normalize_team('West Bromwich Albion'), 'West Brom')
+        self.assertEqual(NewsAgent._normalize_team('Manchester'), 'Manchester')
+
+    def test_unknown_names_are_returned_unchanged(self):
+        self.assertEqual(NewsAgent._normalize_team('Real Madrid'), 'Real Madrid')
+
+
+class LatestPerPlayerTests(unittest.TestCase):
+    # Newest first, as returned by the recent-news query
+    rows = [
+        {'player_name': 'Saka', 'team': 'Arsenal', 'status': 'doubtful', 'play_probability': 0.5},
+        {'player_name': 'Salah', 'team': 'Liverpool', 'status': 'fit', 'play_probability': 1.0},
+        {'player_name': 'Saka', 'team': 'Arsenal', 'status': 'out', 'play_probability': 0.0},
+        {'player_name': 'Saka', 'team': 'Brentford', 'status': 'fit', 'play_probability': 0.9},
+    ]
+
+    def test_keeps_newest_row_per_player_and_team(self):
+        latest = NewsAgent._latest_per_player(self.rows, ('player_name', 'team', 'status'))
+        self.assertEqual(latest, [
+            {'player_name': 'Saka', 'team': 'Arsenal', 'status': 'doubtful'},
+            {'player_name': 'Salah', 'team': 'Liverpool', 'status': 'fit'},
+            {'player_name': 'Saka', 'team': 'Brentford', 'status': 'fit'},
+        ])
+
+    def test_predicate_filters_before_picking_newest(self):
+        latest = NewsAgent._latest_per_player(
+            self.rows, ('player_name', 'status'), lambda row: row['play_probability'] < 0.3
+        )
+        self.assertEqual(latest, [{'player_name': 'Saka', 'status': 'out'}])
+
+    def test_no_rows(self):
+        self.assertEqual(NewsAgent._latest_per_player([], ('player_name',)), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
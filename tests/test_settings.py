@@ -0,0 +1,48 @@
+import os
+import unittest
+from unittest import mock
+
+from config import settings
+
+
+class LazyConfigTests(unittest.TestCase):
+    def setUp(self):
+        settings.invalidate_env_cache()
+        self.addCleanup(settings.invalidate_env_cache)
+
+    def test_configs_are_built_on_first_access_and_memoized(self):
+        self.assertNotIn('DATABASE_CONFIG', vars(settings))
+        config = settings.DATABASE_CONFIG
+        self.assertIs(vars(settings)['DATABASE_CONFIG'], config)
+        self.assertIs(settings.DATABASE_CONFIG, config)
+
+    def test_configs_are_read_only(self):
+        with self.assertRaises(TypeError):
+            settings.REDIS_CONFIG['host'] = 'elsewhere'
+
+    def test_unknown_attribute_raises(self):
+        with self.assertRaises(AttributeError):
+            settings.NOT_A_SETTING
+
+    def test_invalidate_rereads_environment(self):
+        stale = settings.DATABASE_CONFIG
+        with mock.patch.dict(os.environ, {'DB_HOST': 'db.example', 'DB_PORT': '6543'}):
+            settings.invalidate_env_cache()
+            self.assertEqual(settings.DB_HOST, 'db.example')
+            self.assertEqual(settings.DATABASE_CONFIG['host'], 'db.example')
+            self.assertEqual(settings.DATABASE_CONFIG['port'], 6543)
+        self.assertIsNot(settings.DATABASE_CONFIG, stale)
+
+    def test_invalidate_clears_validation_cache(self):
+        with mock.patch.dict(os.environ, {'DB_PASSWORD': 'secret'}):
+            settings.invalidate_env_cache()
+            self.assertTrue(settings.validate_config())
+        with mock.patch.dict(os.environ):
+            os.environ.pop('DB_PASSWORD', None)
+            settings.invalidate_env_cache()
+            with self.assertRaises(ValueError):
+                settings.validate_config()
+
+
+if __name__ == '__main__':
+    unittest.main()